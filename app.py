@@ -1,34 +1,249 @@
 """Dash App Run Function"""
 import datetime
+import threading
+from functools import partial
 import dash
 from dash import dcc, html
 from dash.dependencies import Input, Output, State
 import plotly.graph_objs as go
 
+from classes.consumtion_data import from_epoch, to_epoch
+from classes.downsampler import downsample
+from classes.figure_cache import FigureCache
+from classes.load_statistics import LoadStatistics
+from classes.query_engine import QueryEngine
+from classes.rollup_pyramid import ROLLUP_LEVELS
+from classes.sensor_cache import SensorCache
+
 consumption_data_per_id = {}
 meter_data_per_id = {}
+# Answers the consumption queries of the graph from `consumption_data_per_id`
+query_engine = QueryEngine(consumption_data_per_id)
+# The LoadStatistics per sensor ID, shown as load-duration curves
+load_statistics_per_id = {}
+# The MeterReadings per sensor ID reconstructed from the ESL and SDAT data
+meter_readings_per_id = {}
+# The figures built from the data above, to be invalidated with it
+figure_cache = FigureCache()
+# Guards the data above, new files are merged into it while the app is running.
+data_lock = threading.Lock()
+# Sensor IDs offered by the sensor dropdown at once, typing narrows them down
+MAX_SENSOR_OPTIONS = 100
+# Rollup level of the line chart and the zoomed range in days it is shown below, sorted
+ZOOM_LEVELS = (("observation", 3), ("day", 61), ("month", 731), ("year", None))
+# The shown level is kept until the range leaves its bounds by this factor, so panning
+# and slight zooming do not switch back and forth between two levels
+ZOOM_HYSTERESIS = 1.25
+# Width of the graph in pixels until the browser reported it
+DEFAULT_GRAPH_WIDTH = 1200
+# Points sent per pixel of the graph width, the minimum and the maximum of each pixel
+POINTS_PER_PIXEL = 2
+# Title and x axis title of the line chart per rollup level
+LINE_CHART_TITLES = {
+    "year": ("Jährliche Statistik", "Jahr"),
+    "month": ("Monatliche Statistik", "Monat"),
+    "day": ("Tägliche Statistik", "Tag"),
+    "observation": ("15-Minuten Statistik", "Zeit"),
+}
+# Zoomed ranges of the observations are rounded to the SDAT resolution of 15 minutes
+OBSERVATION_QUANTUM = 900
+# Estimated size of a cached figure: a datetime, a float and their two list slots per
+# point, plus the layout
+FIGURE_BYTES_PER_POINT = 48 + 24 + 2 * 8
+FIGURE_LAYOUT_BYTES = 2048
+
+
+def list_sensor_ids():
+    """Returns the sorted IDs of all sensors with consumption or meter data."""
+    return sorted(set(consumption_data_per_id.keys()) | set(meter_data_per_id.keys()))
+
+
+def empty_figure(title):
+    """Returns a figure without data, shown for sensors missing the selected data."""
+    return go.Figure(layout=go.Layout(title=title))
+
+
+def zoom_level(range_days, current_level=None):
+    """
+    Returns the rollup level a zoomed range of the line chart is shown at.
+
+    The level shown before is kept while the range is within its bounds widened by
+    `ZOOM_HYSTERESIS`.
+    """
+    lower = 0
+    for name, upper in ZOOM_LEVELS:
+        if name == current_level and lower / ZOOM_HYSTERESIS <= range_days and (
+            upper is None or range_days < upper * ZOOM_HYSTERESIS
+        ):
+            return name
+        lower = upper
+    for name, upper in ZOOM_LEVELS:
+        if upper is None or range_days < upper:
+            return name
+
+
+def observation_start(timestamp):
+    """Returns the start of the SDAT interval of a timestamp in seconds since 1970-01-01."""
+    return timestamp - timestamp % OBSERVATION_QUANTUM
+
 
+def next_observation(start):
+    """Returns the start of the SDAT interval after the one starting at `start`."""
+    return start + OBSERVATION_QUANTUM
+
+
+# Bucket start of a timestamp and start of the following bucket per line chart level
+BUCKET_FUNCTIONS = {
+    "observation": (observation_start, next_observation),
+    **{name: (floor, following) for name, _, floor, following in ROLLUP_LEVELS},
+}
+
+
+def quantize_range(level, x_min, x_max):
+    """
+    Rounds a zoomed range inwards to the bucket starts of a rollup level.
+
+    The rounded range selects the same buckets, so figures of slightly different zooms
+    share their cache entry.
+    """
+    floor, following = BUCKET_FUNCTIONS[level]
+    start = floor(to_epoch(x_min))
+    if start < to_epoch(x_min):
+        start = following(start)
+    return from_epoch(start), from_epoch(floor(to_epoch(x_max)))
+
+
+def with_x_range(figure, x_range):
+    """Returns a cached figure dictionary showing a range, the cached one is not changed."""
+    layout = dict(figure["layout"])
+    xaxis = dict(layout.get("xaxis", {}))
+    if x_range is None:
+        xaxis.pop("range", None)
+    else:
+        xaxis["range"] = x_range
+    layout["xaxis"] = xaxis
+    return {"data": figure["data"], "layout": layout}
+
+
+def figure_size(figure):
+    """Estimates the size of a figure dictionary in bytes from its number of points."""
+    points = 0
+    for trace in figure["data"]:
+        points += max(
+            len(trace[axis]) if trace.get(axis) is not None else 0 for axis in ("x", "y")
+        )
+    return FIGURE_LAYOUT_BYTES + points * FIGURE_BYTES_PER_POINT
 
-def run_dash_app(consumption_data_arg, meter_data_arg):
+
+def figure_cache_summary():
+    """Returns the hit and miss counts of the figure cache for the dashboard."""
+    return (
+        f"Diagramm-Cache: {figure_cache.hits} Treffer, {figure_cache.misses} Fehlzugriffe, "
+        f"{len(figure_cache)} Diagramme ({figure_cache.nbytes / 1024 / 1024:.1f} MB)"
+    )
+
+
+def load_duration_figure(sensor_id, statistics):
+    """Returns the load-duration curve of every month of a sensor, one trace per month."""
+    traces = []
+    for monthly_load in statistics.monthly():
+        # Demand in kW if the resolution is known, the volume per observation otherwise
+        to_load = monthly_load.demand if monthly_load.resolution else float
+        shares, volumes = monthly_load.duration_curve()
+        traces.append(
+            go.Scatter(
+                x=shares,
+                y=[to_load(volume) for volume in volumes],
+                mode="lines",
+                name=(
+                    f"{monthly_load.year}-{monthly_load.month:02d} "
+                    f"(Spitze {to_load(monthly_load.peak):.2f}, "
+                    f"P95 {to_load(monthly_load.percentile(95)):.2f})"
+                ),
+            )
+        )
+    unit = "kW" if all(load.resolution for load in statistics.monthly()) else "kWh"
+    return go.Figure(
+        data=traces,
+        layout=go.Layout(
+            title=f"Monatliche Lastdauerlinie für {sensor_id}",
+            xaxis={"title": "Anteil der Zeit (%)"},
+            yaxis={"title": f"Last ({unit})"},
+        ),
+    )
+
+
+def meter_readings_figure(sensor_id, meter_readings, max_points):
+    """Returns the reconstructed meter readings of a sensor and the ESL readings anchoring them."""
+    timestamps = meter_readings.timestamps
+    readings = meter_readings.readings
+    positions = downsample(timestamps, readings, max_points)
+    anchors = meter_readings.anchors
+    return go.Figure(
+        data=[
+            go.Scatter(
+                x=[from_epoch(timestamps[i]) for i in positions],
+                y=[readings[i] for i in positions],
+                mode="lines",
+                name="Rekonstruiert",
+            ),
+            go.Scatter(
+                x=[anchor.timestamp for anchor in anchors],
+                y=[anchor.reading for anchor in anchors],
+                mode="markers",
+                name="ESL-Zählerstand",
+                text=[f"Abweichung {anchor.drift:.3f} kWh" for anchor in anchors],
+            ),
+        ],
+        layout=go.Layout(
+            title=(
+                f"Zählerstand für {sensor_id} "
+                f"(max. Abweichung {meter_readings.max_drift():.3f} kWh)"
+            ),
+            xaxis={"title": "Datum"},
+            yaxis={"title": "Zählerstand (kWh)"},
+        ),
+    )
+
+
+def run_dash_app(
+    consumption_data_arg,
+    meter_data_arg,
+    query_engine_arg=None,
+    load_statistics_arg=None,
+    meter_readings_arg=None,
+):
     """Dash App Run Function"""
-    global consumption_data_per_id, meter_data_per_id
+    global consumption_data_per_id, meter_data_per_id, query_engine, load_statistics_per_id
+    global meter_readings_per_id
     consumption_data_per_id = consumption_data_arg
     meter_data_per_id = meter_data_arg
+    # Without reconstructed readings the meter reading chart stays empty
+    meter_readings_per_id = meter_readings_arg if meter_readings_arg is not None else {}
+    # The engine and the statistics must be updated by whoever adds data to the rollups
+    query_engine = query_engine_arg or QueryEngine(consumption_data_per_id)
+    if load_statistics_arg is None:
+        load_statistics_arg = SensorCache(
+            lambda: consumption_data_per_id,
+            lambda sensor_id: LoadStatistics.from_rollup(
+                sensor_id, consumption_data_per_id.get(sensor_id)
+            ),
+        )
+    load_statistics_per_id = load_statistics_arg
 
     app = dash.Dash(__name__)
-    sensor_ids = list(consumption_data_per_id.keys())
-    initial_sensor_id = sensor_ids[0]
-    chart_types = ["Liniendiagramm", "Balkendiagramm"]
+    # The data of a sensor is built when it is shown first, the IDs are known up front
+    sensor_ids = list_sensor_ids()
+    initial_sensor_id = next(
+        (id_ for id_ in sensor_ids if id_ in consumption_data_per_id),
+        sensor_ids[0] if sensor_ids else None,
+    )
+    chart_types = ["Liniendiagramm", "Balkendiagramm", "Lastdauerlinie", "Zählerstand"]
     initial_chart_type = "Liniendiagramm"
 
     def prepare_initial_data(sensor_id, chart_type):
         if chart_type == "Liniendiagramm":
-            sensor_data = consumption_data_per_id[sensor_id]
-            year_totals = sensor_data["year_totals"]
-            years = sorted(year_totals.keys())
-            year_values = [year_totals[year] for year in years]
-            x_years = [datetime.datetime(year, 1, 1) for year in years]
-            return x_years, year_values
+            return query_engine.query(sensor_id, granularity="year")
         elif chart_type == "Balkendiagramm":
             dates = meter_data_per_id[sensor_id]["dates"]
             totaltarif_values = meter_data_per_id[sensor_id]["totaltarif_values"]
@@ -36,15 +251,19 @@ def run_dash_app(consumption_data_arg, meter_data_arg):
             niedertarif_values = meter_data_per_id[sensor_id]["niedertarif_values"]
             return dates, totaltarif_values, hochtarif_values, niedertarif_values
 
-    x_data, y_data = prepare_initial_data(initial_sensor_id, initial_chart_type)
-
-    if initial_chart_type == "Liniendiagramm":
+    if initial_sensor_id is None:
+        print("No sensors found, the dashboard starts without data.")
+        fig = empty_figure("Keine Sensordaten gefunden")
+    elif initial_chart_type == "Liniendiagramm":
+        with data_lock:
+            x_data, y_data = prepare_initial_data(initial_sensor_id, initial_chart_type)
         fig = go.Figure(
             data=[go.Scatter(x=x_data, y=y_data, mode="lines+markers")],
             layout=go.Layout(
                 title=f"Jährlicher Konsum für {initial_sensor_id}",
                 xaxis={"title": "Year"},
                 yaxis={"title": "Konsum (kWh)"},
+                meta="year",
             ),
         )
     else:
@@ -81,9 +300,12 @@ def run_dash_app(consumption_data_arg, meter_data_arg):
                     html.Label("Sensor ID auswählen:"),
                     dcc.Dropdown(
                         id="sensor-id-dropdown",
-                        options=[{"label": id_, "value": id_} for id_ in sensor_ids],
+                        options=[
+                            {"label": id_, "value": id_}
+                            for id_ in sensor_ids[:MAX_SENSOR_OPTIONS]
+                        ],
                         value=initial_sensor_id,
-                        searchable=False,
+                        searchable=True,
                         clearable=False,
                     ),
                 ],
@@ -108,180 +330,192 @@ def run_dash_app(consumption_data_arg, meter_data_arg):
                 id="stacked-view-checkbox-div",
             ),
             dcc.Graph(id="main-graph", figure=fig, config={"scrollZoom": True}),
+            dcc.Store(id="graph-width"),
+            html.Div(id="figure-cache-stats", style={"color": "gray", "fontSize": "small"}),
         ]
     )
 
+    # The number of points sent is capped by the width of the graph, measured in the browser
+    app.clientside_callback(
+        """
+        function(relayoutData) {
+            var graph = document.getElementById("main-graph");
+            return graph ? graph.offsetWidth : null;
+        }
+        """,
+        Output("graph-width", "data"),
+        Input("main-graph", "relayoutData"),
+    )
+
     @app.callback(
         Output("main-graph", "figure"),
+        Output("figure-cache-stats", "children"),
         Input("chart-type-dropdown", "value"),
         Input("sensor-id-dropdown", "value"),
         Input("stacked-view-checkbox", "value"),
         Input("main-graph", "relayoutData"),
         State("main-graph", "figure"),
+        State("graph-width", "data"),
     )
     def update_graph(
-        selected_chart_type, selected_sensor_id, stacked_view, relayoutData, current_fig
+        selected_chart_type,
+        selected_sensor_id,
+        stacked_view,
+        relayoutData,
+        current_fig,
+        graph_width=None,
     ):
-        # Prepare data based on chart type
-        if selected_chart_type == "Liniendiagramm":
-            sensor_data = consumption_data_per_id[selected_sensor_id]
-            time_series_data = sensor_data["time_series_data"]
-            day_totals = sensor_data["day_totals"]
-            month_totals = sensor_data["month_totals"]
-            year_totals = sensor_data["year_totals"]
-
-            years = sorted(year_totals.keys())
-            x_years = [datetime.datetime(year, 1, 1) for year in years]
-            year_values = [year_totals[year] for year in years]
-
-            if relayoutData is None or "xaxis.range[0]" not in relayoutData:
-                new_fig = go.Figure(
-                    data=[go.Scatter(x=x_years, y=year_values, mode="lines+markers")],
-                    layout=go.Layout(
-                        title=f"Jährliche Statistik für {selected_sensor_id}",
-                        xaxis={"title": "Jahr"},
-                        yaxis={"title": "Konsum (kWh)"},
-                    ),
-                )
-                return new_fig
-
-            x_min_str = relayoutData.get("xaxis.range[0]", None)
-            x_max_str = relayoutData.get("xaxis.range[1]", None)
-            if x_min_str is None or x_max_str is None:
-                new_fig = go.Figure(
-                    data=[go.Scatter(x=x_years, y=year_values, mode="lines+markers")],
-                    layout=go.Layout(
-                        title=f"Jährliche Statistik für {selected_sensor_id}",
-                        xaxis={"title": "Jahr"},
-                        yaxis={"title": "Konsum (kWh)"},
-                    ),
-                )
-                return new_fig
-
-            x_min = datetime.datetime.fromisoformat(x_min_str)
-            x_max = datetime.datetime.fromisoformat(x_max_str)
-            range_days = (x_max - x_min).days
-
-            if range_days > 730:
-                new_fig = go.Figure(
-                    data=[go.Scatter(x=x_years, y=year_values, mode="lines+markers")],
-                    layout=go.Layout(
-                        title=f"Jährliche Statistik für {selected_sensor_id}",
-                        xaxis={"title": "Jahr"},
-                        yaxis={"title": "Konsum (kWh)"},
-                        xaxis_range=[x_min, x_max],
-                    ),
-                )
-                return new_fig
-            elif 60 < range_days <= 730:
-                months = sorted(month_totals.keys())
-                x_months = [datetime.datetime(year, month, 1) for year, month in months]
-                month_values = [month_totals[(year, month)] for year, month in months]
-
-                x_months_filtered = []
-                month_values_filtered = []
-                for x, y in zip(x_months, month_values):
-                    if x_min <= x <= x_max:
-                        x_months_filtered.append(x)
-                        month_values_filtered.append(y)
-                new_fig = go.Figure(
-                    data=[
-                        go.Scatter(
-                            x=x_months_filtered,
-                            y=month_values_filtered,
-                            mode="lines+markers",
-                        )
-                    ],
-                    layout=go.Layout(
-                        title=f"Monatliche Statistik für {selected_sensor_id}",
-                        xaxis={"title": "Monat"},
-                        yaxis={"title": "Konsum (kWh)"},
-                        xaxis_range=[x_min, x_max],
-                    ),
-                )
-                return new_fig
-            elif 2 < range_days <= 60:
-                days = sorted(day_totals.keys())
-                x_days = [
-                    datetime.datetime.combine(date, datetime.time()) for date in days
-                ]
-                day_values = [day_totals[date] for date in days]
-
-                x_days_filtered = []
-                day_values_filtered = []
-                for x, y in zip(x_days, day_values):
-                    if x_min <= x <= x_max:
-                        x_days_filtered.append(x)
-                        day_values_filtered.append(y)
-
-                new_fig = go.Figure(
-                    data=[
-                        go.Scatter(
-                            x=x_days_filtered,
-                            y=day_values_filtered,
-                            mode="lines+markers",
-                        )
-                    ],
-                    layout=go.Layout(
-                        title=f"Tägliche Statistik für {selected_sensor_id}",
-                        xaxis={"title": "Tag"},
-                        yaxis={"title": "Konsum (kWh)"},
-                        xaxis_range=[x_min, x_max],
-                    ),
-                )
-                return new_fig
-            elif range_days <= 2:
-                timestamps = sorted(time_series_data.keys())
-                x_times = [ts for ts in timestamps if x_min <= ts <= x_max]
-                y_values = [time_series_data[ts] for ts in x_times]
-
-                new_fig = go.Figure(
-                    data=[go.Scatter(x=x_times, y=y_values, mode="lines+markers")],
-                    layout=go.Layout(
-                        title=f"15-Minuten Statistik für {selected_sensor_id}",
-                        xaxis={"title": "Zeit"},
-                        yaxis={"title": "Konsum (kWh)"},
-                        xaxis_range=[x_min, x_max],
-                    ),
-                )
-                return new_fig
-            else:
-                return current_fig
+        with data_lock:
+            figure = build_graph(
+                selected_chart_type,
+                selected_sensor_id,
+                stacked_view,
+                relayoutData,
+                current_fig,
+                graph_width,
+            )
+            return figure, figure_cache_summary()
 
-        elif selected_chart_type == "Balkendiagramm":
-            dates = meter_data_per_id[selected_sensor_id]["dates"]
-            totaltarif_values = meter_data_per_id[selected_sensor_id][
-                "totaltarif_values"
-            ]
-            hochtarif_values = meter_data_per_id[selected_sensor_id]["hochtarif_values"]
-            niedertarif_values = meter_data_per_id[selected_sensor_id][
-                "niedertarif_values"
+    def line_figure(sensor_id, level, start_date, end_date, max_points):
+        title, xaxis_title = LINE_CHART_TITLES[level]
+        x_values, y_values = query_engine.query(
+            sensor_id, start_date, end_date, level, max_points=max_points
+        )
+        return go.Figure(
+            data=[go.Scatter(x=x_values, y=y_values, mode="lines+markers")],
+            layout=go.Layout(
+                title=f"{title} für {sensor_id}",
+                xaxis={"title": xaxis_title},
+                yaxis={"title": "Konsum (kWh)"},
+                meta=level,
+            ),
+        )
+
+    def meter_figure(sensor_id, stacked):
+        dates = meter_data_per_id[sensor_id]["dates"]
+        totaltarif_values = meter_data_per_id[sensor_id]["totaltarif_values"]
+        hochtarif_values = meter_data_per_id[sensor_id]["hochtarif_values"]
+        niedertarif_values = meter_data_per_id[sensor_id]["niedertarif_values"]
+
+        if stacked:
+            data_traces = [
+                go.Bar(x=dates, y=hochtarif_values, name="Hochtarif"),
+                go.Bar(x=dates, y=niedertarif_values, name="Niedertarif"),
             ]
+            barmode = "stack"
+            title =f"Meter Daten für {sensor_id} (Gestapelt Hochtarif and Niedertarif)"
+        else:
+            data_traces = [go.Bar(x=dates, y=totaltarif_values, name="Totaltarif")]
+            barmode = "group"
+            title = f"Meter Daten für {sensor_id} (Totaltarif)"
 
-            if "stacked" in stacked_view:
-                data_traces = [
-                    go.Bar(x=dates, y=hochtarif_values, name="Hochtarif"),
-                    go.Bar(x=dates, y=niedertarif_values, name="Niedertarif"),
-                ]
-                barmode = "stack"
-                title =f"Meter Daten für {selected_sensor_id} (Gestapelt Hochtarif and Niedertarif)"
-            else:
-                data_traces = [go.Bar(x=dates, y=totaltarif_values, name="Totaltarif")]
-                barmode = "group"
-                title = f"Meter Daten für {selected_sensor_id} (Totaltarif)"
-
-            # Create bar chart
-            new_fig = go.Figure(
-                data=data_traces,
-                layout=go.Layout(
-                    title=title,
-                    xaxis={"title": "Datum", "type": "date"},
-                    yaxis={"title": "Wert (kWh)"},
-                    hovermode="closest",
-                    barmode=barmode,
-                ),
+        # Create bar chart
+        return go.Figure(
+            data=data_traces,
+            layout=go.Layout(
+                title=title,
+                xaxis={"title": "Datum", "type": "date"},
+                yaxis={"title": "Wert (kWh)"},
+                hovermode="closest",
+                barmode=barmode,
+            ),
+        )
+
+    def build_graph(
+        selected_chart_type,
+        selected_sensor_id,
+        stacked_view,
+        relayoutData,
+        current_fig,
+        graph_width=None,
+    ):
+        # Figures are cached by everything they are built from, the zoomed range only
+        # sets the visible range of the cached figure
+        x_range = None
+        if selected_chart_type == "Liniendiagramm":
+            # Zoomed ranges are read from the rollup level matching their length, repeated
+            # queries are answered from the cache of the query engine. Ranges with more
+            # points than the graph has pixels are downsampled keeping their peaks.
+            if consumption_data_per_id.get(selected_sensor_id) is None:
+                return empty_figure(f"Keine Verbrauchsdaten für {selected_sensor_id}")
+            level = "year"
+            start_date = end_date = None
+            max_points = POINTS_PER_PIXEL * (graph_width or DEFAULT_GRAPH_WIDTH)
+
+            x_min_str = (relayoutData or {}).get("xaxis.range[0]")
+            x_max_str = (relayoutData or {}).get("xaxis.range[1]")
+            if x_min_str is not None and x_max_str is not None:
+                x_min = datetime.datetime.fromisoformat(x_min_str)
+                x_max = datetime.datetime.fromisoformat(x_max_str)
+                x_range = [x_min, x_max]
+                range_days = (x_max - x_min).total_seconds() / 86400
+                # The level shown is kept in the figure, the browser sends it back on zooming
+                current_level = None
+                if isinstance(current_fig, dict):
+                    current_level = current_fig.get("layout", {}).get("meta")
+                level = zoom_level(range_days, current_level)
+                if level != "year":
+                    start_date, end_date = quantize_range(level, x_min, x_max)
+
+            key = (
+                selected_sensor_id,
+                selected_chart_type,
+                None,
+                level,
+                start_date,
+                end_date,
+                max_points,
+            )
+            build = partial(
+                line_figure, selected_sensor_id, level, start_date, end_date, max_points
             )
-            return new_fig
+
+        elif selected_chart_type == "Lastdauerlinie":
+            statistics = load_statistics_per_id.get(selected_sensor_id)
+            if statistics is None:
+                return empty_figure(f"Keine Verbrauchsdaten für {selected_sensor_id}")
+            key = (selected_sensor_id, selected_chart_type)
+            build = partial(load_duration_figure, selected_sensor_id, statistics)
+
+        elif selected_chart_type == "Zählerstand":
+            meter_readings = meter_readings_per_id.get(selected_sensor_id)
+            if meter_readings is None:
+                return empty_figure(f"Keine Zählerstände für {selected_sensor_id}")
+            max_points = POINTS_PER_PIXEL * (graph_width or DEFAULT_GRAPH_WIDTH)
+            key = (selected_sensor_id, selected_chart_type, max_points)
+            build = partial(meter_readings_figure, selected_sensor_id, meter_readings, max_points)
+
+        elif selected_chart_type == "Balkendiagramm":
+            if meter_data_per_id.get(selected_sensor_id) is None:
+                return empty_figure(f"Keine Zählerdaten für {selected_sensor_id}")
+            stacked = "stacked" in stacked_view
+            key = (selected_sensor_id, selected_chart_type, stacked)
+            build = partial(meter_figure, selected_sensor_id, stacked)
+
+        else:
+            return current_fig
+
+        figure = figure_cache.get(key)
+        if figure is None:
+            figure = build().to_plotly_json()
+            figure_cache.put(key, figure, figure_size(figure))
+        return with_x_range(figure, x_range)
+
+    @app.callback(
+        Output("sensor-id-dropdown", "options"),
+        Input("sensor-id-dropdown", "search_value"),
+        State("sensor-id-dropdown", "value"),
+    )
+    def update_sensor_options(search_value, selected_sensor_id):
+        # Also picks up sensors found in new files after the app was started
+        with data_lock:
+            sensor_ids = list_sensor_ids()
+        if search_value:
+            sensor_ids = [id_ for id_ in sensor_ids if search_value.lower() in id_.lower()]
+        sensor_ids = sensor_ids[:MAX_SENSOR_OPTIONS]
+        if selected_sensor_id and selected_sensor_id not in sensor_ids:
+            sensor_ids.append(selected_sensor_id)
+        return [{"label": id_, "value": id_} for id_ in sensor_ids]
 
     @app.callback(
         Output("stacked-view-checkbox-div", "style"),
@@ -0,0 +1,309 @@
+"""Generator for synthetic SDAT and ESL files in the layout of ./data/public
+
+Writes one SDAT file per sensor and day and one ESL file per month. The volumes follow
+a daily profile with noise: consumption (ID742) peaks in the morning and evening, feed-in
+(ID735) around noon. The ESL readings are the running totals of the generated volumes,
+split into high tariff (weekdays 07:00-20:00) and low tariff, taken at the start of each
+month at the same (UTC) clock as the SDAT intervals.
+
+Run from the repository root, e.g.:
+    python -m benchmarks.generate_data ./data/synthetic --sensors 2 --years 1
+"""
+import argparse
+import math
+import os
+import random
+from datetime import datetime, timedelta
+
+from classes.file_reader import ESL_OBIS_SENSORS
+
+# The high and low tariff OBIS codes of the sensors the ESL files have readings for
+ESL_SENSORS = {
+    sensor_id: tuple(sorted(obis for obis, id_ in ESL_OBIS_SENSORS.items() if id_ == sensor_id))
+    for sensor_id in dict.fromkeys(ESL_OBIS_SENSORS.values())
+}
+
+SDAT_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<rsm:ValidatedMeteredData_12 xmlns:rsm="http://www.strom.ch" \
+xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+<rsm:ValidatedMeteredData_HeaderInformation>
+<rsm:HeaderVersion>1.0</rsm:HeaderVersion>
+<rsm:Sender><rsm:ID><rsm:EICID>12X-0000001216-O</rsm:EICID></rsm:ID>\
+<rsm:Role>DSO</rsm:Role></rsm:Sender>
+<rsm:Receiver><rsm:ID><rsm:EICID>12X-LIPPUNEREM-T</rsm:EICID></rsm:ID>\
+<rsm:Role>MOS</rsm:Role></rsm:Receiver>
+<rsm:InstanceDocument><rsm:DictionaryAgencyID>260</rsm:DictionaryAgencyID>\
+<rsm:VersionID>1</rsm:VersionID><rsm:DocumentID>eslevu{number}_{sensor_id}</rsm:DocumentID>\
+<rsm:DocumentType>E66</rsm:DocumentType><rsm:Creation>{creation}</rsm:Creation>\
+</rsm:InstanceDocument>
+<rsm:BusinessScopeProcess><rsm:BusinessReasonType>C04</rsm:BusinessReasonType>\
+<rsm:ServiceTransactionType>E66</rsm:ServiceTransactionType></rsm:BusinessScopeProcess>
+</rsm:ValidatedMeteredData_HeaderInformation>
+<rsm:MeteringData>
+<rsm:DocumentID>{sensor_id}</rsm:DocumentID>
+<rsm:Interval><rsm:StartDateTime>{start}</rsm:StartDateTime>\
+<rsm:EndDateTime>{end}</rsm:EndDateTime></rsm:Interval>
+<rsm:Resolution><rsm:Resolution>{resolution}</rsm:Resolution><rsm:Unit>MIN</rsm:Unit>\
+</rsm:Resolution>
+<rsm:ConsumptionMeteringPoint><rsm:VSENationalID>CH1018601234500000000000000{sensor_id}\
+</rsm:VSENationalID></rsm:ConsumptionMeteringPoint>
+<rsm:Product><rsm:ID>8716867000030</rsm:ID><rsm:MeasureUnit>KWH</rsm:MeasureUnit></rsm:Product>
+{observations}</rsm:MeteringData>
+</rsm:ValidatedMeteredData_12>
+"""
+
+OBSERVATION_TEMPLATE = (
+    "<rsm:Observation><rsm:Position><rsm:Sequence>{sequence}</rsm:Sequence></rsm:Position>"
+    "<rsm:Volume>{volume:.3f}</rsm:Volume></rsm:Observation>\n"
+)
+
+ESL_TEMPLATE = """<?xml version="1.0" encoding="utf-8"?>
+<ESLBillingData version="1.8">
+<Header version="1.8" created="{created}" swSystemNameFrom="synthetic" \
+swSystemNameTo="ESL Evu" />
+<Meter factoryNo="71040102" internalNo="71040102">
+<TimePeriod end="{end}">
+{value_rows}</TimePeriod>
+</Meter>
+</ESLBillingData>
+"""
+
+VALUE_ROW_TEMPLATE = '<ValueRow obis="{obis}" value="{value:.1f}" status="V" />\n'
+
+SDAT_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+ESL_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def sensor_ids(count: int) -> list[str]:
+    """
+    Returns the IDs of the generated sensors, ID742 and ID735 first.
+
+    Args:
+        count (int): The number of sensors.
+
+    Returns:
+        list[str]: The sensor IDs.
+    """
+    ids = list(ESL_SENSORS)[:count]
+    number = 743
+    while len(ids) < count:
+        ids.append(f"ID{number}")
+        number += 1
+    return ids
+
+
+def volume(rng: random.Random, sensor_id: str, timestamp: datetime, resolution: int) -> float:
+    """
+    Returns a synthetic volume in kWh for one observation.
+
+    Args:
+        rng (random.Random): The random generator.
+        sensor_id (str): The sensor, ID735 is generated as feed-in.
+        timestamp (datetime): The start of the observation in UTC.
+        resolution (int): The length of the observation in minutes.
+
+    Returns:
+        float: The volume, rounded to Wh like the SDAT exports.
+    """
+    hour = (timestamp.hour + timestamp.minute / 60 + 1) % 24
+    season = math.cos((timestamp.timetuple().tm_yday - 172) / 365 * 2 * math.pi)
+    if sensor_id == "ID735":
+        daylight = math.sin((hour - 6) / 14 * math.pi) if 6 <= hour <= 20 else 0.0
+        power = 6.0 * daylight * (1.1 + 0.6 * season) * rng.uniform(0.3, 1.0)
+    else:
+        morning = 0.8 * math.exp(-((hour - 7.5) ** 2) / 2)
+        evening = math.exp(-((hour - 19) ** 2) / 4)
+        profile = 0.4 + morning + evening
+        power = profile * (1.3 - 0.4 * season) * rng.uniform(0.6, 1.4)
+    return round(max(power, 0.0) * resolution / 60, 3)
+
+
+def is_high_tariff(timestamp: datetime) -> bool:
+    """Returns True for weekdays 07:00-20:00 local time (UTC+1)."""
+    local = timestamp + timedelta(hours=1)
+    return local.weekday() < 5 and 7 <= local.hour < 20
+
+
+def write_sdat(
+    path: str,
+    sensor_id: str,
+    number: int,
+    start: datetime,
+    resolution: int,
+    volumes: list[float],
+) -> None:
+    """
+    Writes one SDAT file.
+
+    Args:
+        path (str): The file to write.
+        sensor_id (str): The sensor ID, used as suffix of the document ID.
+        number (int): A number making the document ID unique.
+        start (datetime): The start of the interval in UTC.
+        resolution (int): The time between two observations in minutes.
+        volumes (list[float]): The volumes of the observations.
+    """
+    end = start + timedelta(minutes=resolution * len(volumes))
+    observations = "".join(
+        OBSERVATION_TEMPLATE.format(sequence=sequence, volume=value)
+        for sequence, value in enumerate(volumes, 1)
+    )
+    with open(path, "w", encoding="UTF-8") as file:
+        file.write(
+            SDAT_TEMPLATE.format(
+                number=number,
+                sensor_id=sensor_id,
+                creation=(end + timedelta(hours=9)).strftime(SDAT_FORMAT),
+                start=start.strftime(SDAT_FORMAT),
+                end=end.strftime(SDAT_FORMAT),
+                resolution=resolution,
+                observations=observations,
+            )
+        )
+
+
+def write_esl(path: str, end: datetime, totals: dict[str, list[float]]) -> None:
+    """
+    Writes one ESL file with the meter readings at `end`.
+
+    Args:
+        path (str): The file to write.
+        end (datetime): The time of the readings.
+        totals (dict[str, list[float]]): The [high, low] tariff totals per sensor ID.
+    """
+    rows = []
+    for sensor_id, (high_obis, low_obis) in ESL_SENSORS.items():
+        high, low = totals.get(sensor_id, (0.0, 0.0))
+        rows.append(VALUE_ROW_TEMPLATE.format(obis=high_obis, value=high))
+        rows.append(VALUE_ROW_TEMPLATE.format(obis=low_obis, value=low))
+        rows.append(VALUE_ROW_TEMPLATE.format(obis=high_obis[:-1] + "0", value=high + low))
+    with open(path, "w", encoding="UTF-8") as file:
+        file.write(
+            ESL_TEMPLATE.format(
+                created=(end + timedelta(days=2)).strftime(ESL_FORMAT),
+                end=end.strftime(ESL_FORMAT),
+                value_rows="".join(rows),
+            )
+        )
+
+
+def generate(
+    output_dir: str,
+    sensors: int = 2,
+    years: float = 1.0,
+    resolution: int = 15,
+    duplicate_ratio: float = 0.0,
+    overlap: float = 0.0,
+    start: datetime = datetime(2019, 1, 1),
+    seed: int = 1,
+) -> dict:
+    """
+    Generates SDAT and ESL files into `output_dir`/SDAT-Files and `output_dir`/ESL-Files.
+
+    Args:
+        output_dir (str): The directory to write to, created if missing.
+        sensors (int): The number of sensors, see `sensor_ids`.
+        years (float): The covered time span in years of 365 days.
+        resolution (int): The time between two observations in minutes.
+        duplicate_ratio (float): The share of SDAT files that are delivered a second time
+                                 under another file name with identical content.
+        overlap (float): The share of SDAT files followed by a corrected re-delivery that
+                         starts in the middle of the day and covers half of the next day.
+        start (datetime): The first day, files start at 23:00 UTC of the previous day.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        dict: The number of SDAT files, ESL files and SDAT observations written.
+    """
+    rng = random.Random(seed)
+    sdat_dir = os.path.join(output_dir, "SDAT-Files")
+    esl_dir = os.path.join(output_dir, "ESL-Files")
+    os.makedirs(sdat_dir, exist_ok=True)
+    os.makedirs(esl_dir, exist_ok=True)
+
+    ids = sensor_ids(sensors)
+    per_day = 24 * 60 // resolution
+    step = timedelta(minutes=resolution)
+    totals = {sensor_id: [0.0, 0.0] for sensor_id in ids}
+    stats = {"sdat_files": 0, "esl_files": 0, "observations": 0}
+    number = 0
+
+    def write(name: str, sensor_id: str, day_start: datetime, values: list[float]) -> None:
+        nonlocal number
+        number += 1
+        write_sdat(
+            os.path.join(sdat_dir, name), sensor_id, number, day_start, resolution, values
+        )
+        stats["sdat_files"] += 1
+        stats["observations"] += len(values)
+
+    day = start
+    end = start + timedelta(days=round(years * 365))
+    pending: dict[str, tuple[datetime, list[float]]] = {}
+    while day < end:
+        day_start = day - timedelta(hours=1)
+        if day.day == 1:
+            write_esl(os.path.join(esl_dir, f"{day:%Y%m%d}_ESL.xml"), day_start, totals)
+            stats["esl_files"] += 1
+
+        for sensor_id in ids:
+            values = []
+            for index in range(per_day):
+                timestamp = day_start + index * step
+                value = volume(rng, sensor_id, timestamp, resolution)
+                values.append(value)
+                totals[sensor_id][0 if is_high_tariff(timestamp) else 1] += value
+
+            name = f"{day:%Y%m%d}_{sensor_id}.xml"
+            write(name, sensor_id, day_start, values)
+            if rng.random() < duplicate_ratio:
+                write(f"{day:%Y%m%d}_{sensor_id}_copy.xml", sensor_id, day_start, values)
+
+            # A re-delivery overlapping the second half of this day and the next day
+            previous = pending.pop(sensor_id, None)
+            if previous is not None:
+                overlap_start, overlap_values = previous
+                corrected = [
+                    round(value * rng.uniform(0.95, 1.05), 3)
+                    for value in overlap_values + values[:per_day // 2]
+                ]
+                write(f"{day:%Y%m%d}_{sensor_id}_overlap.xml", sensor_id, overlap_start, corrected)
+            if rng.random() < overlap:
+                pending[sensor_id] = (day_start + per_day // 2 * step, values[per_day // 2:])
+
+        day += timedelta(days=1)
+
+    write_esl(os.path.join(esl_dir, f"{day:%Y%m%d}_ESL.xml"), day - timedelta(hours=1), totals)
+    stats["esl_files"] += 1
+    return stats
+
+
+def main():
+    """Parses the command line and generates the files."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("output_dir", help="Directory for SDAT-Files and ESL-Files")
+    parser.add_argument("--sensors", type=int, default=2)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--resolution", type=int, default=15, help="Minutes per observation")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0)
+    parser.add_argument("--overlap", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    stats = generate(
+        args.output_dir,
+        sensors=args.sensors,
+        years=args.years,
+        resolution=args.resolution,
+        duplicate_ratio=args.duplicate_ratio,
+        overlap=args.overlap,
+        seed=args.seed,
+    )
+    print(
+        f"Wrote {stats['sdat_files']} SDAT files with {stats['observations']} observations "
+        f"and {stats['esl_files']} ESL files to {args.output_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
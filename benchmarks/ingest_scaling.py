@@ -0,0 +1,55 @@
+"""Benchmark: SDAT/ESL ingest throughput by number of worker processes"""
+import argparse
+import os
+import time
+from classes.file_reader import FileReader
+
+
+def benchmark(dirpath: str, read_file, file_type: str, worker_counts: list[int], repeat: int):
+    """
+    Times `FileReader.read_files` for every worker count and prints the throughput.
+
+    Args:
+        dirpath (str): The directory containing the XML files.
+        read_file: The single file parser, e.g. `FileReader.read_sdat_file`.
+        file_type (str): The file type shown in the output, e.g. "SDAT".
+        worker_counts (list[int]): The worker counts to measure.
+        repeat (int): The number of runs per worker count, the fastest run is reported.
+    """
+    files = FileReader.list_xml_files(dirpath)
+    if not files:
+        print(f"No {file_type} files found in {dirpath}.")
+        return
+
+    print(f"{file_type}: {len(files)} files in {dirpath}")
+    print(f"{'workers':>8} {'seconds':>10} {'files/s':>10} {'speedup':>8}")
+    baseline = None
+    for workers in worker_counts:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            FileReader.read_files(files, read_file, file_type, workers)
+            best = min(best, time.perf_counter() - start)
+        if baseline is None:
+            baseline = best
+        print(f"{workers:>8} {best:>10.3f} {len(files) / best:>10.1f} {baseline / best:>7.2f}x")
+
+
+def main():
+    """Parses the command line and runs the benchmark."""
+    cpu_count = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, 8, cpu_count} & set(range(1, cpu_count + 1)))
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sdat-dir", default="./data/public/SDAT-Files")
+    parser.add_argument("--esl-dir", default="./data/public/ESL-Files")
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    benchmark(args.sdat_dir, FileReader.read_sdat_file, "SDAT", args.workers, args.repeat)
+    benchmark(args.esl_dir, FileReader.read_esl_file, "ESL", args.workers, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark: MeterStore vs. MeterData object graph for ESL readings"""
+import argparse
+import gc
+import time
+import tracemalloc
+from classes.data_processor import DataProcessor
+from classes.file_reader import ESL_OBIS_SENSORS, FileReader
+from classes.meter_store import MeterStore
+
+
+def build_object_graph(dirpath: str):
+    """Builds the MeterData list and the parallel tuples per sensor like apprun used to."""
+    data_meter = FileReader.read_esl_files(dirpath)
+    grouped_meter_data = DataProcessor.group_meter_data_by_month(
+        DataProcessor.filter_meter_data(data_meter)
+    )
+    meter_data_per_id = {}
+    for sensor_id in dict.fromkeys(ESL_OBIS_SENSORS.values()):
+        rows = sorted(
+            (
+                (meter_data.timestamp, reading.totalcost, reading.highcost, reading.lowcost)
+                for meter_data_list in grouped_meter_data.values()
+                for meter_data in meter_data_list
+                if (reading := meter_data.get_reading(sensor_id)) is not None
+            ),
+            key=lambda x: x[0],
+        )
+        meter_data_per_id[sensor_id] = tuple(zip(*rows))
+    return data_meter, meter_data_per_id
+
+
+def build_store(dirpath: str) -> MeterStore:
+    """Builds the MeterStore directly from the ESL files."""
+    return FileReader.read_esl_store(dirpath)
+
+
+def measure(function, *args) -> tuple[float, float]:
+    """
+    Runs a builder and measures its runtime and the memory held by its result.
+
+    Returns:
+        tuple[float, float]: The runtime in seconds and the retained memory in MB.
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    duration = time.perf_counter() - start
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return duration, retained / 1024 / 1024
+
+
+def main():
+    """Parses the command line and runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--esl-dir", default="./data/public/ESL-Files")
+    args = parser.parse_args()
+
+    file_count = len(FileReader.list_xml_files(args.esl_dir))
+    print(f"ESL: {file_count} files in {args.esl_dir}")
+    print(f"{'variant':<14} {'seconds':>10} {'retained MB':>12}")
+    for name, function in (("object graph", build_object_graph), ("MeterStore", build_store)):
+        duration, retained = measure(function, args.esl_dir)
+        print(f"{name:<14} {duration:>10.3f} {retained:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark: cold-start vs. warm-start ingest with the persistent parse cache"""
+import argparse
+import os
+import tempfile
+import time
+from classes.file_reader import FileReader
+from classes.parse_cache import ParseCache
+
+
+def timed(function, *args, **kwargs) -> float:
+    """Returns the runtime of one call in seconds."""
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def benchmark(dirpath: str, read_files, file_type: str, cache_path: str, workers: int):
+    """
+    Times an uncached read, a cold read that fills the cache and a warm read from the cache.
+
+    Args:
+        dirpath (str): The directory containing the XML files.
+        read_files: `FileReader.read_sdat_files` or `FileReader.read_esl_files`.
+        file_type (str): The file type shown in the output, e.g. "SDAT".
+        cache_path (str): The cache file used for the benchmark, it is deleted first.
+        workers (int): The number of worker processes used for parsing.
+    """
+    file_count = len(FileReader.list_xml_files(dirpath))
+    if file_count == 0:
+        print(f"{file_type:<6} no files found in {dirpath}")
+        return
+
+    cache = ParseCache(cache_path)
+    cache.invalidate()
+    no_cache = timed(read_files, dirpath, workers=workers)
+    cold = timed(read_files, dirpath, workers=workers, cache=cache)
+    warm_cache = ParseCache(cache_path)
+    warm = timed(read_files, dirpath, workers=workers, cache=warm_cache)
+    size = os.path.getsize(cache_path) / 1024 / 1024
+
+    print(
+        f"{file_type:<6} {file_count:>8} {no_cache:>10.3f} {cold:>10.3f} {warm:>10.3f} "
+        f"{no_cache / warm:>7.1f}x {size:>9.2f}"
+    )
+
+
+def main():
+    """Parses the command line and runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sdat-dir", default="./data/public/SDAT-Files")
+    parser.add_argument("--esl-dir", default="./data/public/ESL-Files")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    print(
+        f"{'type':<6} {'files':>8} {'no cache':>10} {'cold [s]':>10} {'warm [s]':>10} "
+        f"{'speedup':>8} {'cache MB':>9}"
+    )
+    with tempfile.TemporaryDirectory() as cache_dir:
+        benchmark(
+            args.sdat_dir, FileReader.read_sdat_files, "SDAT",
+            os.path.join(cache_dir, "sdat.cache"), args.workers,
+        )
+        benchmark(
+            args.esl_dir, FileReader.read_esl_files, "ESL",
+            os.path.join(cache_dir, "esl.cache"), args.workers,
+        )
+
+
+if __name__ == "__main__":
+    main()
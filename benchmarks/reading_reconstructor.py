@@ -0,0 +1,75 @@
+"""Benchmark: ReadingReconstructor on multi-year series with and without NumPy"""
+import argparse
+import random
+import time
+from datetime import timedelta
+
+import classes.reading_reconstructor as reading_reconstructor
+from benchmarks.rollup_pyramid import make_series
+from classes.consumtion_data import ConsumptionData
+from classes.meter_store import MeterSeries
+from classes.reading_reconstructor import ReadingReconstructor
+
+
+def make_meter_series(timestamps, volumes, days: int, seed: int) -> MeterSeries:
+    """
+    Creates ESL readings every few days that drift slightly from the summed volumes.
+
+    Args:
+        timestamps: The timestamps of the series.
+        volumes: The volumes of the series.
+        days (int): The days between two readings.
+        seed (int): The seed of the random drift.
+
+    Returns:
+        MeterSeries: The readings.
+    """
+    rng = random.Random(seed)
+    meter_series = MeterSeries()
+    reading = 10000.0
+    next_reading = timestamps[0]
+    for timestamp, volume in zip(timestamps, volumes):
+        if timestamp >= next_reading:
+            meter_series.append(timestamp, round(reading + rng.uniform(-0.5, 0.5), 1), 0.0, 0.0)
+            next_reading += days * 86400
+        reading += volume
+    return meter_series
+
+
+def main():
+    """Parses the command line and runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=float, nargs="+", default=[1.0, 5.0])
+    parser.add_argument("--resolution", type=int, default=15, help="Minutes per observation")
+    parser.add_argument("--anchor-days", type=int, default=30, help="Days between ESL readings")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per variant, best is kept")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    variants = [("pure Python", None)]
+    if reading_reconstructor.np is not None:
+        variants.append(("NumPy", reading_reconstructor.np))
+    else:
+        print("NumPy is not installed: only the pure Python variant runs")
+    print(f"{'years':>6} {'observations':>13} {'anchors':>8} {'variant':<12} {'seconds':>8} {'max drift':>10}")
+    for years in args.years:
+        timestamps, volumes = make_series(years, args.resolution, args.seed)
+        series = ConsumptionData("ID742", None, None, timedelta(minutes=args.resolution))
+        series.set_columns(timestamps, volumes)
+        meter_series = make_meter_series(timestamps, volumes, args.anchor_days, args.seed)
+        for name, module in variants:
+            reading_reconstructor.np = module
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                readings = ReadingReconstructor.reconstruct(series, meter_series)
+                best = min(best, time.perf_counter() - start)
+            print(
+                f"{years:>6g} {len(timestamps):>13} {len(readings.anchors):>8} {name:<12} "
+                f"{best:>8.3f} {readings.max_drift():>10.3f}"
+            )
+        reading_reconstructor.np = variants[-1][1]
+
+
+if __name__ == "__main__":
+    main()
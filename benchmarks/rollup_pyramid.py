@@ -0,0 +1,196 @@
+"""Benchmark: RollupPyramid vs. the aggregation dicts for building, zooming and updating
+
+The dicts are built like `apprun` did before the rollups replaced them, one dictionary
+update per observation and total. The pyramid is measured with NumPy, if installed, and
+in pure Python.
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from array import array
+from datetime import datetime, timedelta
+
+import classes.rollup_pyramid as rollup_pyramid
+from classes.consumtion_data import from_epoch, to_epoch
+from classes.rollup_pyramid import RollupPyramid
+
+SECONDS_PER_DAY = 86400
+
+
+def make_series(years: float, resolution: int, seed: int) -> tuple[array, array]:
+    """
+    Creates a gapless canonical series starting on 2019-01-01.
+
+    Args:
+        years (float): The covered time span in years.
+        resolution (int): The minutes between two observations.
+        seed (int): The seed of the random volumes.
+
+    Returns:
+        tuple[array, array]: The timestamps and volumes.
+    """
+    step = resolution * 60
+    count = int(years * 365 * SECONDS_PER_DAY / step)
+    start = to_epoch(datetime(2019, 1, 1))
+    rng = random.Random(seed)
+    timestamps = array("q", range(start, start + count * step, step))
+    volumes = array("d", (round(rng.uniform(0.0, 2.0), 3) for _ in range(count)))
+    return timestamps, volumes
+
+
+def add_to_dicts(aggregated_data: dict, timestamps: array, volumes: array) -> dict:
+    """Adds observations to the time series, day, month and year dicts."""
+    time_series_data = aggregated_data["time_series_data"]
+    day_totals = aggregated_data["day_totals"]
+    month_totals = aggregated_data["month_totals"]
+    year_totals = aggregated_data["year_totals"]
+    for epoch, volume in zip(timestamps, volumes):
+        timestamp = from_epoch(epoch)
+        time_series_data[timestamp] = time_series_data.get(timestamp, 0.0) + volume
+        date = timestamp.date()
+        day_totals[date] = day_totals.get(date, 0.0) + volume
+        year_month = (date.year, date.month)
+        month_totals[year_month] = month_totals.get(year_month, 0.0) + volume
+        year_totals[date.year] = year_totals.get(date.year, 0.0) + volume
+    return aggregated_data
+
+
+def build_dicts(timestamps: array, volumes: array) -> dict:
+    """Builds the time series, day, month and year dicts like apprun used to."""
+    aggregated_data = {
+        "time_series_data": {},
+        "day_totals": {},
+        "month_totals": {},
+        "year_totals": {},
+    }
+    return add_to_dicts(aggregated_data, timestamps, volumes)
+
+
+def build_pyramid(timestamps: array, volumes: array) -> RollupPyramid:
+    """Builds the hour, day, week, month and year rollups."""
+    return RollupPyramid.from_series(timestamps, volumes)
+
+
+def measure(function, *args) -> tuple[float, float]:
+    """
+    Runs a builder and measures its runtime and the memory held by its result.
+
+    The runtime is measured without tracing, tracemalloc slows down allocations.
+
+    Returns:
+        tuple[float, float]: The runtime in seconds and the retained memory in MB.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    result = function(*args)
+    duration = time.perf_counter() - start
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = function(*args)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return duration, retained / 1024 / 1024
+
+
+def update_dicts(aggregated_data: dict, timestamps: array, volumes: array) -> None:
+    """Adds a document to the aggregation dicts like apprun used to."""
+    add_to_dicts(aggregated_data, timestamps, volumes)
+
+
+def zoom_dicts(aggregated_data: dict, level: str, x_min: datetime, x_max: datetime) -> list:
+    """Sorts and filters one aggregation dict like `update_graph` used to."""
+    if level == "month":
+        totals = aggregated_data["month_totals"]
+        keys = sorted(totals)
+        x_values = [datetime(year, month, 1) for year, month in keys]
+        y_values = [totals[key] for key in keys]
+    elif level == "day":
+        totals = aggregated_data["day_totals"]
+        keys = sorted(totals)
+        x_values = [datetime.combine(date, datetime.min.time()) for date in keys]
+        y_values = [totals[key] for key in keys]
+    else:
+        totals = aggregated_data["time_series_data"]
+        x_values = sorted(totals)
+        y_values = [totals[key] for key in x_values]
+    return [(x, y) for x, y in zip(x_values, y_values) if x_min <= x <= x_max]
+
+
+def zoom_pyramid(rollup: RollupPyramid, level: str, x_min: datetime, x_max: datetime) -> list:
+    """Slices one level of the pyramid like `update_graph` does."""
+    if level == "observation":
+        first, stop = rollup.find(x_min, x_max)
+        return list(zip(rollup.dates(first, stop), rollup.volumes[first:stop]))
+    rollup_level = rollup.level(level)
+    first, stop = rollup_level.find(x_min, x_max)
+    return list(zip(rollup_level.dates(first, stop), rollup_level.sums[first:stop]))
+
+
+def main():
+    """Parses the command line and runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=float, nargs="+", default=[1.0, 5.0])
+    parser.add_argument("--resolution", type=int, default=15, help="Minutes per observation")
+    parser.add_argument("--queries", type=int, default=20, help="Zoom queries per level")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    numpy_module = rollup_pyramid.np
+    if numpy_module is None:
+        print("NumPy is not installed: RollupPyramid only runs in pure Python")
+    # Zoom spans as chosen by update_graph: months up to 2 years, days up to 60 days,
+    # observations up to 2 days
+    spans = (("month", 365), ("day", 30), ("observation", 1))
+    for years in args.years:
+        timestamps, volumes = make_series(years, args.resolution, args.seed)
+        print(f"{years:g} years, {len(timestamps)} observations")
+        print(f"{'variant':<14} {'build s':>10} {'retained MB':>12} {'zoom ms':>10} {'update ms':>10}")
+
+        rng = random.Random(args.seed)
+        first_day = from_epoch(timestamps[0])
+        last_day = from_epoch(timestamps[-1])
+        windows = []
+        for level, days in spans:
+            for _ in range(args.queries):
+                offset = rng.uniform(0, max(0.0, (last_day - first_day).days - days))
+                x_min = first_day + timedelta(days=offset)
+                windows.append((level, x_min, x_min + timedelta(days=days)))
+        # A corrected delivery of one day in the middle of the series
+        middle = timestamps[len(timestamps) // 2]
+        day_timestamps = array("q", range(middle, middle + SECONDS_PER_DAY, args.resolution * 60))
+        day_volumes = array("d", [1.0] * len(day_timestamps))
+
+        variants = [
+            ("dicts", None, build_dicts, zoom_dicts, update_dicts),
+            ("pyramid Python", None, build_pyramid, zoom_pyramid, RollupPyramid.update),
+        ]
+        if numpy_module is not None:
+            variants.append(
+                ("pyramid NumPy", numpy_module, build_pyramid, zoom_pyramid, RollupPyramid.update)
+            )
+        for name, module, build, zoom, update in variants:
+            rollup_pyramid.np = module
+            duration, retained = measure(build, timestamps, volumes)
+            data = build(timestamps, volumes)
+
+            start = time.perf_counter()
+            for level, x_min, x_max in windows:
+                zoom(data, level, x_min, x_max)
+            zoom_ms = (time.perf_counter() - start) / len(windows) * 1000
+
+            start = time.perf_counter()
+            update(data, day_timestamps, day_volumes)
+            update_ms = (time.perf_counter() - start) * 1000
+            print(f"{name:<14} {duration:>10.3f} {retained:>12.3f} {zoom_ms:>10.3f} {update_ms:>10.3f}")
+        rollup_pyramid.np = numpy_module
+        print()
+
+
+if __name__ == "__main__":
+    main()
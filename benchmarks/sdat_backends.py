@@ -0,0 +1,72 @@
+"""Benchmark: SDAT parsing throughput per parser backend"""
+import argparse
+import time
+from classes.file_reader import FileReader
+
+
+def snapshot(consumption_data) -> tuple:
+    """Returns the comparable content of a ConsumptionData object."""
+    return (
+        consumption_data.document_id,
+        consumption_data.start_date,
+        consumption_data.end_date,
+        consumption_data.resolution,
+        list(consumption_data.timestamps),
+        list(consumption_data.volumes),
+    )
+
+
+def benchmark(dirpath: str, backends: list[str], repeat: int):
+    """
+    Parses all SDAT files with every backend and prints the throughput.
+
+    The results of every backend are compared with the "etree" backend, and for the
+    "scan" backend the number of files it could read without falling back is shown.
+
+    Args:
+        dirpath (str): The directory containing the SDAT files.
+        backends (list[str]): The backends to measure.
+        repeat (int): The number of runs per backend, the fastest run is reported.
+    """
+    files = FileReader.list_xml_files(dirpath)
+    if not files:
+        print(f"No SDAT files found in {dirpath}.")
+        return
+
+    expected = [snapshot(FileReader.read_sdat_file(file)) for file in files]
+    print(f"SDAT: {len(files)} files in {dirpath}")
+    print(f"{'backend':>8} {'seconds':>10} {'files/s':>10} {'speedup':>8} {'identical':>10}")
+    baseline = None
+    for backend in backends:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = [FileReader.read_sdat_file(file, backend) for file in files]
+            best = min(best, time.perf_counter() - start)
+        if baseline is None:
+            baseline = best
+        identical = [snapshot(data) for data in result] == expected
+        print(
+            f"{backend:>8} {best:>10.3f} {len(files) / best:>10.1f} {baseline / best:>7.2f}x "
+            f"{'yes' if identical else 'NO':>10}"
+        )
+
+    if "scan" in backends:
+        scanned = sum(FileReader.scan_sdat_file(file) is not None for file in files)
+        print(f"scan read {scanned} of {len(files)} files without falling back to etree")
+
+
+def main():
+    """Parses the command line and runs the benchmark."""
+    available = FileReader.available_sdat_backends()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sdat-dir", default="./data/public/SDAT-Files")
+    parser.add_argument("--backends", nargs="+", choices=available, default=available)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    benchmark(args.sdat_dir, args.backends, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark: SeriesStore vs. in-memory ConsumptionData lists for loading and range queries
+
+Loads generated SDAT files once into memory like `main.read` and once into a SeriesStore,
+then queries one day of every sensor. The retained memory is measured with tracemalloc,
+which does not count the mapped column files: their pages belong to the page cache and
+are only read when a query touches them. Loading runs under tracemalloc, which slows
+down parsing the files several times over.
+"""
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from benchmarks.generate_data import generate
+from classes.consumption_index import ConsumptionIndex
+from classes.file_reader import FileReader
+from classes.series_merger import SeriesMerger
+from classes.series_store import SeriesStore
+
+
+def load_memory(sdat_dir: str, store_dir: str) -> ConsumptionIndex:
+    """Reads all documents into memory and indexes them."""
+    return ConsumptionIndex(FileReader.read_sdat_files(sdat_dir))
+
+
+def load_store(sdat_dir: str, store_dir: str) -> SeriesStore:
+    """Opens the store written before the measurement."""
+    return SeriesStore(store_dir)
+
+
+def query_memory(consumption_index: ConsumptionIndex, sensor_id: str, day: datetime) -> int:
+    """Merges the documents of one day like `apprun` does for a whole sensor."""
+    series = SeriesMerger.merge(
+        consumption_index.query(sensor_id, day, day + timedelta(days=1))
+    )
+    return 0 if series is None else len(series)
+
+
+def query_store(series_store: SeriesStore, sensor_id: str, day: datetime) -> int:
+    """Slices one day out of the mapped series."""
+    return len(series_store.query(sensor_id, day, day + timedelta(days=1)))
+
+
+def main():
+    """Parses the command line and runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sensors", type=int, default=20)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        stats = generate(directory, sensors=args.sensors, years=args.years, overlap=0.05)
+        sdat_dir = os.path.join(directory, "SDAT-Files")
+        store_dir = os.path.join(directory, "store")
+        print(f"{stats['sdat_files']} SDAT files, {stats['observations']} observations")
+
+        start = time.perf_counter()
+        FileReader.read_sdat_store(sdat_dir, SeriesStore(store_dir))
+        print(f"adding all files to the store: {time.perf_counter() - start:.3f} s")
+        store_mb = sum(
+            os.path.getsize(os.path.join(store_dir, name)) for name in os.listdir(store_dir)
+        ) / 1024 / 1024
+        print(f"store size on disk: {store_mb:.3f} MB")
+
+        rng = random.Random(args.seed)
+        days = [
+            datetime(2019, 1, 1) + timedelta(days=rng.randrange(int(args.years * 365)))
+            for _ in range(args.queries)
+        ]
+        print(f"{'variant':<10} {'load s':>8} {'retained MB':>12} {'day query ms':>13}")
+        for name, load, query in (
+            ("memory", load_memory, query_memory),
+            ("store", load_store, query_store),
+        ):
+            gc.collect()
+            tracemalloc.start()
+            start = time.perf_counter()
+            data = load(sdat_dir, store_dir)
+            duration = time.perf_counter() - start
+            sensor_ids = data.sensor_ids()
+
+            start = time.perf_counter()
+            for day in days:
+                query(data, rng.choice(sensor_ids), day)
+            query_ms = (time.perf_counter() - start) / len(days) * 1000
+            gc.collect()
+            retained = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+            tracemalloc.stop()
+            print(f"{name:<10} {duration:>8.3f} {retained:>12.3f} {query_ms:>13.3f}")
+            del data
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Benchmark: startup time and combined memory of the GUI and Dash processes
+
+Compares the old startup, where both processes parse all XML files, with the
+snapshot startup, where a loader process parses once and the GUI and Dash processes
+both map the written snapshot. All processes are started with the "spawn" method, so
+the Dash process does not inherit the pages of the GUI process. Uses the `resource`
+module and therefore only runs on Unix.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from classes.file_reader import FileReader
+from classes.snapshot import Snapshot
+
+
+def memory_mb() -> float:
+    """
+    Returns the memory of the current process in MB.
+
+    Uses the proportional set size from /proc/self/smaps_rollup where available, which
+    splits pages shared with other processes (like a mapped snapshot) between them.
+    Falls back to the peak resident set size otherwise.
+    """
+    try:
+        with open("/proc/self/smaps_rollup", encoding="UTF-8") as file:
+            for line in file:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def touch(data_consumption) -> float:
+    """Reads every volume once, like the aggregation in the Dash process does."""
+    return sum(sum(consumption_data.volumes) for consumption_data in data_consumption)
+
+
+def load_snapshot(sdat_dir: str, esl_dir: str, snapshot_path: str) -> None:
+    """Parses all files and writes the snapshot, like `main.write_snapshot`."""
+    data_consumption = FileReader.read_sdat_files(sdat_dir)
+    Snapshot.write(snapshot_path, data_consumption, FileReader.read_esl_store(esl_dir))
+
+
+def load(mode: str, sdat_dir: str, esl_dir: str, snapshot_path: str):
+    """Loads the consumption data the way a process does in the given mode."""
+    if mode == "parse twice":
+        data_consumption = FileReader.read_sdat_files(sdat_dir)
+        FileReader.read_esl_store(esl_dir)
+    else:
+        data_consumption, _ = Snapshot.load(snapshot_path)
+    touch(data_consumption)
+    return data_consumption
+
+
+def dash_process(mode: str, sdat_dir: str, esl_dir: str, snapshot_path: str, queue, done):
+    """Loads the data the way the Dash process does and reports its memory."""
+    data_consumption = load(mode, sdat_dir, esl_dir, snapshot_path)
+    queue.put(memory_mb())
+    # Keep the data until the GUI process has measured its memory as well
+    done.wait()
+    del data_consumption
+
+
+def gui_process(mode: str, sdat_dir: str, esl_dir: str, snapshot_path: str, queue) -> None:
+    """Loads the data like `main.main`, starts the Dash process and reports both results."""
+    context = multiprocessing.get_context("spawn")
+    start = time.perf_counter()
+    if mode == "snapshot":
+        loader = context.Process(target=load_snapshot, args=(sdat_dir, esl_dir, snapshot_path))
+        loader.start()
+        loader.join()
+    data_consumption = load(mode, sdat_dir, esl_dir, snapshot_path)
+
+    child_queue = context.Queue()
+    done = context.Event()
+    child = context.Process(
+        target=dash_process, args=(mode, sdat_dir, esl_dir, snapshot_path, child_queue, done)
+    )
+    child.start()
+    child_memory = child_queue.get()
+    seconds = time.perf_counter() - start
+    gui_memory = memory_mb()
+    done.set()
+    child.join()
+    del data_consumption
+    queue.put((seconds, gui_memory, child_memory))
+
+
+def main():
+    """Parses the command line and runs both startup variants in fresh processes."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sdat-dir", default="./data/public/SDAT-Files")
+    parser.add_argument("--esl-dir", default="./data/public/ESL-Files")
+    args = parser.parse_args()
+
+    print(f"{'variant':<12} {'seconds':>9} {'GUI MB':>8} {'Dash MB':>8} {'total MB':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_path = os.path.join(directory, "snapshot.bin")
+        context = multiprocessing.get_context("spawn")
+        for mode in ("parse twice", "snapshot"):
+            queue = context.Queue()
+            process = context.Process(
+                target=gui_process,
+                args=(mode, args.sdat_dir, args.esl_dir, snapshot_path, queue),
+            )
+            process.start()
+            seconds, gui_memory, dash_memory = queue.get()
+            process.join()
+            print(
+                f"{mode:<12} {seconds:>9.3f} {gui_memory:>8.1f} {dash_memory:>8.1f} "
+                f"{gui_memory + dash_memory:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Benchmark suite: parse, dedupe, aggregate and figure build at several dataset sizes
+
+Generates synthetic data with `benchmarks.generate_data` for every size, times each
+stage the way the application runs it and writes the results as JSON:
+
+    parse      FileReader.read_sdat_files and FileReader.read_esl_store
+    dedupe     DataProcessor.filter_data on all consumption data
+    aggregate  ConsumptionIndex, SeriesMerger and RollupPyramid per sensor, sharded across
+               --workers processes like the apprun preload
+    figure     the yearly and the full time series line chart per sensor (needs plotly)
+
+Pass an earlier result file with --compare to print the change per stage, e.g.:
+    python -m benchmarks.suite --years 0.25 1 --compare data/benchmarks/before.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.generate_data import generate
+from classes.consumption_index import ConsumptionIndex
+from classes.data_processor import DataProcessor
+from classes.file_reader import FileReader
+from classes.meter_store import MeterStore
+from classes.sensor_cache import build_rollups
+
+STAGES = ("parse", "dedupe", "aggregate", "figure")
+
+
+def best_of(repeat: int, function, *args, **kwargs) -> tuple[object, float]:
+    """
+    Calls `function` `repeat` times.
+
+    Returns:
+        tuple[object, float]: The result of the last call and the fastest runtime in seconds.
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def parse(sdat_dir: str, esl_dir: str, workers: int, backend: str) -> tuple[list, MeterStore]:
+    """Reads all SDAT and ESL files."""
+    data_consumption = FileReader.read_sdat_files(sdat_dir, workers=workers, backend=backend)
+    meter_store = FileReader.read_esl_store(esl_dir, workers=workers)
+    return data_consumption, meter_store
+
+
+def aggregate(data_consumption: list, workers: int) -> dict:
+    """Merges and rolls up the consumption data of every sensor like `apprun` preloads it."""
+    return build_rollups(ConsumptionIndex(data_consumption), workers=workers)
+
+
+def build_figures(consumption_data_per_id: dict) -> list:
+    """Builds the yearly and the full time series line chart of every sensor."""
+    # Imported here, so the other stages run without plotly installed
+    from classes.data_visualizer import DataVisualizer
+
+    figures = []
+    for sensor_id, rollup in consumption_data_per_id.items():
+        year_level = rollup.level("year")
+        figures.append(
+            DataVisualizer.generate_line_chart(
+                year_level.sums.tolist(), [str(date.year) for date in year_level.dates()], sensor_id
+            )
+        )
+        figures.append(
+            DataVisualizer.generate_line_chart(rollup.volumes.tolist(), rollup.dates(), sensor_id)
+        )
+    return figures
+
+
+def run_size(directory: str, years: float, args: argparse.Namespace) -> dict:
+    """
+    Generates a dataset of the given size and times every stage on it.
+
+    Args:
+        directory (str): An empty directory for the generated files.
+        years (float): The covered time span in years.
+        args (argparse.Namespace): The parsed command line.
+
+    Returns:
+        dict: The dataset size and the runtime of every stage in seconds. Skipped stages
+        have a runtime of `None`.
+    """
+    stats = generate(
+        directory,
+        sensors=args.sensors,
+        years=years,
+        resolution=args.resolution,
+        duplicate_ratio=args.duplicate_ratio,
+        overlap=args.overlap,
+        seed=args.seed,
+    )
+    sdat_dir = os.path.join(directory, "SDAT-Files")
+    esl_dir = os.path.join(directory, "ESL-Files")
+    seconds = {}
+
+    (data_consumption, _), seconds["parse"] = best_of(
+        args.repeat, parse, sdat_dir, esl_dir, args.workers, args.backend
+    )
+    _, seconds["dedupe"] = best_of(args.repeat, DataProcessor.filter_data, data_consumption)
+    consumption_data_per_id, seconds["aggregate"] = best_of(
+        args.repeat, aggregate, data_consumption, args.workers
+    )
+    try:
+        _, seconds["figure"] = best_of(args.repeat, build_figures, consumption_data_per_id)
+    except ImportError:
+        seconds["figure"] = None
+
+    return {"years": years, **stats, "seconds": seconds}
+
+
+def git_commit() -> str:
+    """Returns the current git commit, or `None` outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_seconds(value: float) -> str:
+    """Formats a stage runtime, skipped stages are shown as "-"."""
+    return "-" if value is None else f"{value:.3f}"
+
+
+def print_run(run: dict, previous: dict = None) -> None:
+    """Prints one result line, with the change against `previous` if given."""
+    columns = [f"{run['years']:>6g}", f"{run['sdat_files']:>7}", f"{run['observations']:>10}"]
+    for stage in STAGES:
+        value = run["seconds"][stage]
+        text = format_seconds(value)
+        old = previous["seconds"].get(stage) if previous else None
+        if value is not None and old:
+            text += f" ({value / old:.2f}x)"
+        columns.append(f"{text:>18}")
+    print(" ".join(columns))
+
+
+def main():
+    """Parses the command line, runs all sizes and writes the results."""
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n", 1)[0],
+        epilog="Ratios in parentheses are new/old runtime, below 1 is faster.",
+    )
+    parser.add_argument(
+        "--years", type=float, nargs="+", default=[0.25, 1.0], help="Dataset sizes in years"
+    )
+    parser.add_argument("--sensors", type=int, default=2)
+    parser.add_argument("--resolution", type=int, default=15, help="Minutes per observation")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1)
+    parser.add_argument("--overlap", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--backend", choices=FileReader.available_sdat_backends(), default="etree"
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage, best is kept")
+    parser.add_argument(
+        "--output",
+        default=f"./data/benchmarks/{datetime.now():%Y%m%d-%H%M%S}.json",
+        help="JSON file for the results",
+    )
+    parser.add_argument("--compare", help="Earlier JSON result file to compare with")
+    args = parser.parse_args()
+
+    previous_runs = {}
+    if args.compare:
+        with open(args.compare, encoding="UTF-8") as file:
+            previous_runs = {run["years"]: run for run in json.load(file)["runs"]}
+
+    header = [f"{'years':>6}", f"{'files':>7}", f"{'values':>10}"]
+    header += [f"{stage + ' [s]':>18}" for stage in STAGES]
+    print(" ".join(header))
+
+    runs = []
+    for years in args.years:
+        with tempfile.TemporaryDirectory() as directory:
+            run = run_size(directory, years, args)
+        runs.append(run)
+        print_run(run, previous_runs.get(years))
+    if any(run["seconds"]["figure"] is None for run in runs):
+        print("figure skipped, plotly is not installed")
+
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": {
+            key: value for key, value in vars(args).items() if key not in ("output", "compare")
+        },
+        "runs": runs,
+    }
+    directory = os.path.dirname(args.output)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(args.output, "w", encoding="UTF-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark: latency of the zoom and pan steps of `update_graph` on multi-year series
+
+Replays zoom and pan gestures on the line chart of one sensor. "before" sorts and
+filters the aggregation dicts on every event like `update_graph` used to, "after" slices
+the sorted RollupPyramid levels by bisection through the QueryEngine, downsampled to the
+default graph width like the app does. "after, cached" replays the same gestures again,
+answered from the result cache. Dash is not needed, the figures are not built.
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from benchmarks.rollup_pyramid import build_dicts, make_series, zoom_dicts
+from classes.consumtion_data import from_epoch
+from classes.query_engine import QueryEngine
+from classes.rollup_pyramid import RollupPyramid
+
+# Mirrors app.DEFAULT_GRAPH_WIDTH and app.POINTS_PER_PIXEL, app imports Dash
+MAX_POINTS = 2 * 1200
+
+
+def make_gestures(first_day, last_day, count: int, seed: int) -> list:
+    """
+    Creates zoom and pan events: a random window at each zoom level in turn, then shifted
+    a few times.
+
+    Args:
+        first_day (datetime): The start of the series.
+        last_day (datetime): The end of the series.
+        count (int): The number of gestures.
+        seed (int): The seed of the random windows.
+
+    Returns:
+        list: The (level, x_min, x_max) of every event, with the level `update_graph`
+        chooses for the span without hysteresis.
+    """
+    rng = random.Random(seed)
+    events = []
+    spans = (("month", 365), ("day", 30), ("observation", 1.5))
+    for gesture in range(count):
+        level, days = spans[gesture % len(spans)]
+        offset = rng.uniform(0, max(0.0, (last_day - first_day).days - 2 * days))
+        x_min = first_day + timedelta(days=offset)
+        for _ in range(5):
+            events.append((level, x_min, x_min + timedelta(days=days)))
+            x_min += timedelta(days=days / 10)
+    return events
+
+
+def replay_dicts(aggregated_data: dict, events: list) -> None:
+    """Sorts and filters the aggregation dicts for every event."""
+    for level, x_min, x_max in events:
+        zoom_dicts(aggregated_data, level, x_min, x_max)
+
+
+def replay_engine(query_engine: QueryEngine, events: list) -> None:
+    """Queries the rollups for every event like `build_graph` does."""
+    for level, x_min, x_max in events:
+        query_engine.query("ID742", x_min, x_max, level, max_points=MAX_POINTS)
+
+
+def main():
+    """Parses the command line and runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=float, nargs="+", default=[1.0, 5.0])
+    parser.add_argument("--resolution", type=int, default=15, help="Minutes per observation")
+    parser.add_argument("--gestures", type=int, default=20, help="Zoom gestures of 5 events")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'years':>6} {'observations':>13} {'variant':<14} {'ms per event':>13} {'max ms':>8}")
+    for years in args.years:
+        timestamps, volumes = make_series(years, args.resolution, args.seed)
+        events = make_gestures(
+            from_epoch(timestamps[0]), from_epoch(timestamps[-1]), args.gestures, args.seed
+        )
+        aggregated_data = build_dicts(timestamps, volumes)
+        query_engine = QueryEngine(
+            {"ID742": RollupPyramid.from_series(timestamps, volumes)},
+            max_entries=len(events),
+        )
+        for name, replay, data in (
+            ("before", replay_dicts, aggregated_data),
+            ("after", replay_engine, query_engine),
+            ("after, cached", replay_engine, query_engine),
+        ):
+            latencies = []
+            for event in events:
+                start = time.perf_counter()
+                replay(data, [event])
+                latencies.append((time.perf_counter() - start) * 1000)
+            print(
+                f"{years:>6g} {len(timestamps):>13} {name:<14} "
+                f"{sum(latencies) / len(latencies):>13.3f} {max(latencies):>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,114 +1,290 @@
 """Apprun Function"""
-from collections import defaultdict
-import app
-from classes.data_processor import DataProcessor
+from classes.consumption_index import ConsumptionIndex
+from classes.consumtion_data import ConsumptionData, from_epoch
+from classes.directory_watcher import DirectoryWatcher
+from classes.file_reader import FileReader
+from classes.load_statistics import LoadStatistics
+from classes.query_engine import QueryEngine
+from classes.reading_reconstructor import ReadingReconstructor
+from classes.rollup_pyramid import find_range
+from classes.sensor_cache import (
+    SensorCache,
+    build_rollup,
+    build_rollups,
+    build_stored_rollup,
+    build_stored_rollups,
+)
+from classes.series_merger import MergeReport, SeriesMerger
 
-def apprun(data_consumption, data_meter):
+
+def merge_consumption_data(
+    new_data,
+    consumption_data_per_id,
+    consumption_index,
+    merge_policy="latest",
+    load_statistics_per_id=None,
+    merge_report=None,
+    files=None,
+):
     """
-    Processes consumption and meter data for specified sensor IDs and runs the Dash app.
+    Merges newly read consumption data into the index and the loaded per-sensor rollups.
+
+    Documents already in the index (same document ID, start and end date) are skipped,
+    like `DataProcessor.filter_data` does for the initial data. A new document is merged
+    by `SeriesMerger` with the loaded observations within its time range, newly read
+    documents count as delivered last, and the result is written into the rollups.
+    Sensors whose rollups are not loaded yet get the new documents from the index once
+    they are built.
 
     Args:
-        dataConsumption: The consumption data to process.
-        dataMeter: The meter data to process.
+        new_data: The newly read ConsumptionData objects.
+        consumption_data_per_id: The SensorCache of the RollupPyramid per sensor ID.
+        consumption_index: The ConsumptionIndex of all documents loaded so far, or the
+            SeriesStore holding them.
+        merge_policy: The conflict policy of `SeriesMerger`.
+        load_statistics_per_id: The SensorCache of the LoadStatistics per sensor ID,
+            optional. The statistics of a document that does not overlap loaded
+            observations are merged into them, otherwise they are computed again on
+            their next request.
+        merge_report: The MergeReport the overlaps, gaps and (with the "flag" policy)
+            conflicts with loaded observations are added to, optional.
+        files: The source files of the new data, recorded by a SeriesStore so they are
+            not added again after a restart. Only passed to a SeriesStore.
+
+    Returns:
+        The number of new observations that overlapped already loaded ones.
     """
-    data_processor = DataProcessor()
-    sensor_ids = ["ID742", "ID735"]
+    if merge_report is None:
+        merge_report = MergeReport()
+    overlapping = 0
+    if files is None:
+        added = consumption_index.add(new_data)
+    else:
+        added = consumption_index.add(new_data, files)
+    for consumption_data in added:
+        sensor_id = consumption_data.document_id
+        document_overlapping = 0
+        if consumption_data_per_id.is_loaded(sensor_id) and len(consumption_data):
+            rollup = consumption_data_per_id[sensor_id]
+            low = min(consumption_data.timestamps)
+            high = max(consumption_data.timestamps)
+            first, stop = find_range(rollup.timestamps, low, high)
+            loaded = ConsumptionData(sensor_id, from_epoch(low), from_epoch(high))
+            loaded.set_columns(rollup.timestamps[first:stop], rollup.volumes[first:stop])
+            known_overlaps = len(merge_report.overlaps)
+            series = SeriesMerger.merge([loaded, consumption_data], merge_policy, merge_report)
+            document_overlapping = sum(
+                overlap.duplicates + overlap.conflicts
+                for overlap in merge_report.overlaps[known_overlaps:]
+            )
+            rollup.update(series.timestamps, series.volumes)
+            overlapping += document_overlapping
+        if load_statistics_per_id is None or not load_statistics_per_id.is_loaded(sensor_id):
+            continue
+        if document_overlapping or not consumption_data_per_id.is_loaded(sensor_id):
+            load_statistics_per_id.invalidate({sensor_id})
+        else:
+            load_statistics_per_id[sensor_id].merge(
+                LoadStatistics.from_documents([consumption_data])[sensor_id]
+            )
+    return overlapping
 
-    consumption_data_per_id = {}
-    meter_data_per_id = {}
 
-    def aggregate_entries(entries):
-        """
-        Aggregates entry data into time series, day totals, month totals, and year totals.
+def meter_series_to_dict(series):
+    """
+    Converts the MeterSeries of a sensor into the lists plotted by the Dash app.
 
-        Args:
-            entries: A list of entries to aggregate.
+    Args:
+        series: The MeterSeries of one sensor.
 
-        Returns:
-            A dictionary containing aggregated data.
-        """
-        time_series_data = defaultdict(float)
-        day_totals = defaultdict(float)
-        month_totals = defaultdict(float)
-        year_totals = defaultdict(float)
+    Returns:
+        A dictionary with the dates and the total, high and low tariff values.
+    """
+    return {
+        "dates": series.dates(),
+        "totaltarif_values": list(series.totalcost),
+        "hochtarif_values": list(series.highcost),
+        "niedertarif_values": list(series.lowcost),
+    }
 
-        for entry in entries:
-            timestamp = entry.timestamp
-            volume = entry.volume
 
-            time_series_data[timestamp] += volume
+def merge_meter_data(new_readings, meter_data_per_id, meter_store):
+    """
+    Merges newly read meter readings into the meter store and the per-sensor series.
 
-            date = timestamp.date()
-            day_totals[date] += volume
+    Readings with a timestamp that is already in the store are skipped.
 
-            year_month = (date.year, date.month)
-            month_totals[year_month] += volume
+    Args:
+        new_readings: The timestamp and readings of every newly read ESL file, see
+            `FileReader.read_esl_readings`.
+        meter_data_per_id: The SensorCache of the meter series per sensor ID, the series
+            of sensors with new readings are built again on their next request.
+        meter_store: The MeterStore holding all readings loaded so far.
 
-            year_totals[date.year] += volume
+    Returns:
+        The IDs of the sensors with new readings.
+    """
+    for timestamp, readings in new_readings:
+        meter_store.add_readings(timestamp, readings)
+    meter_store.sort()
+    sensor_ids = {reading[0] for _, readings in new_readings for reading in readings}
+    meter_data_per_id.invalidate(sensor_ids)
+    return sensor_ids
 
-        return {
-            "time_series_data": dict(time_series_data),
-            "day_totals": dict(day_totals),
-            "month_totals": dict(month_totals),
-            "year_totals": dict(year_totals),
-        }
 
-    for sensor_id in sensor_ids:
-        sensor_data = data_processor.get_data(sensor_id, data_consumption)
+def apprun(
+    data_consumption,
+    meter_store,
+    sdat_dir=None,
+    esl_dir=None,
+    merge_policy="latest",
+    preload_workers=0,
+    series_store=None,
+    known_sdat_files=None,
+    known_esl_files=None,
+    obis_sensors=None,
+):
+    """
+    Processes consumption and meter data of all sensors and runs the Dash app.
 
-        if not sensor_data:
+    The sensors are discovered from the data. The documents of a sensor are merged into
+    one canonical series, so overlapping deliveries are not counted twice, and rolled up
+    into a RollupPyramid the first time the sensor is shown. The absolute meter readings
+    of a sensor are reconstructed from its observations and ESL readings, see
+    `ReadingReconstructor`, the first time they are shown.
+
+    Args:
+        dataConsumption: The consumption data to process.
+        meter_store: The MeterStore of the meter readings, see `FileReader.read_esl_store`.
+            New ESL files are added to it.
+        sdat_dir: The SDAT directory to watch for new files, not watched if omitted.
+        esl_dir: The ESL directory to watch for new files, not watched if omitted.
+        merge_policy: The conflict policy for overlapping documents, see `SeriesMerger`.
+        preload_workers: Build the rollups of all sensors before starting the app, with
+            this many worker processes (`None` uses all cores). 0 builds them on demand.
+        series_store: The SeriesStore to read the consumption data from instead of
+            `dataConsumption`, which is added to it. Its merge policy is used, new SDAT
+            files are added to it.
+        known_sdat_files: The SDAT files the data was read from, listed before reading
+            them, so files added while loading are reported by the watcher. Defaults to
+            the files in `sdat_dir` once it is watched.
+        known_esl_files: The ESL files the data was read from, like `known_sdat_files`.
+        obis_sensors: The sensor ID of every OBIS code read from new ESL files, the
+            mapping `meter_store` was read with. Defaults to `ESL_OBIS_SENSORS`.
+    """
+    # Imported here, so the aggregation functions above can be used without Dash installed
+    import app
+
+    if series_store is None:
+        consumption_index = ConsumptionIndex(data_consumption)
+    else:
+        series_store.add(data_consumption)
+        consumption_index = series_store
+        merge_policy = series_store.merge_policy
+    def build_consumption_data(sensor_id):
+        """Merges and rolls up the documents of a sensor."""
+        if series_store is not None:
+            return build_stored_rollup(series_store, sensor_id)
+        merge_report = MergeReport()
+        rollup = build_rollup(consumption_index.query(sensor_id), merge_policy, merge_report)
+        if rollup is None:
             print(f"No data found for {sensor_id}.")
-            continue
+        else:
+            print(f"Merged consumption data of {sensor_id}: {merge_report.summary()}.")
+        return rollup
+
+    def build_meter_data(sensor_id):
+        """Converts the meter readings of a sensor for the Dash app."""
+        return meter_series_to_dict(meter_store.query(sensor_id))
 
-        entries = [
-            entry for consumption_data in sensor_data for entry in consumption_data.data
-        ]
+    consumption_data_per_id = SensorCache(
+        lambda: consumption_index.sensors, build_consumption_data
+    )
+    meter_data_per_id = SensorCache(lambda: meter_store.series, build_meter_data)
 
-        aggregated_data = aggregate_entries(entries)
+    def build_meter_readings(sensor_id):
+        """Reconstructs the meter readings of a sensor from its observations."""
+        rollup = consumption_data_per_id.get(sensor_id)
+        if rollup is None:
+            return None
+        series = ConsumptionData(sensor_id, None, None)
+        series.set_columns(rollup.timestamps, rollup.volumes)
+        return ReadingReconstructor.reconstruct(series, meter_store.query(sensor_id))
 
-        consumption_data_per_id[sensor_id] = aggregated_data
+    meter_readings_per_id = SensorCache(lambda: meter_store.series, build_meter_readings)
+    query_engine = QueryEngine(consumption_data_per_id)
+    load_statistics_per_id = SensorCache(
+        lambda: consumption_index.sensors,
+        lambda sensor_id: LoadStatistics.from_rollup(
+            sensor_id, consumption_data_per_id.get(sensor_id)
+        ),
+    )
+    print(
+        f"Found {len(consumption_data_per_id)} sensors with consumption data "
+        f"and {len(meter_data_per_id)} with meter data."
+    )
 
-    filtered_meter_data = data_processor.filter_meter_data(data_meter)
-    grouped_meter_data = data_processor.group_meter_data_by_month(filtered_meter_data)
+    if preload_workers != 0 and series_store is not None:
+        consumption_data_per_id.loaded.update(
+            build_stored_rollups(series_store, None, preload_workers)
+        )
+    elif preload_workers != 0:
+        merge_report = MergeReport()
+        consumption_data_per_id.loaded.update(
+            build_rollups(consumption_index, None, merge_policy, preload_workers, merge_report)
+        )
+        print(f"Merged consumption data: {merge_report.summary()}.")
 
-    for sensor_id in sensor_ids:
-        dates = []
-        totaltarif_values = []
-        hochtarif_values = []
-        niedertarif_values = []
+    def on_new_sdat_files(files):
+        """Parses new SDAT files and merges them into the running dashboard."""
+        if series_store is not None:
+            # Files added to the store before a restart are not added again
+            files = [file for file in files if not series_store.is_added(file)]
+        new_data = [data for data in map(FileReader.read_sdat_file, files) if data is not None]
+        merge_report = MergeReport()
+        with app.data_lock:
+            overlapping = merge_consumption_data(
+                new_data,
+                consumption_data_per_id,
+                consumption_index,
+                merge_policy,
+                load_statistics_per_id,
+                merge_report,
+                None if series_store is None else files,
+            )
+            sensor_ids = {data.document_id for data in new_data}
+            query_engine.invalidate(sensor_ids)
+            meter_readings_per_id.invalidate(sensor_ids)
+            app.figure_cache.invalidate(sensor_ids)
+        print(
+            f"Loaded {len(new_data)} new SDAT files, {overlapping} overlapping observations "
+            f"({merge_report.summary()})."
+        )
 
-        for meter_data_list in grouped_meter_data.values():
-            for meter_data in meter_data_list:
-                if sensor_id in meter_data.data:
-                    dates.append(meter_data.timestamp)
-                    reading = meter_data.get_reading(sensor_id)
-                    totaltarif_values.append(reading.totalcost)
-                    hochtarif_values.append(reading.highcost)
-                    niedertarif_values.append(reading.lowcost)
+    def on_new_esl_files(files):
+        """Parses new ESL files and merges them into the running dashboard."""
+        read_file = FileReader.esl_read_function(obis_sensors)
+        new_readings = [parsed for parsed in map(read_file, files) if parsed is not None]
+        with app.data_lock:
+            sensor_ids = merge_meter_data(new_readings, meter_data_per_id, meter_store)
+            meter_readings_per_id.invalidate(sensor_ids)
+            app.figure_cache.invalidate(sensor_ids)
+        print(f"Loaded {len(new_readings)} new ESL files.")
 
-        sorted_data = sorted(
-            zip(dates, totaltarif_values, hochtarif_values, niedertarif_values),
-            key=lambda x: x[0],
+    watchers = []
+    if sdat_dir is not None:
+        watchers.append(
+            DirectoryWatcher(sdat_dir, on_new_sdat_files, known_files=known_sdat_files)
         )
+    if esl_dir is not None:
+        watchers.append(DirectoryWatcher(esl_dir, on_new_esl_files, known_files=known_esl_files))
+    for watcher in watchers:
+        watcher.start()
 
-        if sorted_data:
-            (
-                dates_sorted,
-                totaltarif_values_sorted,
-                hochtarif_values_sorted,
-                niedertarif_values_sorted,
-            ) = zip(*sorted_data)
-        else:
-            dates_sorted = []
-            totaltarif_values_sorted = []
-            hochtarif_values_sorted = []
-            niedertarif_values_sorted = []
-
-        meter_data_per_id[sensor_id] = {
-            "dates": dates_sorted,
-            "totaltarif_values": totaltarif_values_sorted,
-            "hochtarif_values": hochtarif_values_sorted,
-            "niedertarif_values": niedertarif_values_sorted,
-        }
-
-    app.run_dash_app(consumption_data_per_id, meter_data_per_id)
+    app.run_dash_app(
+        consumption_data_per_id,
+        meter_data_per_id,
+        query_engine,
+        load_statistics_per_id,
+        meter_readings_per_id,
+    )
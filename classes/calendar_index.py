@@ -0,0 +1,176 @@
+"""CalendarIndex Class"""
+import calendar
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from operator import lt
+
+# Import Local Classes
+from classes.consumtion_data import ConsumptionData, from_epoch
+
+SECONDS_PER_DAY = 86400
+
+
+def civil_date(day_number: int) -> tuple[int, int, int]:
+    """
+    Converts days since 1970-01-01 into a date with integer arithmetic only.
+
+    Uses the proleptic Gregorian calendar like `datetime`, counting in eras of 400 years
+    that start on March 1st, so the leap day is the last day of a year.
+
+    Args:
+        day_number (int): The days since 1970-01-01.
+
+    Returns:
+        tuple[int, int, int]: The year, month and day.
+    """
+    days = day_number + 719468  # Days since 0000-03-01
+    era = days // 146097
+    day_of_era = days - era * 146097
+    year_of_era = (
+        day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096
+    ) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    shifted_month = (5 * day_of_year + 2) // 153  # 0 is March
+    day = day_of_year - (153 * shifted_month + 2) // 5 + 1
+    month = shifted_month + 3 if shifted_month < 10 else shifted_month - 9
+    year = year_of_era + era * 400 + (month <= 2)
+    return year, month, day
+
+
+class CalendarIndex:
+    """
+    Maps calendar days, months and years to slices of the sorted columns of a sensor.
+
+    The observations of a day are contiguous in columns sorted by timestamp, so every day
+    is stored as the position of its first observation. Days are found with one bisection
+    per observed day, their dates are computed with `civil_date`. The observations of a
+    day, month or year are returned as memoryviews of the columns without copying them;
+    the columns cannot be resized while views are held.
+    """
+
+    def __init__(self, timestamps: array, volumes: array):
+        """
+        Args:
+            timestamps (array): The seconds since 1970-01-01 of the observations, sorted.
+            volumes (array): The volumes of the observations.
+        """
+        self.timestamps = timestamps
+        self.volumes = volumes
+        # The (year, month, day) of every observed day and the position of its first
+        # observation, followed by the number of observations
+        self.day_keys: list[tuple[int, int, int]] = []
+        self.day_starts = array("q")
+
+        i = 0
+        stop = len(timestamps)
+        while i < stop:
+            day_number = timestamps[i] // SECONDS_PER_DAY
+            self.day_keys.append(civil_date(day_number))
+            self.day_starts.append(i)
+            i = bisect_left(timestamps, (day_number + 1) * SECONDS_PER_DAY, i + 1, stop)
+        self.day_starts.append(stop)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @staticmethod
+    def from_documents(documents: list[ConsumptionData]) -> "CalendarIndex":
+        """
+        Builds an index over the observations of several documents of one sensor.
+
+        The columns are concatenated and sorted by timestamp; observations with the same
+        timestamp keep the order of the documents.
+
+        Args:
+            documents (list[ConsumptionData]): The documents of one sensor.
+
+        Returns:
+            CalendarIndex: The index over a sorted copy of the observations.
+        """
+        timestamps = array("q")
+        volumes = array("d")
+        for document in documents:
+            timestamps.extend(document.timestamps)
+            volumes.extend(document.volumes)
+        if not all(map(lt, timestamps, timestamps[1:])):
+            order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+            timestamps = array("q", [timestamps[i] for i in order])
+            volumes = array("d", [volumes[i] for i in order])
+        return CalendarIndex(timestamps, volumes)
+
+    def days(self) -> list[tuple[int, int, int]]:
+        """
+        Returns:
+            list[tuple[int, int, int]]: The (year, month, day) of every observed day, sorted.
+        """
+        return list(self.day_keys)
+
+    def find(self, year: int, month: int = None, day: int = None) -> tuple[int, int]:
+        """
+        Returns the slice of the observations of a year, month or day.
+
+        Args:
+            year (int): The year.
+            month (int): The month, the whole year if omitted.
+            day (int): The day, the whole month if omitted. Requires `month`.
+
+        Returns:
+            tuple[int, int]: The position of the first observation and the position after
+            the last one, equal if there are none.
+        """
+        if month is None:
+            low, high = (year,), (year + 1,)
+        elif day is None:
+            low, high = (year, month), (year, month + 1)
+        else:
+            low, high = (year, month, day), (year, month, day + 1)
+        return (
+            self.day_starts[bisect_left(self.day_keys, low)],
+            self.day_starts[bisect_left(self.day_keys, high)],
+        )
+
+    def view(
+        self, year: int, month: int = None, day: int = None
+    ) -> tuple[memoryview, memoryview]:
+        """
+        Returns the observations of a year, month or day without copying them.
+
+        Args:
+            year (int): The year.
+            month (int): The month, the whole year if omitted.
+            day (int): The day, the whole month if omitted. Requires `month`.
+
+        Returns:
+            tuple[memoryview, memoryview]: The timestamps and the volumes.
+        """
+        first, stop = self.find(year, month, day)
+        return memoryview(self.timestamps)[first:stop], memoryview(self.volumes)[first:stop]
+
+    def dates(self, first: int = 0, stop: int = None) -> list[datetime]:
+        """
+        Args:
+            first (int): The position of the first observation.
+            stop (int): The position after the last observation, the end if omitted.
+
+        Returns:
+            list[datetime]: The timestamps of the observations in the range as datetimes.
+        """
+        return [from_epoch(timestamp) for timestamp in self.timestamps[first:stop]]
+
+    def to_nested_dict(self) -> dict[str, dict[str, dict[str, list[tuple[datetime, float]]]]]:
+        """
+        Copies the observations into the nested dictionary `get_data_by_time` used to return.
+
+        Returns:
+            dict: Years like "2019" map to abbreviated month names like "Jan" (as `%b`
+            formats them), which map to days like "01" with lists of (timestamp, volume).
+        """
+        nested_data = {}
+        for (year, month, day), first, stop in zip(
+            self.day_keys, self.day_starts, self.day_starts[1:]
+        ):
+            months = nested_data.setdefault(str(year), {})
+            days = months.setdefault(calendar.month_abbr[month], {})
+            days[f"{day:02d}"] = list(zip(self.dates(first, stop), self.volumes[first:stop]))
+        return nested_data
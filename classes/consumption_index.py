@@ -0,0 +1,182 @@
+"""SensorDocuments & ConsumptionIndex Class"""
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+# Import Local Classes
+from classes.consumtion_data import ConsumptionData, to_epoch
+from classes.data_processor import DataProcessor
+
+
+class SensorDocuments:
+    """
+    The ConsumptionData documents of one sensor, sorted by start date.
+
+    Next to the start of every document the maximum end of all documents up to it is kept,
+    so the documents overlapping a time range are found with two binary searches.
+    """
+    __slots__ = ("documents", "starts", "ends", "max_ends", "positions", "is_sorted")
+
+    def __init__(self):
+        self.documents: list[ConsumptionData] = []
+        self.starts = array("q")
+        self.ends = array("q")
+        self.max_ends = array("q")
+        self.positions = array("q")
+        self.is_sorted = True
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def append(self, consumption_data: ConsumptionData, position: int) -> None:
+        """
+        Adds a document. Call `sort` before querying.
+
+        Args:
+            consumption_data (ConsumptionData): The document to add.
+            position (int): The position of the document in the order of loading.
+        """
+        self.documents.append(consumption_data)
+        self.starts.append(to_epoch(consumption_data.start_date))
+        self.ends.append(to_epoch(consumption_data.end_date))
+        self.positions.append(position)
+        self.is_sorted = False
+
+    def sort(self) -> None:
+        """Sorts the documents by start date and recomputes the running maximum of the ends."""
+        if self.is_sorted:
+            return
+        order = sorted(range(len(self.documents)), key=self.starts.__getitem__)
+        self.documents = [self.documents[i] for i in order]
+        self.starts = array("q", (self.starts[i] for i in order))
+        self.ends = array("q", (self.ends[i] for i in order))
+        self.positions = array("q", (self.positions[i] for i in order))
+
+        self.max_ends = array("q", self.ends)
+        for i in range(1, len(self.max_ends)):
+            if self.max_ends[i] < self.max_ends[i - 1]:
+                self.max_ends[i] = self.max_ends[i - 1]
+        self.is_sorted = True
+
+    def query(self, start: int = None, end: int = None, partial: bool = True) -> list[int]:
+        """
+        Returns the indexes of the documents within a time range.
+
+        Documents are taken as the half-open interval [start_date, end_date).
+
+        Args:
+            start (int): The start of the range in seconds since 1970-01-01, unbounded if
+                         omitted.
+            end (int): The end of the range (inclusive), unbounded if omitted.
+            partial (bool): Include documents that only partly overlap the range. Otherwise
+                            only documents fully inside the range are returned.
+
+        Returns:
+            list[int]: The indexes into `documents` of the matching documents.
+        """
+        self.sort()
+        stop = len(self.documents) if end is None else bisect_right(self.starts, end)
+        if partial:
+            # All documents before `first` end at or before `start`
+            first = 0 if start is None else bisect_right(self.max_ends, start, 0, stop)
+            return [
+                i for i in range(first, stop) if start is None or self.ends[i] > start
+            ]
+        first = 0 if start is None else bisect_left(self.starts, start, 0, stop)
+        return [i for i in range(first, stop) if end is None or self.ends[i] <= end]
+
+
+class ConsumptionIndex:
+    """
+    Deduplicated consumption data indexed by sensor ID and time range.
+
+    Built once from all loaded documents, so the duplicate filtering of
+    `DataProcessor.filter_data` runs once instead of for every sensor query. The query
+    results keep the order in which the documents were added, so aggregations over them
+    give the same results as over `DataProcessor.get_data`.
+    """
+
+    def __init__(self, data_consumption: list[ConsumptionData] = None):
+        """
+        Args:
+            data_consumption (list[ConsumptionData]): The documents to index, optional.
+        """
+        self.sensors: dict[str, SensorDocuments] = {}
+        self.keys: set[tuple[str, datetime, datetime]] = set()
+        if data_consumption:
+            self.add(data_consumption)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, data_consumption: list[ConsumptionData]) -> list[ConsumptionData]:
+        """
+        Adds documents, skipping documents already in the index.
+
+        Documents are duplicates if document ID, start and end date match. Duplicate
+        entries within a document are removed as in `DataProcessor.filter_data`.
+
+        Args:
+            data_consumption (list[ConsumptionData]): The documents to add.
+
+        Returns:
+            list[ConsumptionData]: The deduplicated documents that were added.
+        """
+        added = []
+        for consumption_data in DataProcessor.filter_data(data_consumption):
+            data_key = (
+                consumption_data.document_id,
+                consumption_data.start_date,
+                consumption_data.end_date,
+            )
+            if data_key in self.keys:
+                continue
+            sensor = self.sensors.get(consumption_data.document_id)
+            if sensor is None:
+                sensor = self.sensors[consumption_data.document_id] = SensorDocuments()
+            sensor.append(consumption_data, len(self.keys))
+            self.keys.add(data_key)
+            added.append(consumption_data)
+        return added
+
+    def sensor_ids(self) -> list[str]:
+        """
+        Returns:
+            list[str]: The sorted IDs of all sensors with documents.
+        """
+        return sorted(self.sensors)
+
+    def query(
+        self,
+        sensor_id: str,
+        start_date: datetime = None,
+        end_date: datetime = None,
+        partial: bool = True,
+    ) -> list[ConsumptionData]:
+        """
+        Returns the documents of a sensor within a time range.
+
+        Runs in logarithmic time plus the number of documents returned, as long as no
+        document spans many others (as with daily or monthly SDAT files).
+
+        Args:
+            sensor_id (str): The sensor ID.
+            start_date (datetime): The start of the range, unbounded if omitted.
+            end_date (datetime): The end of the range (inclusive), unbounded if omitted.
+            partial (bool): Include documents that only partly overlap the range. Otherwise
+                            only documents fully inside the range are returned.
+
+        Returns:
+            list[ConsumptionData]: The matching documents in the order they were added,
+            empty if the sensor is unknown.
+        """
+        sensor = self.sensors.get(sensor_id)
+        if sensor is None:
+            return []
+        indexes = sensor.query(
+            None if start_date is None else to_epoch(start_date),
+            None if end_date is None else to_epoch(end_date),
+            partial,
+        )
+        indexes.sort(key=sensor.positions.__getitem__)
+        return [sensor.documents[i] for i in indexes]
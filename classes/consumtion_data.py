@@ -1,8 +1,46 @@
 """ConsumptionEntry & ConsumtionData Class"""
-from datetime import datetime
+from array import array
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from operator import eq
+from typing import Iterable
+
+EPOCH = datetime(1970, 1, 1)
+ONE_SECOND = timedelta(seconds=1)
+
+
+def to_epoch(value: datetime) -> int:
+    """
+    Converts a naive datetime into whole seconds since 1970-01-01.
+
+    The datetime is taken as is, without applying the local timezone.
+
+    Args:
+        value (datetime): The datetime to convert.
+
+    Returns:
+        int: The seconds since 1970-01-01.
+    """
+    return (value - EPOCH) // ONE_SECOND
+
+
+def from_epoch(value: int) -> datetime:
+    """
+    Converts seconds since 1970-01-01 back into a naive datetime.
+
+    Args:
+        value (int): The seconds since 1970-01-01.
+
+    Returns:
+        datetime: The corresponding naive datetime.
+    """
+    return EPOCH + timedelta(seconds=value)
+
 
 class ConsumptionEntry:
     """Represents a single consumption entry with volume and timestamp."""
+    __slots__ = ("volume", "timestamp")
+
     def __init__(self, volume: float, timestamp: datetime):
         """
         Args:
@@ -15,7 +53,7 @@ class ConsumptionEntry:
     def to_dict(self):
         """
         Convert to dictionary for JSON serialization.
-        
+
         Returns:
             dict: A dictionary representation of the consumption entry, with the volume and
             timestamp converted to an ISO 8601 string format.
@@ -32,36 +70,206 @@ class ConsumptionEntry:
         """
         return f"ConsumptionEntry(Volume: {self.volume}, Timestamp: {self.timestamp})"
 
+class ConsumptionEntries(Sequence):
+    """
+    Read-only list view of the entries of a ConsumptionData object.
+
+    ConsumptionEntry objects are created on access only, the data itself stays in the
+    columns of the ConsumptionData object.
+    """
+    __slots__ = ("consumption_data",)
+
+    def __init__(self, consumption_data: "ConsumptionData"):
+        """
+        Args:
+            consumption_data (ConsumptionData): The consumption data whose entries are viewed.
+        """
+        self.consumption_data = consumption_data
+
+    def __len__(self) -> int:
+        return len(self.consumption_data.timestamps)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return ConsumptionEntry(
+            volume=self.consumption_data.volumes[index],
+            timestamp=from_epoch(self.consumption_data.timestamps[index]),
+        )
+
+    def __iter__(self):
+        for timestamp, volume in zip(
+            self.consumption_data.timestamps, self.consumption_data.volumes
+        ):
+            yield ConsumptionEntry(volume=volume, timestamp=from_epoch(timestamp))
+
+    def append(self, item: ConsumptionEntry) -> None:
+        """Adds an entry, same as `ConsumptionData.add_entry`."""
+        self.consumption_data.add_entry(item)
+
 class ConsumptionData:
-    """Contains consumption data including document ID and a list of consumption entries."""
-    def __init__(self, document_id: str, start_date: datetime, end_date: datetime):
+    """
+    Contains consumption data including document ID and the consumption entries.
+
+    The entries are stored column-wise: `timestamps` holds the seconds since 1970-01-01 as
+    int64 values and `volumes` the matching volumes as float64 values. `data` offers the
+    entries as ConsumptionEntry objects for code that needs them. The columns are arrays,
+    or read-only memoryviews for data loaded from a snapshot.
+
+    Timestamps are looked up in constant time: regular documents (strictly increasing with
+    a fixed resolution, like every SDAT document) compute the position from their start
+    and resolution, other documents use a hash index built on the first lookup.
+    """
+    def __init__(
+        self,
+        document_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        resolution: timedelta = None,
+    ):
         """
         Args:
             document_id (str): A unique identifier for the consumption data document.
             start_date (datetime): The start date of the consumption period.
             end_date (datetime): The end date of the consumption period.
+            resolution (timedelta): The time between two observations, if known.
         """
         self.document_id = document_id
         self.start_date = start_date
         self.end_date = end_date
-        self.data: list[ConsumptionEntry] = []
+        self.resolution = resolution
+        self.timestamps = array("q")
+        self.volumes = array("d")
+        # (length, start, step, positions) for `index_of`, see `build_lookup`
+        self.lookup = None
+
+    @property
+    def data(self) -> ConsumptionEntries:
+        """
+        Returns:
+            ConsumptionEntries: A list view of the consumption entries.
+        """
+        return ConsumptionEntries(self)
+
+    @data.setter
+    def data(self, entries: list[ConsumptionEntry]) -> None:
+        """
+        Replaces all entries.
+
+        Args:
+            entries (list[ConsumptionEntry]): The new consumption entries.
+        """
+        self.timestamps = array("q", (to_epoch(entry.timestamp) for entry in entries))
+        self.volumes = array("d", (entry.volume for entry in entries))
+        self.lookup = None
 
     def add_entry(self, item: ConsumptionEntry) -> None:
         """
         Adds a consumption entry to the data list.
-        
+
         Args:
             item (ConsumptionEntry): The consumption entry to add.
 
         Returns:
             None
         """
-        self.data.append(item)
+        self.add_value(to_epoch(item.timestamp), item.volume)
+
+    def add_value(self, timestamp: int, volume: float) -> None:
+        """
+        Adds a consumption value without creating a ConsumptionEntry.
+
+        Args:
+            timestamp (int): The seconds since 1970-01-01, see `to_epoch`.
+            volume (float): The consumption volume at the given timestamp.
+
+        Returns:
+            None
+        """
+        self.timestamps.append(timestamp)
+        self.volumes.append(volume)
+
+    def set_columns(self, timestamps: array, volumes: array) -> None:
+        """
+        Replaces all entries with the given columns.
+
+        Args:
+            timestamps (array): The int64 seconds since 1970-01-01 of the entries, an array
+                                or a memoryview cast to "q".
+            volumes (array): The float64 volumes of the entries, an array or a memoryview
+                             cast to "d".
+
+        Raises:
+            ValueError: If the columns differ in length.
+        """
+        if len(timestamps) != len(volumes):
+            raise ValueError("timestamps and volumes must have the same length")
+        self.timestamps = timestamps
+        self.volumes = volumes
+        self.lookup = None
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def build_lookup(self) -> tuple[int, int, int, dict[int, int]]:
+        """
+        Builds the lookup structure of `index_of` for the current columns.
+
+        Returns:
+            tuple[int, int, int, dict[int, int]]: The number of entries, the first
+            timestamp and the step between two timestamps. `positions` is `None` for
+            regular columns, otherwise it maps every timestamp to its first position.
+        """
+        timestamps = self.timestamps
+        length = len(timestamps)
+        if length == 0:
+            return (0, 0, 0, {})
+        start = timestamps[0]
+        step = timestamps[1] - start if length > 1 else 0
+        # Positions are only computed if every timestamp lies on the grid of the first two
+        if length == 1 or (
+            step > 0
+            and timestamps[-1] - start == (length - 1) * step
+            and all(map(eq, timestamps, range(start, start + length * step, step)))
+        ):
+            return (length, start, step, None)
+        # Reversed, so the first position of a repeated timestamp is kept
+        positions = dict(zip(timestamps[::-1], range(length - 1, -1, -1)))
+        return (length, start, step, positions)
+
+    def current_lookup(self) -> tuple[int, int, int, dict[int, int]]:
+        """
+        Returns:
+            tuple[int, int, int, dict[int, int]]: The lookup structure of `build_lookup`,
+            rebuilt if entries were added since it was built.
+        """
+        lookup = self.lookup
+        if lookup is None or lookup[0] != len(self.timestamps):
+            lookup = self.lookup = self.build_lookup()
+        return lookup
+
+    def index_of(self, timestamp: int) -> int:
+        """
+        Returns the position of a timestamp in the columns.
+
+        Args:
+            timestamp (int): The seconds since 1970-01-01, see `to_epoch`.
+
+        Returns:
+            int: The first position of the timestamp, or -1 if it does not exist.
+        """
+        length, start, step, positions = self.current_lookup()
+        if positions is not None:
+            return positions.get(timestamp, -1)
+        if step == 0:
+            return 0 if timestamp == start else -1
+        index, remainder = divmod(timestamp - start, step)
+        return index if remainder == 0 and 0 <= index < length else -1
 
     def get_consumption(self, date: datetime) -> ConsumptionEntry:
         """
         Retrieves a consumption entry by date.
-        
+
         Args:
             date (datetime): The date for which to retrieve the consumption entry.
 
@@ -69,15 +277,45 @@ class ConsumptionData:
             ConsumptionEntry: The consumption entry for the specified date,
             or None if no entry exists.
         """
-        for entry in self.data:
-            if entry.timestamp == date:
-                return entry
-        return None
+        index = self.index_of(to_epoch(date))
+        if index < 0:
+            return None
+        return ConsumptionEntry(volume=self.volumes[index], timestamp=date)
+
+    def get_volumes(self, timestamps: Iterable[int], default: float = float("nan")) -> array:
+        """
+        Retrieves the volumes of many timestamps at once.
+
+        Args:
+            timestamps (Iterable[int]): The seconds since 1970-01-01 to look up, e.g. an
+                                        array("q") or the timestamps of another document.
+            default (float): The volume returned for timestamps without entry.
+
+        Returns:
+            array: The float64 volumes in the order of `timestamps`.
+        """
+        length, start, step, positions = self.current_lookup()
+        volumes = self.volumes
+        result = array("d")
+        append = result.append
+        if positions is not None:
+            get = positions.get
+            for timestamp in timestamps:
+                index = get(timestamp)
+                append(default if index is None else volumes[index])
+        elif step == 0:
+            for timestamp in timestamps:
+                append(volumes[0] if timestamp == start else default)
+        else:
+            for timestamp in timestamps:
+                index, remainder = divmod(timestamp - start, step)
+                append(volumes[index] if remainder == 0 and 0 <= index < length else default)
+        return result
 
     def to_dict(self):
         """
         Convert to dictionary for JSON serialization.
-        
+
         Returns:
             dict: A dictionary representation of the consumption data, including the document ID,
             start and end dates, and a list of consumption entries (also as dictionaries).
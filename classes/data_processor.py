@@ -1,8 +1,12 @@
 """DataProcessor Class"""
+from array import array
 from datetime import datetime
 from collections import defaultdict
+from classes.calendar_index import CalendarIndex
 from classes.meter_data import MeterData
+from classes.meter_store import MeterStore
 from classes.consumtion_data import ConsumptionData
+from classes.series_store import SeriesStore
 
 class DataProcessor:
     """Docstring"""
@@ -19,18 +23,26 @@ class DataProcessor:
             if data_key not in seen_data:
                 seen_data.add(data_key)
 
-                unique_entries = []
-                seen_entries = set()
-
-                for entry in data.data:
-                    entry_key = (entry.timestamp, entry.volume)
-                    if entry_key not in seen_entries:
-                        seen_entries.add(entry_key)
-                        unique_entries.append(entry)
+                timestamps = data.timestamps
+                volumes = data.volumes
+                if all(a < b for a, b in zip(timestamps, timestamps[1:])):
+                    # Strictly increasing timestamps cannot contain duplicate entries.
+                    unique_timestamps = timestamps[:]
+                    unique_volumes = volumes[:]
+                else:
+                    unique_timestamps = array("q")
+                    unique_volumes = array("d")
+                    seen_entries = set()
+
+                    for entry_key in zip(timestamps, volumes):
+                        if entry_key not in seen_entries:
+                            seen_entries.add(entry_key)
+                            unique_timestamps.append(entry_key[0])
+                            unique_volumes.append(entry_key[1])
                 filtered_data_item = ConsumptionData(
-                    data.document_id, data.start_date, data.end_date
+                    data.document_id, data.start_date, data.end_date, data.resolution
                 )
-                filtered_data_item.data = unique_entries
+                filtered_data_item.set_columns(unique_timestamps, unique_volumes)
                 filtered_data.append(filtered_data_item)
 
         return filtered_data
@@ -64,20 +76,42 @@ class DataProcessor:
         sdat_data: list[ConsumptionData],
         start_date: datetime = None,
         end_date: datetime = None,
+        partial: bool = False,
     ) -> list[ConsumptionData]:
         """
         Finds and returns all ConsumptionData that match the sensor ID
         and fall within the specified date range.
+
+        Filters duplicates of the whole list on every call, use a ConsumptionIndex to
+        query several sensors or ranges of the same data.
+
+        Args:
+            sensor_id (str): The sensor ID.
+            sdat_data (list[ConsumptionData]): The consumption data to search.
+            start_date (datetime): The start of the range, only used with `end_date`.
+            end_date (datetime): The end of the range, only used with `start_date`.
+            partial (bool): Also return documents that only partly overlap the range,
+                            taking documents as the interval [start_date, end_date).
+
+        Returns:
+            list[ConsumptionData]: The matching documents, or `None` if there are none.
         """
         new_data = DataProcessor.filter_data(sdat_data)
         combined_data = [data for data in new_data if data.document_id == sensor_id]
 
         if start_date and end_date:
-            date_filtered_data = [
-                data
-                for data in combined_data
-                if (data.start_date >= start_date and data.end_date <= end_date)
-            ]
+            if partial:
+                date_filtered_data = [
+                    data
+                    for data in combined_data
+                    if (data.start_date <= end_date and data.end_date > start_date)
+                ]
+            else:
+                date_filtered_data = [
+                    data
+                    for data in combined_data
+                    if (data.start_date >= start_date and data.end_date <= end_date)
+                ]
         else:
             date_filtered_data = combined_data
 
@@ -88,27 +122,78 @@ class DataProcessor:
 
     @staticmethod
     def get_data_by_time(
-        sensor_id: str, sdat_data: list[ConsumptionData]
-    ) -> dict[str, dict[str, dict[str, list[tuple[datetime, float]]]]]:
+        sensor_id: str, sdat_data: list[ConsumptionData], nested: bool = False
+    ) -> CalendarIndex | dict[str, dict[str, dict[str, list[tuple[datetime, float]]]]]:
         """
-        Organizes the consumption data by year, month, and day.
-        :return: A nested dictionary where the first level keys are years, 
-                 second level keys are months, and third level keys are days,
-                 with lists of (timestamp, volume) for 15-minute intervals.
+        Organizes the consumption data of a sensor by year, month, and day.
+
+        Args:
+            sensor_id (str): The sensor ID.
+            sdat_data (list[ConsumptionData]): The consumption data to search.
+            nested (bool): Return the nested dictionary of earlier versions instead of
+                           the index.
+
+        Returns:
+            CalendarIndex: The index over the sorted observations of the sensor, its
+            `view` returns the observations of a year, month or day without copying.
+            With `nested`, a dictionary where the first level keys are years, second
+            level keys are months, and third level keys are days, with lists of
+            (timestamp, volume) for 15-minute intervals.
         """
-        time_data = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
-
         new_data = DataProcessor.filter_data(sdat_data)
         combined_data = [data for data in new_data if data.document_id == sensor_id]
+        calendar_index = CalendarIndex.from_documents(combined_data)
+        if nested:
+            return calendar_index.to_nested_dict()
+        return calendar_index
+
+    @staticmethod
+    def get_stored_data_by_time(
+        sensor_id: str, series_store: SeriesStore, nested: bool = False
+    ) -> CalendarIndex | dict[str, dict[str, dict[str, list[tuple[datetime, float]]]]]:
+        """
+        Organizes the stored consumption data of a sensor by year, month, and day.
+
+        The index is built over the memory-mapped series without copying it, see
+        `get_data_by_time` for the result.
 
-        for data in combined_data:
-            for entry in data.data:
-                year = entry.timestamp.strftime("%Y")  # Get year as string
-                month = entry.timestamp.strftime("%b")  # Get abbreviated month name
-                day = entry.timestamp.strftime("%d")  # Get day as string
-                time_data[year][month][day].append((entry.timestamp, entry.volume))
+        Args:
+            sensor_id (str): The sensor ID.
+            series_store (SeriesStore): The store holding the series of the sensor.
+            nested (bool): Return the nested dictionary of earlier versions instead of
+                           the index.
 
-        return dict(time_data)
+        Returns:
+            CalendarIndex: The index over the stored observations, empty if the sensor
+            is not in the store. With `nested`, the nested dictionary.
+        """
+        series = series_store.series(sensor_id)
+        if series is None:
+            calendar_index = CalendarIndex(array("q"), array("d"))
+        else:
+            calendar_index = CalendarIndex(series.timestamps, series.volumes)
+        if nested:
+            return calendar_index.to_nested_dict()
+        return calendar_index
+
+    @staticmethod
+    def get_sensor_ids(
+        sdat_data: list[ConsumptionData], meter_store: MeterStore = None
+    ) -> list[str]:
+        """
+        Discovers the sensor IDs in the consumption data and the meter readings.
+
+        Args:
+            sdat_data (list[ConsumptionData]): The consumption data.
+            meter_store (MeterStore): The meter readings, optional.
+
+        Returns:
+            list[str]: The sorted IDs of all sensors with consumption data or readings.
+        """
+        sensor_ids = {data.document_id for data in sdat_data}
+        if meter_store is not None:
+            sensor_ids.update(meter_store.series)
+        return sorted(sensor_ids)
 
     @staticmethod
     def group_meter_data_by_month(
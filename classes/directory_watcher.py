@@ -0,0 +1,95 @@
+"""DirectoryWatcher Class"""
+import os
+import threading
+from typing import Callable
+
+
+class DirectoryWatcher:
+    """
+    Polls a directory in a background thread and reports newly added XML files.
+
+    A new file is only reported once its size is unchanged between two polls, so files
+    that are still being copied into the directory are not parsed half-written.
+    """
+
+    def __init__(
+        self,
+        dirpath: str,
+        callback: Callable[[list[str]], None],
+        interval: float = 2.0,
+        known_files: list[str] = None,
+    ):
+        """
+        Args:
+            dirpath (str): The directory to watch.
+            callback (Callable[[list[str]], None]): Called with the sorted paths of new files.
+            interval (float): The time between two polls in seconds.
+            known_files (list[str]): Files that are already loaded. Defaults to the files
+                                     currently in the directory.
+        """
+        self.dirpath = dirpath
+        self.callback = callback
+        self.interval = interval
+        if known_files is None:
+            known_files = self.list_files()
+        self.known_files: set[str] = set(known_files)
+        self.pending_sizes: dict[str, int] = {}
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def list_files(self) -> list[str]:
+        """Returns the paths of all XML files currently in the directory."""
+        if not os.path.isdir(self.dirpath):
+            return []
+        return [
+            os.path.join(self.dirpath, f)
+            for f in os.listdir(self.dirpath)
+            if f.endswith(".xml") and os.path.isfile(os.path.join(self.dirpath, f))
+        ]
+
+    def poll(self) -> list[str]:
+        """
+        Checks the directory once.
+
+        Returns:
+            list[str]: The sorted paths of new files whose size has settled.
+        """
+        new_files = []
+        for file in self.list_files():
+            if file in self.known_files:
+                continue
+            try:
+                size = os.path.getsize(file)
+            except OSError:
+                continue
+            if self.pending_sizes.get(file) == size:
+                del self.pending_sizes[file]
+                self.known_files.add(file)
+                new_files.append(file)
+            else:
+                self.pending_sizes[file] = size
+        new_files.sort()
+        return new_files
+
+    def run(self) -> None:
+        """Polls the directory until `stop` is called."""
+        while not self.stop_event.wait(self.interval):
+            new_files = self.poll()
+            if new_files:
+                try:
+                    self.callback(new_files)
+                except Exception as e:
+                    print(f"An error occurred while loading new files from {self.dirpath}: {e}")
+
+    def start(self) -> None:
+        """Starts watching the directory in a daemon thread."""
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stops watching the directory."""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
@@ -0,0 +1,112 @@
+"""Downsampling Functions"""
+from typing import Sequence
+
+DOWNSAMPLING_METHODS = ("minmax", "lttb")
+
+
+def min_max_positions(values: Sequence[float], max_points: int) -> list[int]:
+    """
+    Selects the smallest and the largest value of equally sized buckets of a series.
+
+    Every bucket keeps both extremes in their original order, so peaks and dips survive
+    however far the series is reduced. The first and the last position are always kept.
+
+    Args:
+        values (Sequence[float]): The values of the series.
+        max_points (int): The maximum number of positions returned, at least 2. Below 4
+                          only the first and the last position are kept.
+
+    Returns:
+        list[int]: The selected positions, sorted.
+    """
+    count = len(values)
+    if count <= max_points:
+        return list(range(count))
+    buckets = (max_points - 2) // 2
+    positions = [0]
+    for bucket in range(buckets):
+        first = 1 + bucket * (count - 2) // buckets
+        stop = 1 + (bucket + 1) * (count - 2) // buckets
+        segment = values[first:stop]
+        low = first + min(range(len(segment)), key=segment.__getitem__)
+        high = first + max(range(len(segment)), key=segment.__getitem__)
+        positions.extend((low, high) if low <= high else (high, low))
+    positions.append(count - 1)
+    # A flat bucket has the same position as its minimum and maximum
+    return sorted(set(positions))
+
+
+def lttb_positions(x: Sequence[float], y: Sequence[float], max_points: int) -> list[int]:
+    """
+    Selects points with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and the last point are kept; of every bucket in between the point forming
+    the largest triangle with the point kept from the previous bucket and the mean of the
+    next bucket is kept. The shape of the series is preserved well, single peaks are
+    usually but not always kept.
+
+    Args:
+        x (Sequence[float]): The x values of the series, sorted.
+        y (Sequence[float]): The y values of the series.
+        max_points (int): The maximum number of positions returned, at least 2.
+
+    Returns:
+        list[int]: The selected positions, sorted.
+    """
+    count = len(y)
+    if count <= max_points:
+        return list(range(count))
+    buckets = max_points - 2
+    if buckets == 0:
+        return [0, count - 1]
+    # The buckets split the points between the first and the last one
+    bounds = [1 + bucket * (count - 2) // buckets for bucket in range(buckets + 1)]
+    bounds.append(count)
+    positions = [0]
+    previous = 0
+    for bucket in range(buckets):
+        first, stop, next_stop = bounds[bucket], bounds[bucket + 1], bounds[bucket + 2]
+        next_x = sum(x[stop:next_stop]) / (next_stop - stop)
+        next_y = sum(y[stop:next_stop]) / (next_stop - stop)
+        previous_x, previous_y = x[previous], y[previous]
+        previous = max(
+            range(first, stop),
+            key=lambda i: abs(
+                (previous_x - next_x) * (y[i] - previous_y)
+                - (previous_x - x[i]) * (next_y - previous_y)
+            ),
+        )
+        positions.append(previous)
+    positions.append(count - 1)
+    return positions
+
+
+def downsample(
+    x: Sequence[float], y: Sequence[float], max_points: int, method: str = "minmax"
+) -> list[int]:
+    """
+    Selects at most `max_points` points of a series to be plotted.
+
+    Args:
+        x (Sequence[float]): The x values of the series, sorted, e.g. timestamps.
+        y (Sequence[float]): The y values of the series.
+        max_points (int): The maximum number of positions returned, at least 2 to keep
+                          the first and the last point.
+        method (str): "minmax" keeps the extremes of every bucket, "lttb" uses
+                      `lttb_positions`.
+
+    Returns:
+        list[int]: The selected positions, sorted.
+
+    Raises:
+        ValueError: If the method is unknown or `max_points` is less than 2.
+    """
+    if max_points < 2:
+        raise ValueError("max_points must be at least 2")
+    if method == "minmax":
+        return min_max_positions(y, max_points)
+    if method == "lttb":
+        return lttb_positions(x, y, max_points)
+    raise ValueError(
+        f"Unknown downsampling method {method!r}, use one of {DOWNSAMPLING_METHODS}"
+    )
@@ -4,8 +4,8 @@ import csv
 import json
 import os
 from datetime import datetime
-from classes.meter_data import MeterData
-from classes.consumtion_data import ConsumptionData
+from classes.meter_store import MeterStore
+from classes.consumtion_data import ConsumptionData, from_epoch
 
 
 class Exporter:
@@ -17,12 +17,21 @@ class Exporter:
         if isinstance(o, datetime):
             return o.isoformat()
 
+    @staticmethod
+    def meter_series(obiscode: str, meter_store: MeterStore):
+        """Returns the sensor ID and readings of every sensor matching `obiscode`."""
+        return [
+            (sensor_id, meter_store.query(sensor_id))
+            for sensor_id in meter_store.sensor_ids()
+            if sensor_id.lower() == obiscode.lower()
+        ]
+
     @staticmethod
     def export_to_csv(
         file_path: str,
         obiscode: str,
         consumption_data: list[ConsumptionData],
-        meter_data: list[MeterData],
+        meter_store: MeterStore,
     ) -> bool:
         """Export consumption and meter data to CSV files."""
         try:
@@ -38,9 +47,10 @@ class Exporter:
                 writer = csv.writer(file, delimiter=";")
                 writer.writerow(["timestamp", "value"])
                 for data in consumption_data:
-                    for entry in data.data:
-                        if data.document_id.lower() == obiscode.lower():
-                            writer.writerow([entry.timestamp.timestamp(), entry.volume])
+                    if data.document_id.lower() != obiscode.lower():
+                        continue
+                    for epoch, volume in zip(data.timestamps, data.volumes):
+                        writer.writerow([from_epoch(epoch).timestamp(), volume])
 
             meter_file_path = os.path.join(full_path, "meter_data.csv")
             with open(
@@ -48,15 +58,9 @@ class Exporter:
             ) as file:
                 writer = csv.writer(file, delimiter=";")
                 writer.writerow(["timestamp", "value"])
-                for meter in meter_data:
-                    for obis_code, reading in meter.data.items():
-                        if obis_code.lower() == obiscode.lower():
-                            writer.writerow(
-                                [
-                                    str(int(meter.timestamp.timestamp())),
-                                    reading.totalcost,
-                                ]
-                            )
+                for _, series in Exporter.meter_series(obiscode, meter_store):
+                    for epoch, totalcost in zip(series.timestamps, series.totalcost):
+                        writer.writerow([str(int(from_epoch(epoch).timestamp())), totalcost])
 
             return True
         except Exception as e:
@@ -68,7 +72,7 @@ class Exporter:
         file_path: str,
         obiscode: str,
         consumption_data: list[ConsumptionData],
-        meter_data: list[MeterData],
+        meter_store: MeterStore,
     ) -> bool:
         """Export consumption and meter data to JSON files in the required format."""
         try:
@@ -86,12 +90,13 @@ class Exporter:
                     "sensorId": data.document_id,
                     "data": [
                         {
-                            "ts": str(int(entry.timestamp.timestamp())),
-                            "value": entry.volume,
+                            "ts": str(int(from_epoch(epoch).timestamp())),
+                            "value": volume,
                         }
-                        for entry in data.data
-                        if data.document_id.lower() == obiscode.lower()
-                    ],
+                        for epoch, volume in zip(data.timestamps, data.volumes)
+                    ]
+                    if data.document_id.lower() == obiscode.lower()
+                    else [],
                 }
                 for data in consumption_data
             ]
@@ -99,17 +104,16 @@ class Exporter:
             # Prepare the meter data in the required format
             meter_data_formatted = [
                 {
-                    "sensorId": obis_code,
+                    "sensorId": sensor_id,
                     "data": [
                         {
-                            "ts": str(int(meter.timestamp.timestamp())),
-                            "value": reading.totalcost,
+                            "ts": str(int(from_epoch(epoch).timestamp())),
+                            "value": totalcost,
                         }
                     ],
                 }
-                for meter in meter_data
-                for obis_code, reading in meter.data.items()
-                if obis_code.lower() == obiscode.lower()
+                for sensor_id, series in Exporter.meter_series(obiscode, meter_store)
+                for epoch, totalcost in zip(series.timestamps, series.totalcost)
             ]
 
             with open(file=consumption_file_path, mode="w+", encoding="UTF-8") as file:
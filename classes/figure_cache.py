@@ -0,0 +1,91 @@
+"""FigureCache Class"""
+from collections import OrderedDict
+from typing import Collection
+
+
+class FigureCache:
+    """
+    Built figures of the Dash app, bounded by their number and their total size.
+
+    Keys are tuples starting with the sensor ID, so `invalidate` can drop the figures of
+    sensors with new data. The least recently used figures are evicted first once either
+    bound is exceeded. Callers serialise access, e.g. with `app.data_lock`.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            max_entries (int): The number of figures kept.
+            max_bytes (int): The total size of the figures kept, as passed to `put`.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Key -> (figure, size in bytes)
+        self.figures: OrderedDict[tuple, tuple[object, int]] = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.figures)
+
+    def get(self, key: tuple):
+        """
+        Args:
+            key (tuple): The key of the figure, starting with the sensor ID.
+
+        Returns:
+            The cached figure, `None` if there is none.
+        """
+        entry = self.figures.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.figures.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: tuple, figure, size: int) -> None:
+        """
+        Caches a figure and evicts the least recently used ones beyond the bounds.
+
+        Args:
+            key (tuple): The key of the figure, starting with the sensor ID.
+            figure: The figure.
+            size (int): The size of the figure in bytes, e.g. estimated from its number
+                        of points. Figures larger than `max_bytes` are not cached.
+        """
+        self.pop(key)
+        if size > self.max_bytes:
+            return
+        self.figures[key] = (figure, size)
+        self.nbytes += size
+        while len(self.figures) > self.max_entries or self.nbytes > self.max_bytes:
+            _, (_, evicted_size) = self.figures.popitem(last=False)
+            self.nbytes -= evicted_size
+
+    def pop(self, key: tuple) -> None:
+        """
+        Drops a figure if it is cached.
+
+        Args:
+            key (tuple): The key of the figure.
+        """
+        entry = self.figures.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
+
+    def invalidate(self, sensor_ids: Collection[str] = None) -> None:
+        """
+        Drops cached figures, call it whenever data is added.
+
+        Args:
+            sensor_ids (Collection[str]): The sensors whose figures are dropped, all if
+                                          omitted.
+        """
+        if sensor_ids is None:
+            self.figures.clear()
+            self.nbytes = 0
+            return
+        for key in [key for key in self.figures if key[0] in sensor_ids]:
+            self.pop(key)
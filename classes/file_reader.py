@@ -1,30 +1,78 @@
 """Class"""
 
+import io
 import os
+import re
+import tarfile
 import xml.etree.ElementTree as ET
+import xml.parsers.expat
+import zipfile
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from functools import partial
+from typing import IO, Callable, Iterator
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
 
 # Import Local Classes
 from classes.meter_data import MeterData, MeterEntry
-from classes.consumtion_data import ConsumptionEntry, ConsumptionData
+from classes.consumtion_data import ConsumptionEntry, ConsumptionData, from_epoch, to_epoch
+from classes.meter_store import MeterStore
+from classes.parse_cache import ParseCache
+from classes.series_store import SeriesStore
+
+SDAT_NAMESPACE = "{http://www.strom.ch}"
+# Default sensor ID of the OBIS codes of ESL files, see `FileReader.read_esl_readings`.
+# Tariff 1 (codes ending in .1) is the high and tariff 2 (.2) the low tariff.
+ESL_OBIS_SENSORS = {
+    "1-1:1.8.1": "ID742",
+    "1-1:1.8.2": "ID742",
+    "1-1:2.8.1": "ID735",
+    "1-1:2.8.2": "ID735",
+}
+SDAT_BACKENDS = ("etree", "lxml", "scan")
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz")
+# Number of archive members parsed per task of a worker process
+ARCHIVE_CHUNK_SIZE = 64
+# Number of SDAT files parsed before their documents are added to a SeriesStore
+STORE_BATCH_SIZE = 500
+
+# Patterns of the "scan" backend, which reads SDAT files with the "rsm" prefix as bytes
+SCAN_ELEMENT_CONTENT = rb"[^<]*(?:<(?!/?rsm:(?:Observation|Volume)[\s/>])[^<]*)*"
+SCAN_OBSERVATION = re.compile(
+    rb"(\s*<rsm:Observation>(" + SCAN_ELEMENT_CONTENT + rb")<rsm:Volume>([^<]*)</rsm:Volume>"
+    + SCAN_ELEMENT_CONTENT + rb"</rsm:Observation>)"
+)
+SCAN_DATETIME = rb"(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)Z"
+SCAN_INTERVAL = re.compile(
+    rb"<rsm:Interval>\s*<rsm:StartDateTime>" + SCAN_DATETIME + rb"</rsm:StartDateTime>"
+    rb"\s*<rsm:EndDateTime>" + SCAN_DATETIME + rb"</rsm:EndDateTime>\s*</rsm:Interval>"
+)
+SCAN_RESOLUTION = re.compile(
+    rb"<rsm:Resolution>\s*<rsm:Resolution>([^<]*)</rsm:Resolution>"
+    rb"\s*<rsm:Unit>([^<]*)</rsm:Unit>\s*</rsm:Resolution>"
+)
+SCAN_XML_DECLARATION = re.compile(rb"<\?xml[^>]*?encoding=[\"']([^\"']*)[\"']")
 
 
 class FileReader:
     """FileReader class to read ESL files and parse meter data."""
 
     @staticmethod
-    def read_esl_files(dirpath: str) -> list[MeterData]:
+    def list_xml_files(dirpath: str) -> list[str]:
         """
-        Reads all ESL files in the given directory and returns a list of MeterData.
+        Lists all XML files in the given directory, sorted by filename.
 
         Args:
-            dirpath (str): The path to the directory containing ESL XML files.
+            dirpath (str): The path to the directory containing the XML files.
 
         Returns:
-            list[MeterData]: A list of MeterData objects parsed from the ESL files.
-
-        Raises:
-            SystemError: If an error occurs while reading any of the ESL files.
+            list[str]: The sorted paths of all XML files in the directory.
         """
         files = [
             os.path.join(dirpath, f)
@@ -32,37 +80,386 @@ class FileReader:
             if os.path.isfile(os.path.join(dirpath, f)) and f.endswith(".xml")
         ]
         files.sort()
-        result_data: list[MeterData] = []
-        for file in files:
-            new_data = FileReader.read_esl_file(file)
+        return files
+
+    @staticmethod
+    def read_files(
+        files: list[str],
+        read_file: Callable,
+        file_type: str,
+        workers: int = 1,
+        cache: ParseCache = None,
+    ) -> list:
+        """
+        Parses the given files with `read_file`, optionally spread across a process pool.
+
+        The result keeps the order of `files`. If a file cannot be parsed, the error for
+        the first failing file in that order is raised, regardless of the worker count.
+        With a cache, only new or changed files are parsed and the cache is saved afterwards.
+
+        Args:
+            files (list[str]): The paths of the files to parse.
+            read_file (Callable): The function parsing one file, e.g. `read_sdat_file`.
+            file_type (str): The file type used in the error message, e.g. "SDAT".
+            workers (int): The number of worker processes. `None` uses all available cores,
+                           1 parses the files sequentially in the current process.
+            cache (ParseCache): An optional cache of previously parsed files.
+
+        Returns:
+            list: The parsed objects in the same order as `files`.
+
+        Raises:
+            SystemError: If an error occurs while reading any of the files.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        if cache is not None:
+            cache.prune(files)
+            cached = {file: cache.get(file) for file in files}
+            files_to_parse = [file for file in files if cached[file] is None]
+        else:
+            cached = {}
+            files_to_parse = files
+
+        if workers > 1 and len(files_to_parse) > 1:
+            workers = min(workers, len(files_to_parse))
+            chunksize = max(1, len(files_to_parse) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parsed = list(executor.map(read_file, files_to_parse, chunksize=chunksize))
+        elif cache is not None:
+            parsed = [read_file(file) for file in files_to_parse]
+        else:
+            parsed = map(read_file, files_to_parse)
+
+        if cache is not None:
+            for file, new_data in zip(files_to_parse, parsed):
+                if new_data is not None:
+                    cache.put(file, new_data)
+                cached[file] = new_data
+            cache.save()
+            parsed = [cached[file] for file in files]
+
+        result_data = []
+        for file, new_data in zip(files, parsed):
             if new_data is not None:
                 result_data.append(new_data)
             else:
-                raise SystemError(f"An error occurred while reading ESL file {file}")
+                raise SystemError(f"An error occurred while reading {file_type} file {file}")
         return result_data
 
     @staticmethod
-    def read_esl_file(filepath: str) -> MeterData:
+    def source_name(source: str | IO[bytes]) -> str:
+        """
+        Returns the name of a file given as path or as file object, for messages.
+
+        Args:
+            source (str | IO[bytes]): The path or the file object.
+
+        Returns:
+            str: The path, or the name of the file object if it has one.
+        """
+        return source if isinstance(source, str) else getattr(source, "name", repr(source))
+
+    @staticmethod
+    def is_archive(path: str) -> bool:
+        """
+        Checks whether a path is a zip or tar archive, judged by its suffix.
+
+        Args:
+            path (str): The path to check.
+
+        Returns:
+            bool: True if the path is a file ending in .zip, .tar, .tar.gz or .tgz.
+        """
+        return path.lower().endswith(ARCHIVE_SUFFIXES) and os.path.isfile(path)
+
+    @staticmethod
+    def iter_archive_members(archive_path: str) -> Iterator[tuple[str, bytes]]:
+        """
+        Streams the XML members of a zip or tar archive without extracting them to disk.
+
+        Tar archives are read in stream mode, so a compressed archive is decompressed
+        only once and only one member is held in memory at a time.
+
+        Args:
+            archive_path (str): The path of the .zip, .tar, .tar.gz or .tgz archive.
+
+        Yields:
+            tuple[str, bytes]: The member name and its content, in archive order.
+        """
+        if archive_path.lower().endswith(".zip"):
+            with zipfile.ZipFile(archive_path) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and info.filename.endswith(".xml"):
+                        yield info.filename, archive.read(info)
+        else:
+            with tarfile.open(archive_path, "r|*") as archive:
+                for member in archive:
+                    if member.isfile() and member.name.endswith(".xml"):
+                        yield member.name, archive.extractfile(member).read()
+
+    @staticmethod
+    def read_members(read_file: Callable, members: list[tuple[str, bytes]]) -> list:
+        """
+        Parses archive members held in memory, used as task of a worker process.
+
+        Args:
+            read_file (Callable): The function parsing one file, e.g. `read_sdat_file`.
+            members (list[tuple[str, bytes]]): The member names and contents.
+
+        Returns:
+            list: The parse results in the order of `members`.
+        """
+        results = []
+        for name, content in members:
+            source = io.BytesIO(content)
+            source.name = name
+            results.append(read_file(source))
+        return results
+
+    @staticmethod
+    def read_archive(
+        archive_path: str, read_file: Callable, file_type: str, workers: int = 1
+    ) -> list:
+        """
+        Parses the XML members of an archive with `read_file`, without extracting them.
+
+        The members are streamed out of the archive and handed to the parser as file
+        objects. With several workers, chunks of members are parsed in a process pool
+        while the archive is read on; only a few chunks are in flight at a time.
+
+        Args:
+            archive_path (str): The path of the .zip, .tar, .tar.gz or .tgz archive.
+            read_file (Callable): The function parsing one file, e.g. `read_sdat_file`.
+            file_type (str): The file type used in the error message, e.g. "SDAT".
+            workers (int): The number of worker processes. `None` uses all available cores,
+                           1 parses the members sequentially in the current process.
+
+        Returns:
+            list: The parsed objects, sorted by member name.
+
+        Raises:
+            SystemError: If an error occurs while reading any of the members.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        names = []
+        parsed = []
+        members = FileReader.iter_archive_members(archive_path)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = deque()
+                chunk = []
+                for member in members:
+                    chunk.append(member)
+                    if len(chunk) == ARCHIVE_CHUNK_SIZE:
+                        if len(pending) >= workers * 2:
+                            parsed.extend(pending.popleft().result())
+                        pending.append(executor.submit(FileReader.read_members, read_file, chunk))
+                        names.extend(name for name, _ in chunk)
+                        chunk = []
+                if chunk:
+                    pending.append(executor.submit(FileReader.read_members, read_file, chunk))
+                    names.extend(name for name, _ in chunk)
+                while pending:
+                    parsed.extend(pending.popleft().result())
+        else:
+            for name, content in members:
+                names.append(name)
+                parsed.extend(FileReader.read_members(read_file, [(name, content)]))
+
+        result_data = []
+        for name, new_data in sorted(zip(names, parsed), key=lambda item: item[0]):
+            if new_data is not None:
+                result_data.append(new_data)
+            else:
+                raise SystemError(
+                    f"An error occurred while reading {file_type} file {name} in {archive_path}"
+                )
+        return result_data
+
+    @staticmethod
+    def read_path(
+        path: str, read_file: Callable, file_type: str, workers: int = 1, cache: ParseCache = None
+    ) -> list:
+        """
+        Parses all XML files of a directory or all XML members of an archive.
+
+        Args:
+            path (str): A directory, or a .zip, .tar, .tar.gz or .tgz archive.
+            read_file (Callable): The function parsing one file, e.g. `read_sdat_file`.
+            file_type (str): The file type used in the error message, e.g. "SDAT".
+            workers (int): The number of worker processes, see `read_files`.
+            cache (ParseCache): An optional cache of previously parsed files. Only used for
+                                directories, archive members are always parsed.
+
+        Returns:
+            list: The parsed objects, sorted by file or member name.
+
+        Raises:
+            SystemError: If an error occurs while reading any of the files.
+        """
+        if FileReader.is_archive(path):
+            return FileReader.read_archive(path, read_file, file_type, workers)
+        files = FileReader.list_xml_files(path)
+        return FileReader.read_files(files, read_file, file_type, workers, cache)
+
+    @staticmethod
+    def read_esl_files(
+        dirpath: str,
+        workers: int = 1,
+        cache: ParseCache = None,
+        obis_sensors: dict[str, str] = None,
+    ) -> list[MeterData]:
+        """
+        Reads all ESL files in the given directory and returns a list of MeterData.
+
+        Args:
+            dirpath (str): The path to the directory containing ESL XML files, or to a
+                           .zip, .tar, .tar.gz or .tgz archive containing them.
+            workers (int): The number of worker processes used for parsing. `None` uses all
+                           available cores. Defaults to 1 (sequential).
+            cache (ParseCache): An optional cache, only new or changed files are parsed.
+                                Not used for archives.
+            obis_sensors (dict[str, str]): The sensor ID of every OBIS code to read.
+                                           Defaults to `ESL_OBIS_SENSORS`.
+
+        Returns:
+            list[MeterData]: A list of MeterData objects parsed from the ESL files,
+                             sorted by filename.
+
+        Raises:
+            SystemError: If an error occurs while reading any of the ESL files.
+        """
+        read_file = FileReader.esl_read_function(obis_sensors, meter_data=True)
+        return FileReader.read_path(dirpath, read_file, "ESL", workers, cache)
+
+    @staticmethod
+    def read_esl_store(
+        dirpath: str,
+        workers: int = 1,
+        cache: ParseCache = None,
+        files: list[str] = None,
+        obis_sensors: dict[str, str] = None,
+    ) -> MeterStore:
+        """
+        Reads all ESL files in the given directory directly into a MeterStore.
+
+        No MeterData or MeterEntry objects are created, a cache holds the readings of
+        every file. Of several readings with the same timestamp the one from the first
+        file (sorted by filename) is kept.
+
+        Args:
+            dirpath (str): The path to the directory containing ESL XML files, or to a
+                           .zip, .tar, .tar.gz or .tgz archive containing them.
+            workers (int): The number of worker processes used for parsing. `None` uses all
+                           available cores. Defaults to 1 (sequential).
+            cache (ParseCache): An optional cache, only new or changed files are parsed.
+                                Not used for archives. Do not share it with
+                                `read_esl_files`, which caches MeterData objects.
+            files (list[str]): The files to read, listed before by `list_xml_files`.
+                               Defaults to all files in the directory.
+            obis_sensors (dict[str, str]): The sensor ID of every OBIS code to read.
+                                           Defaults to `ESL_OBIS_SENSORS`. A cache must
+                                           have been created with the same mapping as
+                                           its options, see `ParseCache`.
+
+        Returns:
+            MeterStore: The readings of all ESL files per sensor ID.
+
+        Raises:
+            SystemError: If an error occurs while reading any of the ESL files.
+        """
+        read_file = FileReader.esl_read_function(obis_sensors)
+        if files is None:
+            parsed = FileReader.read_path(dirpath, read_file, "ESL", workers, cache)
+        else:
+            parsed = FileReader.read_files(files, read_file, "ESL", workers, cache)
+        store = MeterStore()
+        for timestamp, readings in parsed:
+            store.add_readings(timestamp, readings)
+        store.sort()
+        return store
+
+    @staticmethod
+    def esl_read_function(
+        obis_sensors: dict[str, str] = None, meter_data: bool = False
+    ) -> Callable:
+        """
+        Returns the function parsing one ESL file.
+
+        Args:
+            obis_sensors (dict[str, str]): The sensor ID of every OBIS code to read.
+                                           Defaults to `ESL_OBIS_SENSORS`.
+            meter_data (bool): Return a MeterData object (`read_esl_file`) instead of the
+                               readings (`read_esl_readings`).
+
+        Returns:
+            Callable: The parser, can be sent to worker processes.
+        """
+        read_file = FileReader.read_esl_file if meter_data else FileReader.read_esl_readings
+        if obis_sensors is None:
+            return read_file
+        return partial(read_file, obis_sensors=obis_sensors)
+
+    @staticmethod
+    def read_esl_file(
+        filepath: str | IO[bytes], obis_sensors: dict[str, str] = None
+    ) -> MeterData:
         """
         Reads one ESL file and returns the first MeterData found.
 
         Args:
-            filepath (str): The path to the ESL XML file to be read.
+            filepath (str | IO[bytes]): The path to the ESL XML file to be read, or the
+                                        file opened in binary mode.
+            obis_sensors (dict[str, str]): The sensor ID of every OBIS code to read.
+                                           Defaults to `ESL_OBIS_SENSORS`.
 
         Returns:
             MeterData: The MeterData object containing the extracted meter readings.
             Returns `None` if the file does not contain valid meter data.
+        """
+        parsed = FileReader.read_esl_readings(filepath, obis_sensors)
+        if parsed is None:
+            return None
+        timestamp, readings = parsed
+
+        meter_data = MeterData(from_epoch(timestamp))
+        for sensor_id, totalcost, highcost, lowcost in readings:
+            meter_data.add_reading(sensor_id, MeterEntry(totalcost, highcost, lowcost))
+        return meter_data
+
+    @staticmethod
+    def read_esl_readings(
+        filepath: str | IO[bytes], obis_sensors: dict[str, str] = None
+    ) -> tuple[int, list[tuple[str, float, float, float]]]:
+        """
+        Reads the readings of the first time period of one ESL file.
+
+        The readings of the OBIS codes of a sensor are added up to its total, codes
+        ending in .1 are its high and codes ending in .2 its low tariff reading. OBIS
+        codes without a sensor are skipped.
+
+        Args:
+            filepath (str | IO[bytes]): The path to the ESL XML file to be read, or the
+                                        file opened in binary mode.
+            obis_sensors (dict[str, str]): The sensor ID of every OBIS code to read.
+                                           Defaults to `ESL_OBIS_SENSORS`.
+
+        Returns:
+            tuple[int, list[tuple[str, float, float, float]]]: The end of the time period in
+            seconds since 1970-01-01 and one (sensor_id, totalcost, highcost, lowcost) tuple
+            per sensor with a reading. Returns `None` if the file does not contain valid
+            meter data.
 
         Raises:
             ValueError: If an OBIS code has invalid data status.
             Exception: If any other error occurs during file parsing.
         """
-        obis_id_codes: dict[str, str] = {
-            "1-1:1.8.1": "ID742",
-            "1-1:1.8.2": "ID742",
-            "1-1:2.8.1": "ID735",
-            "1-1:2.8.2": "ID735",
-        }
+        if obis_sensors is None:
+            obis_sensors = ESL_OBIS_SENSORS
         try:
             tree = ET.parse(filepath)
             root = tree.getroot()
@@ -81,12 +478,8 @@ class FileReader:
                 return None
             end_date = datetime.strptime(end_date_str, "%Y-%m-%dT%H:%M:%S")
 
-            meter_data = MeterData(end_date)
-
-            reading_data: dict[str, MeterEntry] = {
-                "ID742": MeterEntry(),
-                "ID735": MeterEntry(),
-            }
+            # [totalcost, highcost, lowcost] per sensor
+            reading_data: dict[str, list[float]] = {}
 
             value_rows = time_period_elem.findall("ValueRow")
             if not value_rows:
@@ -100,65 +493,175 @@ class FileReader:
                 if obis is None or status is None or value_str is None:
                     continue
 
-                sensor_id = obis_id_codes.get(obis)
+                sensor_id = obis_sensors.get(obis)
                 if sensor_id is not None:
                     if status == "V":
-                        if reading_data[sensor_id] is None:
-                            reading_data[sensor_id] = MeterEntry()
                         value = float(value_str)
+                        reading = reading_data.setdefault(sensor_id, [0.0, 0.0, 0.0])
                         if obis.endswith(".1"):
-                            reading_data[sensor_id].highcost = value
+                            reading[1] = value
                         elif obis.endswith(".2"):
-                            reading_data[sensor_id].lowcost = value
-                        reading_data[sensor_id].totalcost += value
+                            reading[2] = value
+                        reading[0] += value
                     else:
                         raise ValueError(f"Obis has invalid data; {filepath}; {obis}")
 
-            for key, value in reading_data.items():
-                meter_data.add_reading(key, value)
-
-            return meter_data
+            return to_epoch(end_date), [
+                (sensor_id, *values) for sensor_id, values in reading_data.items()
+            ]
 
         except Exception as e:
-            print(f"An error occurred while parsing the file {filepath}: {e}")
+            name = FileReader.source_name(filepath)
+            print(f"An error occurred while parsing the file {name}: {e}")
             return None
 
     @staticmethod
-    def read_sdat_files(dirpath: str) -> list[ConsumptionData]:
+    def read_sdat_files(
+        dirpath: str,
+        workers: int = 1,
+        streaming: bool = False,
+        cache: ParseCache = None,
+        backend: str = "etree",
+    ) -> list[ConsumptionData]:
         """
         Reads all SDAT files in the given directory and returns a list of ConsumptionData.
 
         Args:
-            dirpath (str): The path to the directory containing SDAT XML files.
+            dirpath (str): The path to the directory containing SDAT XML files, or to a
+                           .zip, .tar, .tar.gz or .tgz archive containing them.
+            workers (int): The number of worker processes used for parsing. `None` uses all
+                           available cores. Defaults to 1 (sequential).
+            streaming (bool): Use the constant-memory `read_sdat_file_streaming` parser.
+            cache (ParseCache): An optional cache, only new or changed files are parsed.
+                                Not used for archives.
+            backend (str): The parser backend of `read_sdat_file`, see `check_sdat_backend`.
 
         Returns:
-            list[ConsumptionData]: A list of ConsumptionData objects parsed from the SDAT files.
+            list[ConsumptionData]: A list of ConsumptionData objects parsed from the SDAT files,
+                                   sorted by filename.
 
         Raises:
             SystemError: If an error occurs while reading any of the SDAT files.
+            ValueError: If the backend is unknown, not installed or combined with streaming.
         """
-        files = [
-            os.path.join(dirpath, f)
-            for f in os.listdir(dirpath)
-            if os.path.isfile(os.path.join(dirpath, f)) and f.endswith(".xml")
+        read_file = FileReader.sdat_read_function(streaming, backend)
+        return FileReader.read_path(dirpath, read_file, "SDAT", workers, cache)
+
+    @staticmethod
+    def sdat_read_function(streaming: bool = False, backend: str = "etree") -> Callable:
+        """
+        Returns the function parsing one SDAT file.
+
+        Args:
+            streaming (bool): Use the constant-memory `read_sdat_file_streaming` parser.
+            backend (str): The parser backend of `read_sdat_file`, see `check_sdat_backend`.
+
+        Returns:
+            Callable: The parser, can be sent to worker processes.
+
+        Raises:
+            ValueError: If the backend is unknown, not installed or combined with streaming.
+        """
+        FileReader.check_sdat_backend(backend)
+        if streaming and backend != "etree":
+            raise ValueError("Streaming is only supported by the etree backend")
+
+        if streaming:
+            return FileReader.read_sdat_file_streaming
+        if backend == "etree":
+            return FileReader.read_sdat_file
+        return partial(FileReader.read_sdat_file, backend=backend)
+
+    @staticmethod
+    def read_sdat_store(
+        dirpath: str,
+        store: SeriesStore,
+        workers: int = 1,
+        backend: str = "etree",
+        files: list[str] = None,
+    ) -> int:
+        """
+        Adds the SDAT files of a directory that are new or have changed to a SeriesStore.
+
+        The files are parsed and added in batches of `STORE_BATCH_SIZE` sorted by filename,
+        so only one batch of ConsumptionData is held in memory. An archive is added as a
+        whole if it is new or has changed. No ParseCache is needed, the store remembers
+        the files it has added.
+
+        Args:
+            dirpath (str): The path to the directory containing SDAT XML files, or to a
+                           .zip, .tar, .tar.gz or .tgz archive containing them.
+            store (SeriesStore): The store the observations are added to.
+            workers (int): The number of worker processes used for parsing. `None` uses all
+                           available cores. Defaults to 1 (sequential).
+            backend (str): The parser backend of `read_sdat_file`, see `check_sdat_backend`.
+            files (list[str]): The files of the directory to add, e.g. listed before
+                               watching it. All XML files of the directory if omitted, not
+                               used for archives.
+
+        Returns:
+            int: The number of files (or archives) added.
+
+        Raises:
+            SystemError: If an error occurs while reading any of the SDAT files.
+            ValueError: If the backend is unknown or not installed.
+        """
+        read_file = FileReader.sdat_read_function(backend=backend)
+        if FileReader.is_archive(dirpath):
+            if store.is_added(dirpath):
+                return 0
+            store.add(FileReader.read_archive(dirpath, read_file, "SDAT", workers), [dirpath])
+            return 1
+
+        if files is None:
+            files = FileReader.list_xml_files(dirpath)
+        files = [file for file in files if not store.is_added(file)]
+        for first in range(0, len(files), STORE_BATCH_SIZE):
+            batch = files[first:first + STORE_BATCH_SIZE]
+            store.add(FileReader.read_files(batch, read_file, "SDAT", workers), batch)
+        return len(files)
+
+    @staticmethod
+    def available_sdat_backends() -> list[str]:
+        """
+        Returns:
+            list[str]: The SDAT parser backends usable in this environment.
+        """
+        return [
+            backend for backend in SDAT_BACKENDS if backend != "lxml" or lxml_etree is not None
         ]
-        files.sort()
-        result_data: list[ConsumptionData] = []
-        for file in files:
-            new_data = FileReader.read_sdat_file(file)
-            if new_data is not None:
-                result_data.append(new_data)
-            else:
-                raise SystemError(f"An error occurred while reading SDAT file {file}")
-        return result_data
 
     @staticmethod
-    def read_sdat_file(filepath: str) -> ConsumptionData:
+    def check_sdat_backend(backend: str) -> None:
+        """
+        Checks that an SDAT parser backend can be used.
+
+        "etree" builds the tree with the standard library, "lxml" with lxml if it is
+        installed. "scan" reads the values from the raw bytes without building a tree and
+        falls back to "etree" for every file it cannot verify, see `scan_sdat_file`.
+
+        Args:
+            backend (str): The backend name.
+
+        Raises:
+            ValueError: If the backend is unknown or lxml is not installed.
+        """
+        if backend not in SDAT_BACKENDS:
+            raise ValueError(f"Unknown SDAT backend {backend!r}, use one of {SDAT_BACKENDS}")
+        if backend == "lxml" and lxml_etree is None:
+            raise ValueError("The lxml SDAT backend requires the lxml package")
+
+    @staticmethod
+    def read_sdat_file(filepath: str | IO[bytes], backend: str = "etree") -> ConsumptionData:
         """
         Reads an SDAT file and returns a ConsumptionData object.
 
+        All backends return the same ConsumptionData for the same file.
+
         Args:
-            filepath (str): The path to the SDAT XML file to be read.
+            filepath (str | IO[bytes]): The path to the SDAT XML file to be read, or the
+                                        file opened in binary mode.
+            backend (str): The parser backend, see `check_sdat_backend`.
 
         Returns:
             ConsumptionData: The ConsumptionData object containing the extracted consumption
@@ -166,10 +669,20 @@ class FileReader:
             Returns `None` if the file does not contain valid consumption data.
 
         Raises:
+            ValueError: If the backend is unknown or not installed.
             Exception: If any error occurs during file parsing.
         """
+        FileReader.check_sdat_backend(backend)
+        if backend == "scan":
+            consumption_data = FileReader.scan_sdat_file(filepath)
+            if consumption_data is not None:
+                return consumption_data
+            if not isinstance(filepath, str):
+                filepath.seek(0)
+            backend = "etree"
+
         try:
-            tree = ET.parse(filepath)
+            tree = lxml_etree.parse(filepath) if backend == "lxml" else ET.parse(filepath)
             root = tree.getroot()
 
             ns = {"rsm": "http://www.strom.ch"}
@@ -224,21 +737,17 @@ class FileReader:
             resolution_unit_elem = resolution_elem.find("rsm:Unit", ns)
             if resolution_value_elem is None or resolution_unit_elem is None:
                 return None
-            resolution_value = int(resolution_value_elem.text)
-            resolution_unit = resolution_unit_elem.text
-
-            if resolution_unit == "MIN":
-                resolution_timedelta = timedelta(minutes=resolution_value)
-            elif resolution_unit == "H":
-                resolution_timedelta = timedelta(hours=resolution_value)
-            else:
-                resolution_timedelta = timedelta(minutes=resolution_value)
+            resolution_timedelta = FileReader.parse_resolution(
+                resolution_value_elem.text, resolution_unit_elem.text
+            )
+            consumption_data.resolution = resolution_timedelta
+            resolution_seconds = int(resolution_timedelta.total_seconds())
 
             observations = metering_data.findall("rsm:Observation", ns)
             if not observations:
                 return None
 
-            current_timestamp = start_datetime
+            current_timestamp = to_epoch(start_datetime)
 
             for obs in observations:
                 volume_elem = obs.find("rsm:Volume", ns)
@@ -249,15 +758,359 @@ class FileReader:
                     continue
                 volume = float(volume_str)
 
-                consumption_entry = ConsumptionEntry(
-                    volume=volume, timestamp=current_timestamp
-                )
-                consumption_data.add_entry(consumption_entry)
+                consumption_data.add_value(current_timestamp, volume)
 
-                current_timestamp += resolution_timedelta
+                current_timestamp += resolution_seconds
 
             return consumption_data
 
         except Exception as e:
-            print(f"An error occurred while parsing the file {filepath}: {e}")
+            name = FileReader.source_name(filepath)
+            print(f"An error occurred while parsing the file {name}: {e}")
             return None
+
+    @staticmethod
+    def scan_sdat_file(filepath: str | IO[bytes]) -> ConsumptionData:
+        """
+        Reads an SDAT file as bytes with regular expressions instead of building a tree.
+
+        Only files with the plain layout written by the metering systems are accepted: a
+        UTF-8 document whose elements use the "rsm" prefix for http://www.strom.ch, without
+        comments, CDATA sections, entities or attributes on the read elements, and with
+        exactly one Volume as direct child of every Observation. Every other file is
+        rejected, so the caller can parse it with a tree-building backend instead. The
+        document is checked to be well-formed first with expat, the parser underneath
+        ElementTree, without building elements.
+
+        Args:
+            filepath (str | IO[bytes]): The path to the SDAT XML file to be read, or the
+                                        file opened in binary mode.
+
+        Returns:
+            ConsumptionData: The same ConsumptionData as `read_sdat_file`, or `None` if the
+            file cannot be verified by the scan.
+        """
+        try:
+            if isinstance(filepath, str):
+                with open(filepath, "rb") as file:
+                    content = file.read()
+            else:
+                content = filepath.read()
+        except OSError:
+            return None
+
+        if not FileReader.is_well_formed(content):
+            return None
+        if content.startswith(b"\xef\xbb\xbf"):
+            content = content[3:]
+        declaration = SCAN_XML_DECLARATION.match(content)
+        if declaration is not None and declaration.group(1).lower() not in (b"utf-8", b"utf8"):
+            return None
+        if (
+            b"<!" in content
+            or b"&" in content
+            or content.count(b"<?") > int(content.startswith(b"<?xml"))
+            or b"xmlns=" in content
+            or content.count(b"http://www.strom.ch") != 1
+            or b'xmlns:rsm="http://www.strom.ch"' not in content
+        ):
+            return None
+
+        try:
+            root = FileReader.scan_root(content)
+            header = FileReader.scan_element(root, b"ValidatedMeteredData_HeaderInformation")
+            instance_doc = FileReader.scan_element(header, b"InstanceDocument")
+            document_id = FileReader.scan_element(instance_doc, b"DocumentID")
+            metering_data = FileReader.scan_element(root, b"MeteringData")
+            if not document_id or metering_data is None:
+                return None
+
+            # The Observations must follow each other directly, each with one Volume as
+            # direct child, otherwise the tree-building parsers could read other values
+            first = metering_data.find(b"<rsm:Observation")
+            last = metering_data.rfind(b"</rsm:Observation>") + len(b"</rsm:Observation>")
+            if first < 0 or last < first or metering_data[last:].strip():
+                return None
+            observations = SCAN_OBSERVATION.findall(metering_data, first, last)
+            if not observations or sum(len(obs[0]) for obs in observations) != last - first:
+                return None
+            _, before_volumes, volume_texts = zip(*observations)
+            # In a well-formed document no part before a Volume has a negative depth, so a
+            # balanced sum means that every part is balanced
+            if not FileReader.scan_is_balanced(b"".join(before_volumes)):
+                return None
+            volumes = array("d", map(float, filter(None, volume_texts)))
+
+            head = metering_data[:first]
+            interval = SCAN_INTERVAL.search(head)
+            resolution = SCAN_RESOLUTION.search(head)
+            if (
+                interval is None
+                or resolution is None
+                or head.count(b"<rsm:Interval") != 1
+                or head.count(b"<rsm:Resolution") != 2
+                or not FileReader.scan_is_balanced(head)
+                or not FileReader.scan_is_balanced(head[:interval.start()])
+                or not FileReader.scan_is_balanced(head[:resolution.start()])
+            ):
+                return None
+
+            consumption_data = ConsumptionData(
+                document_id=document_id.decode("utf-8").split("_")[-1],
+                start_date=datetime(*map(int, interval.group(1, 2, 3, 4, 5, 6))),
+                end_date=datetime(*map(int, interval.group(7, 8, 9, 10, 11, 12))),
+                resolution=FileReader.parse_resolution(
+                    resolution.group(1).decode(), resolution.group(2).decode()
+                ),
+            )
+        except ValueError:
+            return None
+
+        resolution_seconds = int(consumption_data.resolution.total_seconds())
+        start = to_epoch(consumption_data.start_date)
+        if resolution_seconds:
+            stop = start + len(volumes) * resolution_seconds
+            timestamps = array("q", range(start, stop, resolution_seconds))
+        else:
+            timestamps = array("q", [start]) * len(volumes)
+        consumption_data.set_columns(timestamps, volumes)
+        return consumption_data
+
+    @staticmethod
+    def is_well_formed(content: bytes) -> bool:
+        """
+        Checks that a document is well-formed XML, as `ET.parse` requires.
+
+        Args:
+            content (bytes): The whole document.
+
+        Returns:
+            bool: True if expat parses the document without error.
+        """
+        try:
+            # With namespace processing like ElementTree, so unbound prefixes are errors
+            xml.parsers.expat.ParserCreate(namespace_separator="}").Parse(content, True)
+        except (xml.parsers.expat.ExpatError, LookupError, ValueError):
+            # LookupError for unknown encodings in the XML declaration
+            return False
+        return True
+
+    @staticmethod
+    def scan_root(content: bytes) -> bytes:
+        """
+        Returns the content of the root element of a document.
+
+        Args:
+            content (bytes): The whole document without a byte order mark.
+
+        Returns:
+            bytes: The content between the start and end tag of the root element, or `None`
+            if the document does not consist of an optional declaration and one element.
+        """
+        declaration_end = content.find(b"?>") + 2 if content.startswith(b"<?") else 0
+        start = content.find(b"<", declaration_end)
+        start_end = content.find(b">", start)
+        end = content.rfind(b"</")
+        if (
+            start < 0
+            or content[declaration_end:start].strip()
+            or end < start_end
+            or content[start_end - 1:start_end] == b"/"
+            or content[content.find(b">", end) + 1:].strip()
+        ):
+            return None
+        return content[start_end + 1:end]
+
+    @staticmethod
+    def scan_element(content: bytes, name: bytes) -> bytes:
+        """
+        Returns the content of the only element `rsm:<name>` directly inside `content`.
+
+        Args:
+            content (bytes): The content of the parent element.
+            name (bytes): The local name of the element.
+
+        Returns:
+            bytes: The content between the start and end tag, or `None` if the element is
+            missing, occurs more than once, has attributes or is not a direct child.
+        """
+        if content is None:
+            return None
+        start_tag = b"<rsm:" + name + b">"
+        end_tag = b"</rsm:" + name + b">"
+        if content.count(b"<rsm:" + name) != 1 or content.count(end_tag) != 1:
+            return None
+        start = content.find(start_tag)
+        end = content.find(end_tag)
+        if start < 0 or end < start or not FileReader.scan_is_balanced(content[:start]):
+            return None
+        return content[start + len(start_tag):end]
+
+    @staticmethod
+    def scan_is_balanced(content: bytes) -> bool:
+        """
+        Checks that every element started in `content` is also closed in it.
+
+        Args:
+            content (bytes): A piece of XML without comments or processing instructions.
+
+        Returns:
+            bool: True if `content` leaves the nesting depth unchanged.
+        """
+        end_tags = content.count(b"</")
+        return content.count(b"<") - 2 * end_tags - content.count(b"/>") == 0
+
+    @staticmethod
+    def parse_resolution(value: str, unit: str) -> timedelta:
+        """
+        Converts an SDAT resolution into a timedelta.
+
+        Args:
+            value (str): The resolution value, e.g. "15".
+            unit (str): The resolution unit, "MIN" or "H". Unknown units are read as minutes.
+
+        Returns:
+            timedelta: The time between two observations.
+        """
+        resolution_value = int(value)
+        if unit == "H":
+            return timedelta(hours=resolution_value)
+        return timedelta(minutes=resolution_value)
+
+    @staticmethod
+    def read_sdat_file_streaming(filepath: str | IO[bytes]) -> ConsumptionData:
+        """
+        Reads an SDAT file with the streaming parser and returns a ConsumptionData object.
+
+        Produces the same result as `read_sdat_file`, but never holds more than one
+        observation element of the XML tree in memory.
+
+        Args:
+            filepath (str | IO[bytes]): The path to the SDAT XML file to be read, or the
+                                        file opened in binary mode.
+
+        Returns:
+            ConsumptionData: The ConsumptionData object containing the extracted consumption
+                             entries.
+            Returns `None` if the file does not contain valid consumption data.
+        """
+        try:
+            stream = FileReader.iter_sdat_file(filepath)
+            consumption_data = next(stream, None)
+            if consumption_data is None:
+                return None
+            for consumption_entry in stream:
+                consumption_data.add_entry(consumption_entry)
+            return consumption_data
+
+        except Exception as e:
+            name = FileReader.source_name(filepath)
+            print(f"An error occurred while parsing the file {name}: {e}")
+            return None
+
+    @staticmethod
+    def iter_sdat_file(filepath: str | IO[bytes]) -> Iterator[ConsumptionData | ConsumptionEntry]:
+        """
+        Streams an SDAT file with `iterparse` and yields its content while it is parsed.
+
+        The first item is a ConsumptionData with the document ID and the interval but without
+        entries, every following item is the ConsumptionEntry of one observation. Observation
+        elements are cleared and detached as soon as they are processed. Observations that
+        appear before the interval and resolution are buffered until the header is complete.
+
+        Args:
+            filepath (str | IO[bytes]): The path to the SDAT XML file to be read, or the
+                                        file opened in binary mode.
+
+        Yields:
+            ConsumptionData | ConsumptionEntry: The empty ConsumptionData first, then the
+            consumption entries in document order. Yields nothing if the file does not
+            contain valid consumption data.
+
+        Raises:
+            Exception: If the file is not well-formed or contains invalid values.
+        """
+        header_information_tag = SDAT_NAMESPACE + "ValidatedMeteredData_HeaderInformation"
+        metering_data_tag = SDAT_NAMESPACE + "MeteringData"
+        observation_tag = SDAT_NAMESPACE + "Observation"
+        volume_tag = SDAT_NAMESPACE + "Volume"
+        interval_tag = SDAT_NAMESPACE + "Interval"
+        resolution_tag = SDAT_NAMESPACE + "Resolution"
+
+        header_paths = {
+            (header_information_tag, SDAT_NAMESPACE + "InstanceDocument",
+             SDAT_NAMESPACE + "DocumentID"): "document_id",
+            (metering_data_tag, interval_tag, SDAT_NAMESPACE + "StartDateTime"): "start",
+            (metering_data_tag, interval_tag, SDAT_NAMESPACE + "EndDateTime"): "end",
+            (metering_data_tag, resolution_tag, resolution_tag): "resolution",
+            (metering_data_tag, resolution_tag, SDAT_NAMESPACE + "Unit"): "unit",
+        }
+        header: dict[str, str] = {}
+        pending_volumes: list[float] = []
+        consumption_data = None
+        current_timestamp = None
+        resolution_timedelta = None
+
+        def start_consumption_data() -> list:
+            """Creates the ConsumptionData once the header is complete."""
+            nonlocal consumption_data, current_timestamp, resolution_timedelta
+            if any(header.get(key) is None for key in header_paths.values()):
+                return []
+            consumption_data = ConsumptionData(
+                document_id=header["document_id"].split("_")[-1],
+                start_date=datetime.strptime(header["start"], "%Y-%m-%dT%H:%M:%SZ"),
+                end_date=datetime.strptime(header["end"], "%Y-%m-%dT%H:%M:%SZ"),
+            )
+            resolution_timedelta = FileReader.parse_resolution(
+                header["resolution"], header["unit"]
+            )
+            consumption_data.resolution = resolution_timedelta
+            current_timestamp = consumption_data.start_date
+            items = [consumption_data]
+            for pending_volume in pending_volumes:
+                items.append(ConsumptionEntry(volume=pending_volume, timestamp=current_timestamp))
+                current_timestamp += resolution_timedelta
+            pending_volumes.clear()
+            return items
+
+        observation_seen = False
+        path: list[str] = []
+        elements: list[ET.Element] = []
+        for event, elem in ET.iterparse(filepath, events=("start", "end")):
+            if event == "start":
+                path.append(elem.tag)
+                elements.append(elem)
+                continue
+
+            path.pop()
+            elements.pop()
+            depth = len(path)
+            if depth > 2 and path[2] == observation_tag:
+                continue
+
+            if depth == 2 and elem.tag == observation_tag and path[1] == metering_data_tag:
+                observation_seen = True
+                volume_elem = elem.find(volume_tag)
+                volume_str = volume_elem.text if volume_elem is not None else None
+                elem.clear()
+                elements[-1].remove(elem)
+                if volume_str is None:
+                    continue
+                volume = float(volume_str)
+
+                if consumption_data is None:
+                    yield from start_consumption_data()
+                    if consumption_data is None:
+                        pending_volumes.append(volume)
+                        continue
+
+                yield ConsumptionEntry(volume=volume, timestamp=current_timestamp)
+                current_timestamp += resolution_timedelta
+
+            elif 1 <= depth <= 3:
+                key = header_paths.get(tuple(path[1:]) + (elem.tag,))
+                if key is not None and key not in header:
+                    header[key] = elem.text
+
+        if consumption_data is None and observation_seen:
+            yield from start_consumption_data()
@@ -4,20 +4,23 @@ import webbrowser
 from tkinter import filedialog, messagebox
 import customtkinter as ctk
 from classes.consumtion_data import ConsumptionData
+from classes.data_processor import DataProcessor
 from classes.exporter import Exporter
-from classes.meter_data import MeterData
+from classes.file_reader import FileReader
+from classes.meter_store import MeterStore
 
 
 class Gui:
     """GUI zur Auswahl von Visualisierung oder Export mit Formatwahl"""
 
-    def __init__(self, data_consumption, data_meter):
+    def __init__(self, data_consumption, meter_store, obis_sensors=None):
         print("Gui initialized")
         self.back_button = None
         self.esl_button = None
         self.sdat_button = None
         self.data_consumption = data_consumption
-        self.data_meter = data_meter
+        self.meter_store = meter_store
+        self.obis_sensors = obis_sensors
         ctk.set_appearance_mode("System")
         ctk.set_default_color_theme("green")
 
@@ -45,13 +48,14 @@ class Gui:
         )
         self.export_button.pack(pady=(10, 10))
 
-        self.obis_var = ctk.StringVar(value="ID742")
+        sensor_ids = DataProcessor.get_sensor_ids(self.data_consumption, self.meter_store)
+        self.obis_var = ctk.StringVar(value=sensor_ids[0] if sensor_ids else "")
         self.obis_label = ctk.CTkLabel(self.root, text="Sensor ID wählen:")
         self.obis_label.pack(pady=(10, 5))
         self.obis_dropdown = ctk.CTkComboBox(
             self.root,
             state="readonly",
-            values=["ID735", "ID742"],
+            values=sensor_ids,
             variable=self.obis_var,
         )
         self.obis_dropdown.pack(pady=5)
@@ -89,7 +93,7 @@ class Gui:
             self.obis_var.get(),
             self.export_format,
             self.data_consumption,
-            self.data_meter,
+            self.meter_store,
         )
 
     def show_add_files_options(self):
@@ -128,7 +132,11 @@ class Gui:
             destination = "data/public/SDAT-Files"
             if not os.path.exists(destination):
                 os.makedirs(destination)
-            os.rename(file_path, os.path.join(destination, os.path.basename(file_path)))
+            new_path = os.path.join(destination, os.path.basename(file_path))
+            os.rename(file_path, new_path)
+            new_data = FileReader.read_sdat_file(new_path)
+            if new_data is not None:
+                self.data_consumption.append(new_data)
             self.show_buttons()
 
     def add_new_esl_file(self):
@@ -138,11 +146,23 @@ class Gui:
             destination = "data/public/ESL-Files"
             if not os.path.exists(destination):
                 os.makedirs(destination)
-            os.rename(file_path, os.path.join(destination, os.path.basename(file_path)))
+            new_path = os.path.join(destination, os.path.basename(file_path))
+            os.rename(file_path, new_path)
+            parsed = FileReader.read_esl_readings(new_path, self.obis_sensors)
+            if parsed is not None:
+                self.meter_store.add_readings(*parsed)
+                self.meter_store.sort()
             self.show_buttons()
 
+    def update_sensor_ids(self):
+        """Offers the sensor IDs of the loaded data, including newly added files."""
+        self.obis_dropdown.configure(
+            values=DataProcessor.get_sensor_ids(self.data_consumption, self.meter_store)
+        )
+
     def show_buttons(self):
         """Docstring"""
+        self.update_sensor_ids()
         self.visualise_button.pack(pady=(50, 10))
         self.add_files_button.pack(pady=(10, 10))
         self.export_button.pack(pady=(10, 10))
@@ -160,15 +180,15 @@ class Gui:
         obiscode: str,
         export_type: str,
         data_consumption: list[ConsumptionData],
-        data_meter: list[MeterData],
+        meter_store: MeterStore,
     ):
         """Docstring"""
         exporter = Exporter()
         if export_type == "csv":
-            exporter.export_to_csv(path, obiscode, data_consumption, data_meter)
+            exporter.export_to_csv(path, obiscode, data_consumption, meter_store)
             print("csv exported")
         elif export_type == "json":
-            exporter.export_to_json(path, obiscode, data_consumption, data_meter)
+            exporter.export_to_json(path, obiscode, data_consumption, meter_store)
             print("json exported")
         else:
             print(f"Export type {export_type} is not supported.")
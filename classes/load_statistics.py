@@ -0,0 +1,430 @@
+"""QuantileSketch, MonthlyLoad & LoadStatistics Class"""
+import math
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from operator import le, sub
+
+# Import Local Classes
+from classes.consumtion_data import ConsumptionData, from_epoch
+from classes.rollup_pyramid import RollupPyramid, month_start, next_month
+
+# Quantiles are estimated within 1 % of their true value
+DEFAULT_RELATIVE_ACCURACY = 0.01
+# Volumes closer to zero than this are counted as zero
+ZERO_VOLUME = 1e-9
+# Points of the load-duration curve, one per percent of the time
+DURATION_CURVE_POINTS = 101
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile estimates of a stream of values with a bounded relative error.
+
+    Values are counted in logarithmic bins, bin `k` holds the values in
+    (gamma^(k-1), gamma^k] with gamma = (1 + a) / (1 - a) for a relative accuracy `a`, so
+    every quantile is returned within `a` of a value of the stream at that rank. Negative
+    values (feed-in) are binned by their magnitude, values near zero are counted apart.
+    Sketches with the same accuracy are merged by adding their bin counts, which gives the
+    same sketch as adding all values to one.
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        """
+        Args:
+            relative_accuracy (float): The relative error of the quantiles, between 0 and 1.
+
+        Raises:
+            ValueError: If the accuracy is not between 0 and 1.
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.multiplier = 1 / math.log(self.gamma)
+        self.positive: Counter[int] = Counter()
+        self.negative: Counter[int] = Counter()
+        self.zero_count = 0
+        self.count = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def extend(self, values) -> None:
+        """
+        Adds values to the sketch.
+
+        Args:
+            values: The values, e.g. a slice of a volume column.
+        """
+        count = len(values)
+        if count == 0:
+            return
+        log, ceil, multiplier = math.log, math.ceil, self.multiplier
+        positive = [ceil(log(value) * multiplier) for value in values if value > ZERO_VOLUME]
+        negative = [ceil(log(-value) * multiplier) for value in values if value < -ZERO_VOLUME]
+        self.positive.update(positive)
+        self.negative.update(negative)
+        self.zero_count += count - len(positive) - len(negative)
+        self.count += count
+        self.minimum = min(self.minimum, min(values))
+        self.maximum = max(self.maximum, max(values))
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """
+        Adds the values of another sketch.
+
+        Args:
+            other (QuantileSketch): The sketch to add, it is not changed.
+
+        Raises:
+            ValueError: If the sketches have a different accuracy.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same relative accuracy can be merged")
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def bin_value(self, key: int) -> float:
+        """
+        Args:
+            key (int): A bin of the sketch.
+
+        Returns:
+            float: The magnitude within the relative accuracy of every value in the bin.
+        """
+        return 2 * self.gamma**key / (self.gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile.
+
+        Args:
+            q (float): The quantile between 0 and 1, e.g. 0.95.
+
+        Returns:
+            float: The estimated value of rank `q * (count - 1)`, NaN if the sketch is empty.
+
+        Raises:
+            ValueError: If `q` is not between 0 and 1.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if self.count == 0:
+            return math.nan
+        if q == 0:
+            return self.minimum
+        if q == 1:
+            return self.maximum
+
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return min(self.maximum, max(self.minimum, -self.bin_value(key)))
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return min(self.maximum, max(self.minimum, self.bin_value(key)))
+        return self.maximum
+
+
+class MonthlyLoad:
+    """
+    Running load statistics of one sensor in one calendar month.
+
+    The load is the volume of an observation, kWh per interval; `demand` converts it to
+    the mean power in kW over the interval of `resolution` seconds.
+    """
+
+    __slots__ = (
+        "year",
+        "month",
+        "count",
+        "total",
+        "minimum",
+        "peak",
+        "peak_timestamp",
+        "resolution",
+        "sketch",
+    )
+
+    def __init__(
+        self,
+        year: int,
+        month: int,
+        resolution: int = None,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+    ):
+        """
+        Args:
+            year (int): The year.
+            month (int): The month.
+            resolution (int): The seconds between two observations, if known.
+            relative_accuracy (float): The relative error of the percentiles.
+        """
+        self.year = year
+        self.month = month
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.peak = -math.inf
+        # Seconds since 1970-01-01 of the first observation with the peak volume
+        self.peak_timestamp = None
+        self.resolution = resolution
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, timestamps, volumes) -> None:
+        """
+        Adds observations of the month.
+
+        Args:
+            timestamps: The seconds since 1970-01-01 of the observations.
+            volumes: The volumes of the observations.
+        """
+        if len(volumes) == 0:
+            return
+        peak_position = max(range(len(volumes)), key=volumes.__getitem__)
+        if volumes[peak_position] > self.peak:
+            self.peak = volumes[peak_position]
+            self.peak_timestamp = timestamps[peak_position]
+        self.count += len(volumes)
+        self.total += math.fsum(volumes)
+        self.minimum = min(self.minimum, min(volumes))
+        self.sketch.extend(volumes)
+
+    def merge(self, other: "MonthlyLoad") -> None:
+        """
+        Adds the statistics of disjoint observations of the same month.
+
+        Args:
+            other (MonthlyLoad): The statistics to add, they are not changed.
+        """
+        if other.peak > self.peak or (
+            other.peak == self.peak
+            and other.peak_timestamp is not None
+            and other.peak_timestamp < self.peak_timestamp
+        ):
+            self.peak = other.peak
+            self.peak_timestamp = other.peak_timestamp
+        self.count += other.count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        if self.resolution is None or (
+            other.resolution is not None and other.resolution < self.resolution
+        ):
+            self.resolution = other.resolution
+        self.sketch.merge(other.sketch)
+
+    def mean(self) -> float:
+        """
+        Returns:
+            float: The mean volume, NaN without observations.
+        """
+        return self.total / self.count if self.count else math.nan
+
+    def percentile(self, percent: float) -> float:
+        """
+        Args:
+            percent (float): The percentile between 0 and 100, e.g. 95.
+
+        Returns:
+            float: The estimated volume not exceeded by `percent` % of the observations.
+        """
+        return self.sketch.quantile(percent / 100)
+
+    def demand(self, volume: float) -> float:
+        """
+        Args:
+            volume (float): A volume of one observation in kWh.
+
+        Returns:
+            float: The mean power over the observation in kW, NaN if the resolution is
+            unknown.
+        """
+        if not self.resolution:
+            return math.nan
+        return volume * 3600 / self.resolution
+
+    def peak_demand(self) -> float:
+        """
+        Returns:
+            float: The peak demand in kW, NaN if the resolution is unknown.
+        """
+        return self.demand(self.peak)
+
+    def duration_curve(
+        self, points: int = DURATION_CURVE_POINTS
+    ) -> tuple[list[float], list[float]]:
+        """
+        Returns the load-duration curve: the volumes sorted from the peak down, against the
+        share of the time they are reached or exceeded.
+
+        Args:
+            points (int): The number of points, at least 2.
+
+        Returns:
+            tuple[list[float], list[float]]: The shares of the time in percent and the
+            volumes reached during that share.
+        """
+        shares = [100 * i / (points - 1) for i in range(points)]
+        return shares, [self.sketch.quantile(1 - share / 100) for share in shares]
+
+
+class LoadStatistics:
+    """
+    Peak demand, load percentiles and load-duration curves of a sensor per calendar month.
+
+    Statistics are computed in one pass over the observations and are mergeable: the
+    statistics of disjoint observations, e.g. of SDAT files covering different periods,
+    are combined with `merge` without reading the observations again. Observations that
+    overlap must be merged into the canonical series first (see `SeriesMerger`), merging
+    their statistics would count them twice.
+    """
+
+    def __init__(self, sensor_id: str, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        """
+        Args:
+            sensor_id (str): The sensor ID.
+            relative_accuracy (float): The relative error of the percentiles.
+        """
+        self.sensor_id = sensor_id
+        self.relative_accuracy = relative_accuracy
+        self.months: dict[tuple[int, int], MonthlyLoad] = {}
+
+    @staticmethod
+    def from_series(
+        sensor_id: str,
+        timestamps,
+        volumes,
+        resolution: int = None,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+    ) -> "LoadStatistics":
+        """
+        Computes the statistics of a series, e.g. the observations of a RollupPyramid.
+
+        Args:
+            sensor_id (str): The sensor ID.
+            timestamps: The seconds since 1970-01-01 of the observations.
+            volumes: The volumes of the observations.
+            resolution (int): The seconds between two observations, the smallest step
+                              between two timestamps if omitted.
+            relative_accuracy (float): The relative error of the percentiles.
+
+        Returns:
+            LoadStatistics: The statistics.
+        """
+        statistics = LoadStatistics(sensor_id, relative_accuracy)
+        if not all(map(le, timestamps, timestamps[1:])):
+            order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+            timestamps = array("q", [timestamps[i] for i in order])
+            volumes = array("d", [volumes[i] for i in order])
+        if resolution is None and len(timestamps) > 1:
+            resolution = min(
+                (step for step in map(sub, timestamps[1:], timestamps[:-1]) if step > 0),
+                default=None,
+            )
+
+        first = 0
+        stop = len(timestamps)
+        while first < stop:
+            start = month_start(timestamps[first])
+            end = bisect_left(timestamps, next_month(start), first + 1, stop)
+            date = from_epoch(start)
+            monthly_load = MonthlyLoad(date.year, date.month, resolution, relative_accuracy)
+            monthly_load.add(timestamps[first:end], volumes[first:end])
+            statistics.months[(date.year, date.month)] = monthly_load
+            first = end
+        return statistics
+
+    @staticmethod
+    def from_rollup(sensor_id: str, rollup: RollupPyramid) -> "LoadStatistics":
+        """
+        Computes the statistics of the canonical series kept by a RollupPyramid.
+
+        Args:
+            sensor_id (str): The sensor ID.
+            rollup (RollupPyramid): The rollups of the sensor, `None` if it has no data.
+
+        Returns:
+            LoadStatistics: The statistics, `None` without a rollup.
+        """
+        if rollup is None:
+            return None
+        return LoadStatistics.from_series(sensor_id, rollup.timestamps, rollup.volumes)
+
+    @staticmethod
+    def from_documents(
+        documents: list[ConsumptionData], relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY
+    ) -> dict[str, "LoadStatistics"]:
+        """
+        Computes the statistics of every document and merges them per sensor.
+
+        The documents must not overlap, see the class docstring.
+
+        Args:
+            documents (list[ConsumptionData]): The documents.
+            relative_accuracy (float): The relative error of the percentiles.
+
+        Returns:
+            dict[str, LoadStatistics]: The statistics per sensor ID.
+        """
+        statistics_per_id = {}
+        for document in documents:
+            resolution = (
+                None if document.resolution is None else int(document.resolution.total_seconds())
+            )
+            partial = LoadStatistics.from_series(
+                document.document_id,
+                document.timestamps,
+                document.volumes,
+                resolution,
+                relative_accuracy,
+            )
+            statistics = statistics_per_id.get(document.document_id)
+            if statistics is None:
+                statistics_per_id[document.document_id] = partial
+            else:
+                statistics.merge(partial)
+        return statistics_per_id
+
+    def merge(self, other: "LoadStatistics") -> None:
+        """
+        Adds the statistics of disjoint observations of the same sensor.
+
+        Args:
+            other (LoadStatistics): The statistics to add, they are not changed.
+        """
+        for key, other_load in other.months.items():
+            monthly_load = self.months.get(key)
+            if monthly_load is None:
+                monthly_load = MonthlyLoad(
+                    other_load.year, other_load.month, None, self.relative_accuracy
+                )
+                self.months[key] = monthly_load
+            monthly_load.merge(other_load)
+
+    def monthly(self) -> list[MonthlyLoad]:
+        """
+        Returns:
+            list[MonthlyLoad]: The statistics of every month with observations, sorted.
+        """
+        return [self.months[key] for key in sorted(self.months)]
+
+    def month(self, year: int, month: int) -> MonthlyLoad:
+        """
+        Args:
+            year (int): The year.
+            month (int): The month.
+
+        Returns:
+            MonthlyLoad: The statistics of the month, `None` without observations.
+        """
+        return self.months.get((year, month))
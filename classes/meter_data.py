@@ -4,6 +4,8 @@ from datetime import datetime
 
 class MeterEntry:
     """Docstring"""
+    __slots__ = ("totalcost", "highcost", "lowcost")
+
     def __init__(self, totalcost: float = 0.0, highcost: float = 0.0, lowcost: float = 0.0) -> None:
         """
         Initialize a MeterEntry object with total, high, and low costs.
@@ -29,6 +31,8 @@ class MeterEntry:
 
 class MeterData:
     """Docstring"""
+    __slots__ = ("timestamp", "data")
+
     def __init__(self, timestamp: datetime):
         """
         Args:
@@ -0,0 +1,336 @@
+"""MeterSeries & MeterStore Class"""
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Iterable
+
+# Import Local Classes
+from classes.consumtion_data import from_epoch, to_epoch
+from classes.meter_data import MeterData
+
+INTERPOLATION_METHODS = ("nearest", "linear")
+READING_COLUMNS = ("totalcost", "highcost", "lowcost")
+
+
+class MeterSeries:
+    """Meter readings of one sensor as columns sorted by timestamp."""
+    __slots__ = ("timestamps", "totalcost", "highcost", "lowcost")
+
+    def __init__(self):
+        self.timestamps = array("q")
+        self.totalcost = array("d")
+        self.highcost = array("d")
+        self.lowcost = array("d")
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def append(self, timestamp: int, totalcost: float, highcost: float, lowcost: float) -> None:
+        """
+        Appends one reading.
+
+        Args:
+            timestamp (int): The seconds since 1970-01-01 of the reading, see `to_epoch`.
+            totalcost (float): The total reading.
+            highcost (float): The high tariff reading.
+            lowcost (float): The low tariff reading.
+        """
+        self.timestamps.append(timestamp)
+        self.totalcost.append(totalcost)
+        self.highcost.append(highcost)
+        self.lowcost.append(lowcost)
+
+    def slice(self, start: int, stop: int) -> "MeterSeries":
+        """
+        Returns the readings with positions in [start, stop) as a new series.
+
+        Args:
+            start (int): The first position.
+            stop (int): The position after the last reading.
+
+        Returns:
+            MeterSeries: The readings in the range.
+        """
+        series = MeterSeries()
+        series.timestamps = self.timestamps[start:stop]
+        series.totalcost = self.totalcost[start:stop]
+        series.highcost = self.highcost[start:stop]
+        series.lowcost = self.lowcost[start:stop]
+        return series
+
+    def sort(self) -> None:
+        """
+        Sorts the readings by timestamp and removes readings with a duplicate timestamp.
+
+        Of several readings with the same timestamp the one appended first is kept.
+        """
+        timestamps = self.timestamps
+        if all(a < b for a, b in zip(timestamps, timestamps[1:])):
+            return
+
+        order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+        unique_order = []
+        previous = None
+        for index in order:
+            if timestamps[index] != previous:
+                unique_order.append(index)
+                previous = timestamps[index]
+
+        self.timestamps = array("q", (timestamps[i] for i in unique_order))
+        self.totalcost = array("d", (self.totalcost[i] for i in unique_order))
+        self.highcost = array("d", (self.highcost[i] for i in unique_order))
+        self.lowcost = array("d", (self.lowcost[i] for i in unique_order))
+
+    def dates(self) -> list[datetime]:
+        """
+        Returns:
+            list[datetime]: The timestamps of the readings as datetimes.
+        """
+        return [from_epoch(timestamp) for timestamp in self.timestamps]
+
+    def interpolate(
+        self, timestamps: Iterable[int], method: str = "nearest", column: str = "totalcost"
+    ) -> array:
+        """
+        Returns the readings at arbitrary times. The series has to be sorted.
+
+        With "nearest" the reading closest in time is returned, the earlier one if two are
+        equally close. With "linear" the reading is interpolated between the readings
+        before and after the time; times outside the readings give NaN. Every time is
+        found by bisection, in a sorted batch starting from the position of the previous
+        time.
+
+        Args:
+            timestamps (Iterable[int]): The seconds since 1970-01-01 to look up.
+            method (str): "nearest" or "linear".
+            column (str): The reading to return, "totalcost", "highcost" or "lowcost".
+
+        Returns:
+            array: The reading at every time, NaN if the series is empty.
+
+        Raises:
+            ValueError: If the method or the column is unknown.
+        """
+        if method not in INTERPOLATION_METHODS:
+            raise ValueError(
+                f"Unknown interpolation method {method!r}, use one of {INTERPOLATION_METHODS}"
+            )
+        if column not in READING_COLUMNS:
+            raise ValueError(f"Unknown reading {column!r}, use one of {READING_COLUMNS}")
+        times = self.timestamps
+        values = getattr(self, column)
+        count = len(times)
+        nan = float("nan")
+        readings = array("d")
+        append = readings.append
+        position = 0
+        previous = None
+        for timestamp in timestamps:
+            if count == 0:
+                append(nan)
+                continue
+            low = position if previous is not None and timestamp >= previous else 0
+            position = bisect_left(times, timestamp, low)
+            previous = timestamp
+            if position < count and times[position] == timestamp:
+                append(values[position])
+            elif method == "nearest":
+                if position == 0:
+                    append(values[0])
+                elif position == count:
+                    append(values[-1])
+                elif timestamp - times[position - 1] <= times[position] - timestamp:
+                    append(values[position - 1])
+                else:
+                    append(values[position])
+            elif 0 < position < count:
+                before = times[position - 1]
+                share = (timestamp - before) / (times[position] - before)
+                append(values[position - 1] + share * (values[position] - values[position - 1]))
+            else:
+                append(nan)
+        return readings
+
+
+class MeterStore:
+    """
+    Compact store of ESL meter readings of all files.
+
+    Holds one MeterSeries per sensor ID instead of a MeterData object with a dict of
+    MeterEntry objects per file.
+    """
+
+    def __init__(self):
+        self.series: dict[str, MeterSeries] = {}
+        self.is_sorted = True
+
+    def add_reading(
+        self, sensor_id: str, timestamp: int, totalcost: float, highcost: float, lowcost: float
+    ) -> None:
+        """
+        Adds one reading. Call `sort` before querying the store.
+
+        Args:
+            sensor_id (str): The sensor ID of the reading.
+            timestamp (int): The seconds since 1970-01-01 of the reading, see `to_epoch`.
+            totalcost (float): The total reading.
+            highcost (float): The high tariff reading.
+            lowcost (float): The low tariff reading.
+        """
+        series = self.series.get(sensor_id)
+        if series is None:
+            series = self.series[sensor_id] = MeterSeries()
+        series.append(timestamp, totalcost, highcost, lowcost)
+        self.is_sorted = False
+
+    def add_readings(self, timestamp: int, readings: Iterable[tuple]) -> None:
+        """
+        Adds the readings of one ESL file. Call `sort` before querying the store.
+
+        Args:
+            timestamp (int): The seconds since 1970-01-01 of the readings, see `to_epoch`.
+            readings (Iterable[tuple]): One (sensor_id, totalcost, highcost, lowcost)
+                tuple per sensor, see `FileReader.read_esl_readings`.
+        """
+        for sensor_id, totalcost, highcost, lowcost in readings:
+            self.add_reading(sensor_id, timestamp, totalcost, highcost, lowcost)
+
+    def add_meter_data(self, meter_data: list[MeterData]) -> None:
+        """
+        Adds the readings of MeterData objects and sorts the store.
+
+        Args:
+            meter_data (list[MeterData]): The meter data to add.
+        """
+        for data in meter_data:
+            timestamp = to_epoch(data.timestamp)
+            for sensor_id, reading in data.data.items():
+                self.add_reading(
+                    sensor_id, timestamp, reading.totalcost, reading.highcost, reading.lowcost
+                )
+        self.sort()
+
+    @staticmethod
+    def from_meter_data(meter_data: list[MeterData]) -> "MeterStore":
+        """
+        Builds a store from MeterData objects.
+
+        Args:
+            meter_data (list[MeterData]): The meter data to store.
+
+        Returns:
+            MeterStore: The sorted store without duplicate timestamps.
+        """
+        store = MeterStore()
+        store.add_meter_data(meter_data)
+        return store
+
+    def sort(self) -> None:
+        """Sorts every series by timestamp, keeping the first of duplicate readings."""
+        if not self.is_sorted:
+            for series in self.series.values():
+                series.sort()
+            self.is_sorted = True
+
+    def sensor_ids(self) -> list[str]:
+        """
+        Returns:
+            list[str]: The sorted IDs of all sensors with readings.
+        """
+        return sorted(self.series)
+
+    def query(
+        self, sensor_id: str, start_date: datetime = None, end_date: datetime = None
+    ) -> MeterSeries:
+        """
+        Returns the readings of a sensor within a time range.
+
+        Args:
+            sensor_id (str): The sensor ID.
+            start_date (datetime): The first timestamp included, unbounded if omitted.
+            end_date (datetime): The last timestamp included, unbounded if omitted.
+
+        Returns:
+            MeterSeries: The readings in the range, empty if the sensor is unknown.
+        """
+        self.sort()
+        series = self.series.get(sensor_id)
+        if series is None:
+            return MeterSeries()
+        start = 0 if start_date is None else bisect_left(series.timestamps, to_epoch(start_date))
+        stop = (
+            len(series)
+            if end_date is None
+            else bisect_right(series.timestamps, to_epoch(end_date))
+        )
+        return series.slice(start, stop)
+
+    def reading_at(
+        self, sensor_id: str, when: datetime, method: str = "nearest", column: str = "totalcost"
+    ) -> float:
+        """
+        Returns the meter reading of a sensor at a point in time.
+
+        Args:
+            sensor_id (str): The sensor ID.
+            when (datetime): The point in time.
+            method (str): "nearest" or "linear", see `MeterSeries.interpolate`.
+            column (str): The reading to return, "totalcost", "highcost" or "lowcost".
+
+        Returns:
+            float: The reading, NaN if the sensor is unknown or, with "linear", the time
+            is outside its readings.
+        """
+        return self.readings_at(sensor_id, [when], method, column)[0]
+
+    def readings_at(
+        self,
+        sensor_id: str,
+        times: Iterable[datetime],
+        method: str = "nearest",
+        column: str = "totalcost",
+    ) -> array:
+        """
+        Returns the meter readings of a sensor at many points in time.
+
+        Args:
+            sensor_id (str): The sensor ID.
+            times (Iterable[datetime]): The points in time, fastest if sorted.
+            method (str): "nearest" or "linear", see `MeterSeries.interpolate`.
+            column (str): The reading to return, "totalcost", "highcost" or "lowcost".
+
+        Returns:
+            array: The reading at every point in time, see `reading_at`.
+        """
+        self.sort()
+        series = self.series.get(sensor_id)
+        if series is None:
+            series = MeterSeries()
+        return series.interpolate(map(to_epoch, times), method, column)
+
+    def consumption_between(
+        self,
+        sensor_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        method: str = "linear",
+        column: str = "totalcost",
+    ) -> float:
+        """
+        Returns the consumption of a sensor between two points in time.
+
+        Args:
+            sensor_id (str): The sensor ID.
+            start_date (datetime): The start of the period.
+            end_date (datetime): The end of the period.
+            method (str): "nearest" or "linear", see `MeterSeries.interpolate`.
+            column (str): The reading to use, "totalcost", "highcost" or "lowcost".
+
+        Returns:
+            float: The reading at the end minus the reading at the start, NaN if either
+            is unknown.
+        """
+        start_reading, end_reading = self.readings_at(
+            sensor_id, [start_date, end_date], method, column
+        )
+        return end_reading - start_reading
@@ -0,0 +1,293 @@
+"""ParseCache Class"""
+import hashlib
+import os
+import pickle
+import struct
+from array import array
+from datetime import datetime, timedelta
+
+# Import Local Classes
+from classes.meter_data import MeterData, MeterEntry
+from classes.consumtion_data import ConsumptionData
+
+EPOCH = datetime(1970, 1, 1)
+CACHE_VERSION = 3
+CONSUMPTION_HEADER = "<cHqqqI"
+
+
+def datetime_to_micros(value: datetime) -> int:
+    """Converts a naive datetime into microseconds since 1970-01-01."""
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def micros_to_datetime(value: int) -> datetime:
+    """Converts microseconds since 1970-01-01 back into a naive datetime."""
+    return EPOCH + timedelta(microseconds=value)
+
+
+def encode_consumption_data(consumption_data: ConsumptionData) -> bytes:
+    """
+    Encodes a ConsumptionData object into a compact binary form.
+
+    The entries are stored as the raw int64 timestamp and float64 volume columns.
+
+    Args:
+        consumption_data (ConsumptionData): The consumption data to encode.
+
+    Returns:
+        bytes: The encoded consumption data.
+    """
+    document_id = consumption_data.document_id.encode("utf-8")
+    resolution = consumption_data.resolution
+    header = struct.pack(
+        CONSUMPTION_HEADER,
+        b"C",
+        len(document_id),
+        datetime_to_micros(consumption_data.start_date),
+        datetime_to_micros(consumption_data.end_date),
+        -1 if resolution is None else resolution // timedelta(microseconds=1),
+        len(consumption_data.timestamps),
+    )
+    return (
+        header
+        + document_id
+        + consumption_data.timestamps.tobytes()
+        + consumption_data.volumes.tobytes()
+    )
+
+
+def encode_meter_data(meter_data: MeterData) -> bytes:
+    """
+    Encodes a MeterData object into a compact binary form.
+
+    Args:
+        meter_data (MeterData): The meter data to encode.
+
+    Returns:
+        bytes: The encoded meter data.
+    """
+    parts = [
+        struct.pack("<cqI", b"M", datetime_to_micros(meter_data.timestamp), len(meter_data.data))
+    ]
+    for obis, reading in meter_data.data.items():
+        obis_bytes = obis.encode("utf-8")
+        parts.append(struct.pack("<H", len(obis_bytes)))
+        parts.append(obis_bytes)
+        parts.append(struct.pack("<ddd", reading.totalcost, reading.highcost, reading.lowcost))
+    return b"".join(parts)
+
+
+def encode_meter_readings(meter_readings: tuple[int, list]) -> bytes:
+    """
+    Encodes the readings of an ESL file into a compact binary form.
+
+    Args:
+        meter_readings (tuple[int, list]): The timestamp in seconds since 1970-01-01 and
+            the (sensor_id, totalcost, highcost, lowcost) tuples, see
+            `FileReader.read_esl_readings`.
+
+    Returns:
+        bytes: The encoded readings.
+    """
+    timestamp, readings = meter_readings
+    parts = [struct.pack("<cqI", b"R", timestamp, len(readings))]
+    for sensor_id, totalcost, highcost, lowcost in readings:
+        sensor_bytes = sensor_id.encode("utf-8")
+        parts.append(struct.pack("<H", len(sensor_bytes)))
+        parts.append(sensor_bytes)
+        parts.append(struct.pack("<ddd", totalcost, highcost, lowcost))
+    return b"".join(parts)
+
+
+def encode(item: ConsumptionData | MeterData | tuple) -> bytes:
+    """Encodes a ConsumptionData or MeterData object or ESL readings into binary form."""
+    if isinstance(item, ConsumptionData):
+        return encode_consumption_data(item)
+    if isinstance(item, MeterData):
+        return encode_meter_data(item)
+    if isinstance(item, tuple):
+        return encode_meter_readings(item)
+    raise TypeError(f"Cannot encode {type(item).__name__}")
+
+
+def decode(blob: bytes) -> ConsumptionData | MeterData | tuple:
+    """
+    Decodes a blob created by `encode` back into a ConsumptionData or MeterData object
+    or the readings of an ESL file.
+
+    Args:
+        blob (bytes): The encoded object.
+
+    Returns:
+        ConsumptionData | MeterData | tuple: The decoded object.
+
+    Raises:
+        ValueError: If the blob has an unknown type.
+    """
+    if blob[:1] == b"C":
+        header_size = struct.calcsize(CONSUMPTION_HEADER)
+        _, id_length, start, end, resolution, count = struct.unpack_from(
+            CONSUMPTION_HEADER, blob
+        )
+        offset = header_size + id_length
+        document_id = blob[header_size:offset].decode("utf-8")
+        timestamps = array("q")
+        timestamps.frombytes(blob[offset:offset + count * 8])
+        volumes = array("d")
+        volumes.frombytes(blob[offset + count * 8:offset + count * 16])
+
+        consumption_data = ConsumptionData(
+            document_id,
+            micros_to_datetime(start),
+            micros_to_datetime(end),
+            None if resolution < 0 else timedelta(microseconds=resolution),
+        )
+        consumption_data.set_columns(timestamps, volumes)
+        return consumption_data
+
+    if blob[:1] == b"M":
+        _, timestamp, count = struct.unpack_from("<cqI", blob)
+        offset = struct.calcsize("<cqI")
+        meter_data = MeterData(micros_to_datetime(timestamp))
+        for _ in range(count):
+            (obis_length,) = struct.unpack_from("<H", blob, offset)
+            offset += 2
+            obis = blob[offset:offset + obis_length].decode("utf-8")
+            offset += obis_length
+            totalcost, highcost, lowcost = struct.unpack_from("<ddd", blob, offset)
+            offset += 24
+            meter_data.add_reading(obis, MeterEntry(totalcost, highcost, lowcost))
+        return meter_data
+
+    if blob[:1] == b"R":
+        _, timestamp, count = struct.unpack_from("<cqI", blob)
+        offset = struct.calcsize("<cqI")
+        readings = []
+        for _ in range(count):
+            (id_length,) = struct.unpack_from("<H", blob, offset)
+            offset += 2
+            sensor_id = blob[offset:offset + id_length].decode("utf-8")
+            offset += id_length
+            readings.append((sensor_id, *struct.unpack_from("<ddd", blob, offset)))
+            offset += 24
+        return timestamp, readings
+
+    raise ValueError(f"Unknown cache entry type {blob[:1]!r}")
+
+
+class ParseCache:
+    """
+    Persistent on-disk cache of parsed SDAT and ESL files.
+
+    Entries are keyed by file path and validated by file size, modification time and a
+    SHA-256 hash of the file content. If size and mtime are unchanged the file is trusted
+    without hashing; if only the mtime changed, the content hash decides.
+    """
+
+    def __init__(self, cache_path: str, verify_hash: bool = False, options=None):
+        """
+        Args:
+            cache_path (str): The file the cache is stored in. Created on the first `save`.
+            verify_hash (bool): Always compare the content hash, even if size and mtime match.
+            options: The parse options the cached objects depend on, e.g. the OBIS codes
+                     read from ESL files. A cache saved with other options starts empty.
+        """
+        self.cache_path = cache_path
+        self.verify_hash = verify_hash
+        self.options = options
+        self.entries: dict[str, tuple[int, int, bytes, bytes]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.changed = False
+        self.load()
+
+    @staticmethod
+    def file_hash(filepath: str) -> bytes:
+        """Returns the SHA-256 digest of the file content."""
+        with open(filepath, "rb") as file:
+            return hashlib.sha256(file.read()).digest()
+
+    def load(self) -> None:
+        """Loads the cache file. A missing, outdated or unreadable cache starts empty."""
+        self.entries = {}
+        try:
+            with open(self.cache_path, "rb") as file:
+                version, entries = pickle.load(file)
+            if version == (CACHE_VERSION, self.options):
+                self.entries = entries
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Ignoring unreadable parse cache {self.cache_path}: {e}")
+
+    def save(self) -> None:
+        """Writes the cache file atomically if it has changed since it was loaded."""
+        if not self.changed:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        temp_path = f"{self.cache_path}.tmp"
+        with open(temp_path, "wb") as file:
+            pickle.dump(
+                ((CACHE_VERSION, self.options), self.entries),
+                file,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(temp_path, self.cache_path)
+        self.changed = False
+
+    def invalidate(self) -> None:
+        """Removes all entries and deletes the cache file."""
+        self.entries = {}
+        self.changed = False
+        if os.path.exists(self.cache_path):
+            os.remove(self.cache_path)
+
+    def get(self, filepath: str) -> ConsumptionData | MeterData | tuple:
+        """
+        Returns the cached parse result of a file.
+
+        Args:
+            filepath (str): The path of the parsed file.
+
+        Returns:
+            ConsumptionData | MeterData | tuple: The cached object, or `None` if the file
+            is not cached or has changed.
+        """
+        entry = self.entries.get(filepath)
+        if entry is not None:
+            size, mtime_ns, digest, blob = entry
+            stat = os.stat(filepath)
+            if stat.st_size == size:
+                if stat.st_mtime_ns == mtime_ns and not self.verify_hash:
+                    self.hits += 1
+                    return decode(blob)
+                if self.file_hash(filepath) == digest:
+                    self.entries[filepath] = (size, stat.st_mtime_ns, digest, blob)
+                    self.changed = True
+                    self.hits += 1
+                    return decode(blob)
+        self.misses += 1
+        return None
+
+    def put(self, filepath: str, item: ConsumptionData | MeterData | tuple) -> None:
+        """
+        Stores the parse result of a file.
+
+        Args:
+            filepath (str): The path of the parsed file.
+            item (ConsumptionData | MeterData | tuple): The parsed object.
+        """
+        stat = os.stat(filepath)
+        self.entries[filepath] = (
+            stat.st_size, stat.st_mtime_ns, self.file_hash(filepath), encode(item)
+        )
+        self.changed = True
+
+    def prune(self, filepaths: list[str]) -> None:
+        """Removes the entries of all files that are not in `filepaths`."""
+        keep = set(filepaths)
+        for filepath in [path for path in self.entries if path not in keep]:
+            del self.entries[filepath]
+            self.changed = True
@@ -0,0 +1,178 @@
+"""QueryEngine Class"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Collection, Mapping
+
+# Import Local Classes
+from classes.consumption_index import ConsumptionIndex
+from classes.consumtion_data import ConsumptionData, from_epoch
+from classes.downsampler import DOWNSAMPLING_METHODS, downsample
+from classes.rollup_pyramid import ROLLUP_LEVELS, RollupPyramid
+from classes.sensor_cache import SensorCache, build_rollup
+
+GRANULARITIES = ("observation",) + tuple(name for name, _, _, _ in ROLLUP_LEVELS)
+AGGREGATES = ("sum", "min", "max", "mean", "count")
+
+
+class QueryEngine:
+    """
+    Answers (sensor, time range, granularity, aggregate) queries with an LRU result cache.
+
+    The results are read from the RollupPyramid of the sensor: "observation" returns the
+    volumes of the canonical series, every other granularity one value per bucket of that
+    level. Results are kept for the most recent `max_entries` distinct queries, `invalidate`
+    drops those of sensors with new data. Callers serialise access, e.g. with
+    `app.data_lock`.
+    """
+
+    def __init__(self, rollups: Mapping[str, RollupPyramid], max_entries: int = 256):
+        """
+        Args:
+            rollups (Mapping[str, RollupPyramid]): The rollups per sensor ID, e.g. the
+                                                   SensorCache of `apprun`.
+            max_entries (int): The number of results kept.
+        """
+        self.rollups = rollups
+        self.max_entries = max_entries
+        self.results: OrderedDict[tuple, tuple[tuple[datetime, ...], tuple]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def from_documents(
+        documents: list[ConsumptionData], merge_policy: str = "latest", max_entries: int = 256
+    ) -> "QueryEngine":
+        """
+        Builds an engine over documents, each sensor is merged and rolled up on first use.
+
+        Args:
+            documents (list[ConsumptionData]): The documents in delivery order.
+            merge_policy (str): The conflict policy of `SeriesMerger`.
+            max_entries (int): The number of results kept.
+
+        Returns:
+            QueryEngine: The engine.
+        """
+        consumption_index = ConsumptionIndex(documents)
+        rollups = SensorCache(
+            lambda: consumption_index.sensors,
+            lambda sensor_id: build_rollup(consumption_index.query(sensor_id), merge_policy),
+        )
+        return QueryEngine(rollups, max_entries)
+
+    def query(
+        self,
+        sensor_id: str,
+        start_date: datetime = None,
+        end_date: datetime = None,
+        granularity: str = "day",
+        aggregate: str = "sum",
+        max_points: int = None,
+        downsampling: str = "minmax",
+    ) -> tuple[tuple[datetime, ...], tuple]:
+        """
+        Returns the aggregated consumption of a sensor within a time range.
+
+        Args:
+            sensor_id (str): The sensor ID.
+            start_date (datetime): The first bucket start included, unbounded if omitted.
+            end_date (datetime): The last bucket start included, unbounded if omitted.
+            granularity (str): "observation", "hour", "day", "week", "month" or "year".
+            aggregate (str): "sum", "min", "max", "mean" or "count" of the volumes in a
+                             bucket. Observations are their own bucket.
+            max_points (int): Longer results are downsampled to this many points, e.g.
+                              twice the width of the graph in pixels. Not downsampled if
+                              omitted.
+            downsampling (str): "minmax" or "lttb", see `downsample`.
+
+        Returns:
+            tuple[tuple[datetime, ...], tuple]: The bucket starts and the aggregated values,
+            both empty if the sensor has no data.
+
+        Raises:
+            ValueError: If the granularity, the aggregate or the downsampling is unknown.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity {granularity!r}, use one of {GRANULARITIES}")
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate {aggregate!r}, use one of {AGGREGATES}")
+        if downsampling not in DOWNSAMPLING_METHODS:
+            raise ValueError(
+                f"Unknown downsampling method {downsampling!r}, use one of {DOWNSAMPLING_METHODS}"
+            )
+
+        key = (sensor_id, start_date, end_date, granularity, aggregate, max_points, downsampling)
+        result = self.results.get(key)
+        if result is not None:
+            self.results.move_to_end(key)
+            self.hits += 1
+            return result
+        self.misses += 1
+
+        rollup = self.rollups.get(sensor_id)
+        if rollup is None:
+            self.store(key, ((), ()))
+            return ((), ())
+        if granularity == "observation":
+            first, stop = rollup.find(start_date, end_date)
+            starts = rollup.timestamps[first:stop]
+            volumes = rollup.volumes[first:stop]
+            values = [1] * len(volumes) if aggregate == "count" else volumes
+        else:
+            level = rollup.level(granularity)
+            first, stop = level.find(start_date, end_date)
+            starts = level.starts[first:stop]
+            if aggregate == "sum":
+                values = level.sums[first:stop]
+            elif aggregate == "min":
+                values = level.mins[first:stop]
+            elif aggregate == "max":
+                values = level.maxs[first:stop]
+            elif aggregate == "count":
+                values = level.counts[first:stop]
+            else:
+                values = [
+                    total / count
+                    for total, count in zip(level.sums[first:stop], level.counts[first:stop])
+                ]
+
+        if max_points is not None and len(starts) > max_points:
+            positions = downsample(starts, values, max_points, downsampling)
+            starts = [starts[i] for i in positions]
+            values = [values[i] for i in positions]
+        result = (tuple(map(from_epoch, starts)), tuple(values))
+        self.store(key, result)
+        return result
+
+    def store(self, key: tuple, result: tuple[tuple[datetime, ...], tuple]) -> None:
+        """
+        Caches a result, the least recently used one is dropped if the cache is full.
+
+        Args:
+            key (tuple): The arguments of the query.
+            result (tuple[tuple[datetime, ...], tuple]): The result.
+        """
+        self.results[key] = result
+        if len(self.results) > self.max_entries:
+            self.results.popitem(last=False)
+
+    def invalidate(self, sensor_ids: Collection[str] = None) -> None:
+        """
+        Drops cached results, call it whenever data is added.
+
+        Args:
+            sensor_ids (Collection[str]): The sensors whose results are dropped, all if
+                                          omitted.
+        """
+        if sensor_ids is None:
+            self.results.clear()
+            return
+        for key in [key for key in self.results if key[0] in sensor_ids]:
+            del self.results[key]
+
+    def stats(self) -> str:
+        """
+        Returns:
+            str: The cached results and the hit and miss counts.
+        """
+        return f"{len(self.results)} cached results, {self.hits} hits, {self.misses} misses"
@@ -0,0 +1,236 @@
+"""AnchorDrift, MeterReadings & ReadingReconstructor Class"""
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from itertools import accumulate, repeat
+from operator import add, sub
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Import Local Classes
+from classes.consumtion_data import ConsumptionData, from_epoch
+from classes.meter_store import MeterSeries
+
+
+class AnchorDrift:
+    """An ESL reading used as anchor and its deviation from the summed SDAT volumes."""
+    __slots__ = ("sensor_id", "timestamp", "reading", "expected", "drift")
+
+    def __init__(
+        self, sensor_id: str, timestamp: datetime, reading: float, expected: float, drift: float
+    ):
+        """
+        Args:
+            sensor_id (str): The sensor ID.
+            timestamp (datetime): The timestamp of the ESL reading.
+            reading (float): The total reading of the ESL file.
+            expected (float): The previous anchor plus the volumes observed since then.
+            drift (float): The reading minus the expected reading.
+        """
+        self.sensor_id = sensor_id
+        self.timestamp = timestamp
+        self.reading = reading
+        self.expected = expected
+        self.drift = drift
+
+    def __str__(self):
+        return (
+            f"AnchorDrift({self.sensor_id}: {self.timestamp}, reading {self.reading}, "
+            f"expected {self.expected}, drift {self.drift})"
+        )
+
+
+class MeterReadings:
+    """Absolute meter readings of a sensor at the end of every observed interval."""
+    __slots__ = ("sensor_id", "timestamps", "readings", "anchors")
+
+    def __init__(self, sensor_id: str, timestamps: array, readings: array, anchors: list):
+        """
+        Args:
+            sensor_id (str): The sensor ID.
+            timestamps (array): The seconds since 1970-01-01 at the end of every interval.
+            readings (array): The meter reading at every timestamp.
+            anchors (list[AnchorDrift]): The ESL readings the series is anchored at.
+        """
+        self.sensor_id = sensor_id
+        self.timestamps = timestamps
+        self.readings = readings
+        self.anchors = anchors
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def dates(self) -> list[datetime]:
+        """
+        Returns:
+            list[datetime]: The timestamps of the readings as datetimes.
+        """
+        return [from_epoch(timestamp) for timestamp in self.timestamps]
+
+    def max_drift(self) -> float:
+        """
+        Returns:
+            float: The largest absolute drift of all anchors, 0.0 without anchors.
+        """
+        return max((abs(anchor.drift) for anchor in self.anchors), default=0.0)
+
+
+class ReadingReconstructor:
+    """
+    Reconstructs absolute meter readings from SDAT volumes and ESL readings.
+
+    The SDAT volume of an observation is consumed in the interval from its timestamp to
+    the next one, so the cumulative sum of the volumes is the meter reading at the end
+    of every interval, relative to the start of the series. The ESL readings within the
+    series are the anchors: every interval end is offset by the nearest anchor in time,
+    found by bisection, so the series passes through every ESL reading. The drift of an
+    anchor is its reading minus the previous anchor plus the volumes observed in between;
+    gaps in the SDAT data and unmetered consumption show up as drift. The first anchor
+    has no drift. If the resolution of the series is unknown, like for the observations
+    of a `RollupPyramid`, the smallest distance between two observations is taken.
+
+    The cumulative sum and the offsets are added with NumPy if it is installed and with
+    `itertools.accumulate` otherwise, both give the same readings.
+    """
+
+    @staticmethod
+    def reconstruct(series: ConsumptionData, meter_series: MeterSeries) -> MeterReadings:
+        """
+        Reconstructs the meter readings of a sensor.
+
+        Args:
+            series (ConsumptionData): The canonical series of the sensor, see `SeriesMerger`.
+            meter_series (MeterSeries): The ESL readings of the sensor, see `MeterStore`.
+
+        Returns:
+            MeterReadings: The readings at the end of every interval, `None` if the series
+            is empty or no ESL reading lies within it.
+        """
+        if series is None or not len(series):
+            return None
+        if series.resolution:
+            step = int(series.resolution.total_seconds())
+        else:
+            step = min(map(sub, series.timestamps[1:], series.timestamps), default=0)
+        ends = array("q", [timestamp + step for timestamp in series.timestamps])
+
+        # Only readings within the series anchor it, the volumes outside are unknown
+        first = bisect_left(meter_series.timestamps, series.timestamps[0])
+        stop = bisect_right(meter_series.timestamps, ends[-1])
+        anchor_times = meter_series.timestamps[first:stop]
+        anchor_readings = meter_series.totalcost[first:stop]
+        if not anchor_times:
+            return None
+
+        # Intervals ended by every anchor and the first interval closer to the next anchor
+        anchor_ends = [bisect_right(ends, timestamp) for timestamp in anchor_times]
+        bounds = [0]
+        bounds.extend(
+            bisect_right(ends, (previous + following) // 2)
+            for previous, following in zip(anchor_times, anchor_times[1:])
+        )
+        bounds.append(len(ends))
+
+        if np is not None:
+            totals, readings = ReadingReconstructor.add_offsets_numpy(
+                series.volumes, anchor_ends, anchor_readings, bounds
+            )
+        else:
+            totals, readings = ReadingReconstructor.add_offsets_python(
+                series.volumes, anchor_ends, anchor_readings, bounds
+            )
+
+        anchors = []
+        previous = None
+        for timestamp, reading, total in zip(anchor_times, anchor_readings, totals):
+            expected = reading if previous is None else previous[0] + total - previous[1]
+            anchors.append(
+                AnchorDrift(
+                    series.document_id, from_epoch(timestamp), reading, expected, reading - expected
+                )
+            )
+            previous = (reading, total)
+        return MeterReadings(series.document_id, ends, readings, anchors)
+
+    @staticmethod
+    def add_offsets_python(
+        volumes, anchor_ends: list[int], anchor_readings: array, bounds: list[int]
+    ) -> tuple[list[float], array]:
+        """
+        Sums up the volumes and offsets every segment by its anchor.
+
+        Args:
+            volumes: The volumes of the series.
+            anchor_ends (list[int]): The number of intervals ended by every anchor.
+            anchor_readings (array): The ESL reading of every anchor.
+            bounds (list[int]): The first interval of every anchor's segment, followed by
+                                the number of intervals.
+
+        Returns:
+            tuple[list[float], array]: The summed volumes at every anchor and the readings.
+        """
+        cumulative = array("d", accumulate(volumes))
+        totals = [cumulative[end - 1] if end else 0.0 for end in anchor_ends]
+        readings = array("d")
+        for i, (reading, total) in enumerate(zip(anchor_readings, totals)):
+            readings.extend(
+                map(add, cumulative[bounds[i]:bounds[i + 1]], repeat(reading - total))
+            )
+        return totals, readings
+
+    @staticmethod
+    def add_offsets_numpy(
+        volumes, anchor_ends: list[int], anchor_readings: array, bounds: list[int]
+    ) -> tuple[list[float], array]:
+        """
+        Sums up the volumes and offsets every segment by its anchor with NumPy.
+
+        `numpy.cumsum` adds the volumes one after another like `itertools.accumulate`, so
+        the readings equal those of `add_offsets_python`.
+
+        Args:
+            volumes: The volumes of the series.
+            anchor_ends (list[int]): The number of intervals ended by every anchor.
+            anchor_readings (array): The ESL reading of every anchor.
+            bounds (list[int]): The first interval of every anchor's segment, followed by
+                                the number of intervals.
+
+        Returns:
+            tuple[list[float], array]: The summed volumes at every anchor and the readings.
+        """
+        cumulative = np.cumsum(np.frombuffer(volumes, dtype=np.float64))
+        anchor_ends = np.asarray(anchor_ends, dtype=np.int64)
+        totals = np.where(anchor_ends > 0, cumulative[np.maximum(anchor_ends - 1, 0)], 0.0)
+        offsets = np.frombuffer(anchor_readings, dtype=np.float64) - totals
+        readings = array("d")
+        readings.frombytes((cumulative + np.repeat(offsets, np.diff(bounds))).tobytes())
+        return totals.tolist(), readings
+
+    @staticmethod
+    def reconstruct_all(
+        series_per_id: dict[str, ConsumptionData], meter_series_per_id: dict[str, MeterSeries]
+    ) -> dict[str, MeterReadings]:
+        """
+        Reconstructs the meter readings of every sensor with SDAT and ESL data.
+
+        Args:
+            series_per_id (dict[str, ConsumptionData]): The canonical series per sensor ID.
+            meter_series_per_id (dict[str, MeterSeries]): The ESL readings per sensor ID,
+                                                          e.g. `MeterStore.series`.
+
+        Returns:
+            dict[str, MeterReadings]: The readings per sensor ID, sensors without anchors
+            are left out.
+        """
+        readings_per_id = {}
+        for sensor_id, series in series_per_id.items():
+            meter_series = meter_series_per_id.get(sensor_id)
+            if meter_series is None:
+                continue
+            readings = ReadingReconstructor.reconstruct(series, meter_series)
+            if readings is not None:
+                readings_per_id[sensor_id] = readings
+        return readings_per_id
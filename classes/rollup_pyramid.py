@@ -0,0 +1,472 @@
+"""RollupLevel & RollupPyramid Class"""
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from functools import reduce
+from itertools import islice
+from operator import add, lt
+from typing import Callable, Iterable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Import Local Classes
+from classes.consumtion_data import from_epoch, to_epoch
+
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+SECONDS_PER_WEEK = 7 * SECONDS_PER_DAY
+
+
+def hour_start(timestamp: int) -> int:
+    """Returns the start of the hour of a timestamp in seconds since 1970-01-01."""
+    return timestamp - timestamp % SECONDS_PER_HOUR
+
+
+def next_hour(start: int) -> int:
+    """Returns the start of the hour after the hour starting at `start`."""
+    return start + SECONDS_PER_HOUR
+
+
+def day_start(timestamp: int) -> int:
+    """Returns the start of the day of a timestamp in seconds since 1970-01-01."""
+    return timestamp - timestamp % SECONDS_PER_DAY
+
+
+def next_day(start: int) -> int:
+    """Returns the start of the day after the day starting at `start`."""
+    return start + SECONDS_PER_DAY
+
+
+def week_start(timestamp: int) -> int:
+    """Returns the start of the ISO week (Monday) of a timestamp in seconds since 1970-01-01."""
+    # 1970-01-01 was a Thursday
+    day = timestamp // SECONDS_PER_DAY
+    return (day - (day + 3) % 7) * SECONDS_PER_DAY
+
+
+def next_week(start: int) -> int:
+    """Returns the start of the week after the week starting at `start`."""
+    return start + SECONDS_PER_WEEK
+
+
+def month_start(timestamp: int) -> int:
+    """Returns the start of the month of a timestamp in seconds since 1970-01-01."""
+    date = from_epoch(timestamp)
+    return to_epoch(datetime(date.year, date.month, 1))
+
+
+def next_month(start: int) -> int:
+    """Returns the start of the month after the month starting at `start`."""
+    date = from_epoch(start)
+    if date.month == 12:
+        return to_epoch(datetime(date.year + 1, 1, 1))
+    return to_epoch(datetime(date.year, date.month + 1, 1))
+
+
+def year_start(timestamp: int) -> int:
+    """Returns the start of the year of a timestamp in seconds since 1970-01-01."""
+    return to_epoch(datetime(from_epoch(timestamp).year, 1, 1))
+
+
+def next_year(start: int) -> int:
+    """Returns the start of the year after the year starting at `start`."""
+    return to_epoch(datetime(from_epoch(start).year + 1, 1, 1))
+
+
+def hour_starts(epochs):
+    """Returns the start of the hour of every timestamp of a NumPy array."""
+    return epochs - epochs % SECONDS_PER_HOUR
+
+
+def day_starts(epochs):
+    """Returns the start of the day of every timestamp of a NumPy array."""
+    return epochs - epochs % SECONDS_PER_DAY
+
+
+def week_starts(epochs):
+    """Returns the start of the ISO week of every timestamp of a NumPy array."""
+    days = epochs // SECONDS_PER_DAY
+    return (days - (days + 3) % 7) * SECONDS_PER_DAY
+
+
+def month_starts(epochs):
+    """Returns the start of the month of every timestamp of a NumPy array."""
+    months = epochs.astype("datetime64[s]").astype("datetime64[M]")
+    return months.astype("datetime64[s]").astype(np.int64)
+
+
+def year_starts(epochs):
+    """Returns the start of the year of every timestamp of a NumPy array."""
+    years = epochs.astype("datetime64[s]").astype("datetime64[Y]")
+    return years.astype("datetime64[s]").astype(np.int64)
+
+
+# Level name, bucket starts of a NumPy array of timestamps, bucket start of a timestamp
+# and start of the following bucket. Levels go from the finest to the coarsest.
+ROLLUP_LEVELS = (
+    ("hour", hour_starts, hour_start, next_hour),
+    ("day", day_starts, day_start, next_day),
+    ("week", week_starts, week_start, next_week),
+    ("month", month_starts, month_start, next_month),
+    ("year", year_starts, year_start, next_year),
+)
+
+
+def find_range(starts, start: int = None, end: int = None) -> tuple[int, int]:
+    """
+    Finds the positions of the sorted timestamps within a time range.
+
+    Args:
+        starts: The sorted timestamps in seconds since 1970-01-01.
+        start (int): The start of the range, unbounded if omitted.
+        end (int): The end of the range (inclusive), unbounded if omitted.
+
+    Returns:
+        tuple[int, int]: The first position in the range and the position after the last.
+    """
+    first = 0 if start is None else bisect_left(starts, start)
+    stop = len(starts) if end is None else bisect_right(starts, end)
+    return first, max(first, stop)
+
+
+class RollupLevel:
+    """
+    The buckets of one pyramid level as sorted columns.
+
+    `starts` holds the start of every bucket that contains observations, in seconds
+    since 1970-01-01, and `sums`, `mins`, `maxs` and `counts` the statistics of the
+    observations in it.
+    """
+    __slots__ = ("starts", "sums", "mins", "maxs", "counts")
+
+    def __init__(self):
+        self.starts = array("q")
+        self.sums = array("d")
+        self.mins = array("d")
+        self.maxs = array("d")
+        self.counts = array("q")
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def append(self, start: int, total: float, minimum: float, maximum: float, count: int):
+        """
+        Adds a bucket after the last one.
+
+        Args:
+            start (int): The start of the bucket in seconds since 1970-01-01.
+            total (float): The sum of the volumes in the bucket.
+            minimum (float): The smallest volume in the bucket.
+            maximum (float): The largest volume in the bucket.
+            count (int): The number of observations in the bucket.
+        """
+        self.starts.append(start)
+        self.sums.append(total)
+        self.mins.append(minimum)
+        self.maxs.append(maximum)
+        self.counts.append(count)
+
+    def replace(self, first: int, stop: int, level: "RollupLevel") -> None:
+        """
+        Replaces the buckets from `first` up to `stop` with the buckets of another level.
+
+        Args:
+            first (int): The position of the first bucket to replace.
+            stop (int): The position after the last bucket to replace.
+            level (RollupLevel): The new buckets.
+        """
+        self.starts[first:stop] = level.starts
+        self.sums[first:stop] = level.sums
+        self.mins[first:stop] = level.mins
+        self.maxs[first:stop] = level.maxs
+        self.counts[first:stop] = level.counts
+
+    def find(self, start: datetime = None, end: datetime = None) -> tuple[int, int]:
+        """
+        Finds the buckets starting within a time range.
+
+        Args:
+            start (datetime): The start of the range, unbounded if omitted.
+            end (datetime): The end of the range (inclusive), unbounded if omitted.
+
+        Returns:
+            tuple[int, int]: The first bucket in the range and the position after the last.
+        """
+        return find_range(
+            self.starts,
+            None if start is None else to_epoch(start),
+            None if end is None else to_epoch(end),
+        )
+
+    def dates(self, first: int = 0, stop: int = None) -> list[datetime]:
+        """
+        Args:
+            first (int): The position of the first bucket.
+            stop (int): The position after the last bucket, all remaining if omitted.
+
+        Returns:
+            list[datetime]: The start dates of the buckets.
+        """
+        return [from_epoch(start) for start in islice(self.starts, first, stop)]
+
+    def nbytes(self) -> int:
+        """
+        Returns:
+            int: The size of the columns in bytes.
+        """
+        return sum(
+            column.itemsize * len(column)
+            for column in (self.starts, self.sums, self.mins, self.maxs, self.counts)
+        )
+
+
+class RollupPyramid:
+    """
+    Multi-resolution rollups of the canonical series of one sensor.
+
+    Keeps the observations (see `SeriesMerger`) and a `RollupLevel` per hour, day, ISO
+    week, month and year. Every level is rolled up from the observations, the volumes of
+    a bucket are added one after another in time order, so the sums of every level are
+    exactly the totals the aggregation dicts had. Buckets are found by bisecting the
+    sorted bucket starts, nothing is sorted on a query. The levels are built with NumPy
+    if it is installed, see `rollup_numpy`, which gives bit-identical buckets.
+    """
+
+    def __init__(self):
+        self.timestamps = array("q")
+        self.volumes = array("d")
+        self.levels = {name: RollupLevel() for name, _, _, _ in ROLLUP_LEVELS}
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @staticmethod
+    def from_series(timestamps: Iterable[int], volumes: Iterable[float]) -> "RollupPyramid":
+        """
+        Builds the pyramid of a canonical series.
+
+        Args:
+            timestamps (Iterable[int]): The seconds since 1970-01-01 of the observations.
+            volumes (Iterable[float]): The volumes of the observations.
+
+        Returns:
+            RollupPyramid: The pyramid with all levels built.
+        """
+        pyramid = RollupPyramid()
+        pyramid.update(timestamps, volumes)
+        return pyramid
+
+    def level(self, name: str) -> RollupLevel:
+        """
+        Args:
+            name (str): One of "hour", "day", "week", "month" and "year".
+
+        Returns:
+            RollupLevel: The buckets of the level.
+
+        Raises:
+            KeyError: If the level does not exist.
+        """
+        return self.levels[name]
+
+    def find(self, start: datetime = None, end: datetime = None) -> tuple[int, int]:
+        """
+        Finds the observations within a time range.
+
+        Args:
+            start (datetime): The start of the range, unbounded if omitted.
+            end (datetime): The end of the range (inclusive), unbounded if omitted.
+
+        Returns:
+            tuple[int, int]: The first observation in the range and the position after
+            the last.
+        """
+        return find_range(
+            self.timestamps,
+            None if start is None else to_epoch(start),
+            None if end is None else to_epoch(end),
+        )
+
+    def dates(self, first: int = 0, stop: int = None) -> list[datetime]:
+        """
+        Args:
+            first (int): The position of the first observation.
+            stop (int): The position after the last observation, all remaining if omitted.
+
+        Returns:
+            list[datetime]: The timestamps of the observations.
+        """
+        return [from_epoch(timestamp) for timestamp in islice(self.timestamps, first, stop)]
+
+    def update(
+        self, timestamps: Iterable[int], volumes: Iterable[float], replace: bool = True
+    ) -> int:
+        """
+        Merges observations into the series and rebuilds the buckets they fall into.
+
+        Only the observations between the first and the last new timestamp are touched,
+        so adding a document costs time proportional to its size plus moving the columns.
+
+        Args:
+            timestamps (Iterable[int]): The seconds since 1970-01-01 of the new observations.
+            volumes (Iterable[float]): The volumes of the new observations.
+            replace (bool): Replace the volumes of known timestamps ("latest" merge policy),
+                            otherwise keep them ("first" and "flag" merge policy).
+
+        Returns:
+            int: The number of new observations with a timestamp that was already known.
+
+        Raises:
+            ValueError: If the columns differ in length.
+        """
+        new_timestamps = array("q", timestamps)
+        new_volumes = array("d", volumes)
+        if len(new_timestamps) != len(new_volumes):
+            raise ValueError("timestamps and volumes must have the same length")
+        if not new_timestamps:
+            return 0
+        increasing = all(map(lt, new_timestamps, new_timestamps[1:]))
+        if increasing:
+            low, high = new_timestamps[0], new_timestamps[-1]
+        else:
+            low, high = min(new_timestamps), max(new_timestamps)
+
+        first, stop = find_range(self.timestamps, low, high)
+        if increasing and first == stop:
+            # No known observation in between, the new ones are inserted as they are
+            self.timestamps[first:first] = new_timestamps
+            self.volumes[first:first] = new_volumes
+            overlapping = 0
+        else:
+            merged = dict(zip(self.timestamps[first:stop], self.volumes[first:stop]))
+            overlapping = 0
+            for timestamp, volume in zip(new_timestamps, new_volumes):
+                if timestamp in merged:
+                    overlapping += 1
+                    if not replace:
+                        continue
+                merged[timestamp] = volume
+            merged_timestamps = sorted(merged)
+            self.timestamps[first:stop] = array("q", merged_timestamps)
+            self.volumes[first:stop] = array("d", map(merged.__getitem__, merged_timestamps))
+        self.rebuild(low, high)
+        return overlapping
+
+    def rebuild(self, low: int, high: int) -> None:
+        """
+        Rebuilds the buckets of every level that contain a time range.
+
+        Args:
+            low (int): The start of the range in seconds since 1970-01-01.
+            high (int): The end of the range (inclusive).
+        """
+        for name, floor_numpy, floor, following in ROLLUP_LEVELS:
+            first_bucket = floor(low)
+            end_bucket = following(floor(high))
+            first = bisect_left(self.timestamps, first_bucket)
+            stop = bisect_left(self.timestamps, end_bucket, first)
+            if np is not None:
+                buckets = RollupPyramid.rollup_numpy(
+                    self.timestamps, self.volumes, floor_numpy, first, stop
+                )
+            else:
+                buckets = RollupPyramid.rollup(
+                    self.timestamps, self.volumes, floor, following, first, stop
+                )
+
+            target = self.levels[name].starts
+            self.levels[name].replace(
+                bisect_left(target, first_bucket), bisect_left(target, end_bucket), buckets
+            )
+
+    @staticmethod
+    def rollup(
+        timestamps: array,
+        volumes: array,
+        floor: Callable[[int], int],
+        following: Callable[[int], int],
+        first: int,
+        stop: int,
+    ) -> RollupLevel:
+        """
+        Rolls sorted observations up into buckets.
+
+        The sums are added one after another from 0.0, like `numpy.bincount` does in
+        `rollup_numpy`. The builtin `sum` is not used, it compensates rounding errors
+        since Python 3.12, so the two paths would no longer give the same sums.
+
+        Args:
+            timestamps (array): The sorted seconds since 1970-01-01 of the observations.
+            volumes (array): The volumes of the observations.
+            floor (Callable[[int], int]): Returns the bucket start of a timestamp.
+            following (Callable[[int], int]): Returns the start of the following bucket.
+            first (int): The position of the first observation to roll up.
+            stop (int): The position after the last observation to roll up.
+
+        Returns:
+            RollupLevel: The buckets of the observations.
+        """
+        buckets = RollupLevel()
+        append = buckets.append
+        i = first
+        while i < stop:
+            bucket = floor(timestamps[i])
+            j = bisect_left(timestamps, following(bucket), i + 1, stop)
+            values = volumes[i:j]
+            append(bucket, reduce(add, values, 0.0), min(values), max(values), j - i)
+            i = j
+        return buckets
+
+    @staticmethod
+    def rollup_numpy(
+        timestamps: array, volumes: array, floor_numpy: Callable, first: int, stop: int
+    ) -> RollupLevel:
+        """
+        Rolls sorted observations up into buckets with NumPy.
+
+        Gives the same buckets as `rollup`: `numpy.bincount` adds the volumes of a bucket
+        one after another from 0.0 in the same order, minimum and maximum come from
+        `reduceat`.
+
+        Args:
+            timestamps (array): The sorted seconds since 1970-01-01 of the observations.
+            volumes (array): The volumes of the observations.
+            floor_numpy (Callable): Returns the bucket starts of a NumPy array of timestamps.
+            first (int): The position of the first observation to roll up.
+            stop (int): The position after the last observation to roll up.
+
+        Returns:
+            RollupLevel: The buckets of the observations.
+        """
+        buckets = RollupLevel()
+        if first >= stop:
+            return buckets
+        epochs = np.frombuffer(timestamps, dtype=np.int64)[first:stop]
+        values = np.frombuffer(volumes, dtype=np.float64)[first:stop]
+        keys = floor_numpy(epochs)
+        changes = np.diff(keys) != 0
+        positions = np.concatenate(([0], np.flatnonzero(changes) + 1))
+        inverse = np.concatenate(([0], np.cumsum(changes)))
+
+        buckets.starts.frombytes(keys[positions].astype(np.int64).tobytes())
+        buckets.sums.frombytes(np.bincount(inverse, weights=values).tobytes())
+        buckets.mins.frombytes(np.minimum.reduceat(values, positions).tobytes())
+        buckets.maxs.frombytes(np.maximum.reduceat(values, positions).tobytes())
+        buckets.counts.frombytes(
+            np.diff(np.append(positions, len(keys))).astype(np.int64).tobytes()
+        )
+        return buckets
+
+    def nbytes(self) -> int:
+        """
+        Returns:
+            int: The size of the observations and all levels in bytes.
+        """
+        return (
+            self.timestamps.itemsize * len(self.timestamps)
+            + self.volumes.itemsize * len(self.volumes)
+            + sum(level.nbytes() for level in self.levels.values())
+        )
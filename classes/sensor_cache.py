@@ -0,0 +1,286 @@
+"""SensorCache Class & Rollup Functions"""
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Collection
+
+# Import Local Classes
+from classes.consumption_index import ConsumptionIndex
+from classes.consumtion_data import ConsumptionData
+from classes.rollup_pyramid import RollupPyramid
+from classes.series_merger import MergeReport, SeriesMerger
+from classes.series_store import SeriesStore
+
+# Shards per worker process, so a few large sensors do not leave the other workers idle
+SHARDS_PER_WORKER = 4
+
+
+class SensorCache:
+    """
+    Per-sensor data that is built the first time a sensor is requested.
+
+    Works like a read-only dictionary of sensor IDs, so the Dash app can use it in place
+    of a dictionary holding the data of every sensor. Callers serialise access, e.g. with
+    `app.data_lock`.
+    """
+
+    def __init__(
+        self, sensor_ids: Callable[[], Collection[str]], build: Callable[[str], object]
+    ):
+        """
+        Args:
+            sensor_ids (Callable[[], Collection[str]]): Returns the IDs of all known
+                                                        sensors, called on every lookup
+                                                        of a sensor that is not loaded.
+            build (Callable[[str], object]): Builds the data of a sensor, returns `None`
+                                             if the sensor has no data.
+        """
+        self.sensor_ids = sensor_ids
+        self.build = build
+        self.loaded: dict[str, object] = {}
+
+    def __contains__(self, sensor_id: str) -> bool:
+        return sensor_id in self.loaded or sensor_id in self.sensor_ids()
+
+    def __getitem__(self, sensor_id: str):
+        value = self.loaded.get(sensor_id)
+        if value is None:
+            if sensor_id not in self.sensor_ids():
+                raise KeyError(sensor_id)
+            value = self.build(sensor_id)
+            if value is None:
+                raise KeyError(sensor_id)
+            self.loaded[sensor_id] = value
+        return value
+
+    def __setitem__(self, sensor_id: str, value) -> None:
+        self.loaded[sensor_id] = value
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.sensor_ids())
+
+    def keys(self) -> list[str]:
+        """
+        Returns:
+            list[str]: The sorted IDs of all known sensors, loaded or not.
+        """
+        return sorted(self.sensor_ids())
+
+    def get(self, sensor_id: str, default=None):
+        """
+        Args:
+            sensor_id (str): The sensor ID.
+            default: Returned if the sensor is unknown.
+
+        Returns:
+            The data of the sensor, built if it is not loaded yet.
+        """
+        try:
+            return self[sensor_id]
+        except KeyError:
+            return default
+
+    def is_loaded(self, sensor_id: str) -> bool:
+        """
+        Args:
+            sensor_id (str): The sensor ID.
+
+        Returns:
+            bool: Whether the data of the sensor has been built.
+        """
+        return sensor_id in self.loaded
+
+    def invalidate(self, sensor_ids: Collection[str] = None) -> None:
+        """
+        Drops loaded data, it is built again on the next request.
+
+        Args:
+            sensor_ids (Collection[str]): The sensors to drop, all if omitted.
+        """
+        if sensor_ids is None:
+            self.loaded.clear()
+        else:
+            for sensor_id in sensor_ids:
+                self.loaded.pop(sensor_id, None)
+
+
+def build_rollup(
+    documents: list[ConsumptionData], merge_policy: str = "latest", report: MergeReport = None
+) -> RollupPyramid:
+    """
+    Merges the documents of a sensor into its canonical series and rolls it up.
+
+    Args:
+        documents (list[ConsumptionData]): The documents of one sensor in delivery order.
+        merge_policy (str): The conflict policy of `SeriesMerger`.
+        report (MergeReport): The report the overlaps and gaps are added to, optional.
+
+    Returns:
+        RollupPyramid: The rollups of the sensor, `None` if it has no observations.
+    """
+    series = SeriesMerger.merge(documents, merge_policy, report)
+    if series is None:
+        return None
+    return RollupPyramid.from_series(series.timestamps, series.volumes)
+
+
+def build_rollup_shard(series_list: list[ConsumptionData]) -> dict[str, RollupPyramid]:
+    """
+    Rolls up the canonical series of several sensors, run in a worker process.
+
+    Args:
+        series_list (list[ConsumptionData]): The canonical series, see `SeriesMerger`.
+
+    Returns:
+        dict[str, RollupPyramid]: The rollups per sensor ID.
+    """
+    return {
+        series.document_id: RollupPyramid.from_series(series.timestamps, series.volumes)
+        for series in series_list
+    }
+
+
+def build_rollups(
+    consumption_index: ConsumptionIndex,
+    sensor_ids: list[str] = None,
+    merge_policy: str = "latest",
+    workers: int = 1,
+    report: MergeReport = None,
+) -> dict[str, RollupPyramid]:
+    """
+    Builds the rollups of many sensors, sharded across worker processes.
+
+    The documents are merged in this process, the canonical series are rolled up by the
+    workers. Sensors are assigned largest first to the shard with the fewest observations.
+
+    Args:
+        consumption_index (ConsumptionIndex): The documents of all sensors.
+        sensor_ids (list[str]): The sensors to build, all sensors of the index if omitted.
+        merge_policy (str): The conflict policy of `SeriesMerger`.
+        workers (int): The number of worker processes. `None` uses all available cores.
+                       Defaults to 1 (sequential).
+        report (MergeReport): The report the overlaps and gaps are added to, optional.
+
+    Returns:
+        dict[str, RollupPyramid]: The rollups per sensor ID, sensors without observations
+        are left out.
+    """
+    if sensor_ids is None:
+        sensor_ids = consumption_index.sensor_ids()
+    series_list = []
+    for sensor_id in sensor_ids:
+        series = SeriesMerger.merge(consumption_index.query(sensor_id), merge_policy, report)
+        if series is not None:
+            series_list.append(series)
+
+    if workers == 1 or len(series_list) < 2:
+        return build_rollup_shard(series_list)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    rollups = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for shard_rollups in executor.map(
+            build_rollup_shard, shard_by_size(series_list, len, workers)
+        ):
+            rollups.update(shard_rollups)
+    return rollups
+
+
+def shard_by_size(items: list, size: Callable[[object], int], workers: int) -> list[list]:
+    """
+    Splits items into shards of similar total size for a process pool.
+
+    Items are assigned largest first to the shard with the smallest total size.
+
+    Args:
+        items (list): The items to split.
+        size (Callable[[object], int]): Returns the size of an item.
+        workers (int): The number of worker processes, each gets several shards.
+
+    Returns:
+        list[list]: The shards, none of them empty.
+    """
+    shard_count = min(len(items), workers * SHARDS_PER_WORKER)
+    shards = [[] for _ in range(shard_count)]
+    # (total size, shard index) of every shard, the smallest shard on top
+    sizes = [(0, index) for index in range(shard_count)]
+    for item in sorted(items, key=size, reverse=True):
+        total, index = heapq.heappop(sizes)
+        shards[index].append(item)
+        heapq.heappush(sizes, (total + size(item), index))
+    return shards
+
+
+def build_stored_rollup(series_store: SeriesStore, sensor_id: str) -> RollupPyramid:
+    """
+    Rolls up the stored canonical series of a sensor.
+
+    Args:
+        series_store (SeriesStore): The store holding the series.
+        sensor_id (str): The sensor ID.
+
+    Returns:
+        RollupPyramid: The rollups of the sensor, `None` if it is not in the store.
+    """
+    series = series_store.series(sensor_id)
+    if series is None:
+        return None
+    return RollupPyramid.from_series(series.timestamps, series.volumes)
+
+
+def build_stored_rollup_shard(root: str, sensor_ids: list[str]) -> dict[str, RollupPyramid]:
+    """
+    Rolls up stored series of several sensors, run in a worker process.
+
+    The worker maps the column files itself, so no series is sent to it.
+
+    Args:
+        root (str): The directory of the SeriesStore.
+        sensor_ids (list[str]): The sensors to roll up.
+
+    Returns:
+        dict[str, RollupPyramid]: The rollups per sensor ID.
+    """
+    series_store = SeriesStore(root)
+    return {sensor_id: build_stored_rollup(series_store, sensor_id) for sensor_id in sensor_ids}
+
+
+def build_stored_rollups(
+    series_store: SeriesStore, sensor_ids: list[str] = None, workers: int = 1
+) -> dict[str, RollupPyramid]:
+    """
+    Builds the rollups of many stored sensors, sharded across worker processes.
+
+    Args:
+        series_store (SeriesStore): The store holding the series.
+        sensor_ids (list[str]): The sensors to build, all sensors of the store if omitted.
+        workers (int): The number of worker processes. `None` uses all available cores.
+                       Defaults to 1 (sequential).
+
+    Returns:
+        dict[str, RollupPyramid]: The rollups per sensor ID.
+    """
+    if sensor_ids is None:
+        sensor_ids = series_store.sensor_ids()
+    sensor_ids = [sensor_id for sensor_id in sensor_ids if sensor_id in series_store]
+    if workers == 1 or len(sensor_ids) < 2:
+        return {
+            sensor_id: build_stored_rollup(series_store, sensor_id) for sensor_id in sensor_ids
+        }
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    shards = shard_by_size(
+        sensor_ids, lambda sensor_id: series_store.sensors[sensor_id]["count"], workers
+    )
+    rollups = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for shard_rollups in executor.map(
+            build_stored_rollup_shard, [series_store.root] * len(shards), shards
+        ):
+            rollups.update(shard_rollups)
+    return rollups
@@ -0,0 +1,327 @@
+"""Overlap, Gap, MergeReport & SeriesMerger Class"""
+import heapq
+from array import array
+from datetime import datetime
+from itertools import repeat
+from operator import lt
+
+# Import Local Classes
+from classes.consumtion_data import ConsumptionData, from_epoch
+
+MERGE_POLICIES = ("latest", "first", "flag")
+
+
+class Overlap:
+    """Documents of one sensor whose observations overlap in time."""
+    __slots__ = ("sensor_id", "start", "end", "documents", "duplicates", "conflicts")
+
+    def __init__(
+        self,
+        sensor_id: str,
+        start: datetime,
+        end: datetime,
+        documents: int,
+        duplicates: int,
+        conflicts: int,
+    ):
+        """
+        Args:
+            sensor_id (str): The sensor ID.
+            start (datetime): The first timestamp of the overlapping documents.
+            end (datetime): The last timestamp of the overlapping documents.
+            documents (int): The number of overlapping documents.
+            duplicates (int): The repeated observations with the same volume.
+            conflicts (int): The repeated observations with a different volume.
+        """
+        self.sensor_id = sensor_id
+        self.start = start
+        self.end = end
+        self.documents = documents
+        self.duplicates = duplicates
+        self.conflicts = conflicts
+
+    def __str__(self):
+        return (
+            f"Overlap({self.sensor_id}: {self.start} - {self.end}, {self.documents} documents, "
+            f"{self.duplicates} duplicates, {self.conflicts} conflicts)"
+        )
+
+
+class Gap:
+    """A time range without observations between two observations of a sensor."""
+    __slots__ = ("sensor_id", "start", "end")
+
+    def __init__(self, sensor_id: str, start: datetime, end: datetime):
+        """
+        Args:
+            sensor_id (str): The sensor ID.
+            start (datetime): The first missing timestamp.
+            end (datetime): The next timestamp with an observation.
+        """
+        self.sensor_id = sensor_id
+        self.start = start
+        self.end = end
+
+    def __str__(self):
+        return f"Gap({self.sensor_id}: {self.start} - {self.end})"
+
+
+class MergeReport:
+    """The overlaps and gaps found while merging documents into canonical series."""
+
+    def __init__(self):
+        self.overlaps: list[Overlap] = []
+        self.gaps: list[Gap] = []
+        # (sensor_id, timestamp, volumes in delivery order), only filled by the "flag" policy
+        self.conflicts: list[tuple[str, datetime, list[float]]] = []
+
+    def duplicates(self) -> int:
+        """
+        Returns:
+            int: The number of repeated observations with the same volume.
+        """
+        return sum(overlap.duplicates for overlap in self.overlaps)
+
+    def conflict_count(self) -> int:
+        """
+        Returns:
+            int: The number of repeated observations with a different volume.
+        """
+        return sum(overlap.conflicts for overlap in self.overlaps)
+
+    def summary(self) -> str:
+        """
+        Returns:
+            str: A one-line summary of the report.
+        """
+        return (
+            f"{len(self.overlaps)} overlaps ({self.duplicates()} duplicate and "
+            f"{self.conflict_count()} conflicting observations), {len(self.gaps)} gaps"
+        )
+
+
+class SeriesMerger:
+    """
+    Merges the SDAT documents of a sensor into one canonical series.
+
+    Every timestamp occurs once in the canonical series. Where documents overlap, the
+    conflict policy decides which volume is kept:
+
+    - "latest": the volume of the document delivered last wins.
+    - "first": the volume of the document delivered first wins.
+    - "flag": like "first", but every conflicting timestamp is listed in the report.
+
+    The delivery order is the order of the documents passed in. Documents that do not
+    overlap any other are copied column-wise; only clusters of overlapping documents are
+    merged value by value with a heap, so merging n observations takes O(n log k) for
+    clusters of k documents.
+    """
+
+    @staticmethod
+    def merge(
+        documents: list[ConsumptionData], policy: str = "latest", report: MergeReport = None
+    ) -> ConsumptionData:
+        """
+        Merges the documents of one sensor into a canonical series.
+
+        Args:
+            documents (list[ConsumptionData]): The documents of one sensor in delivery order.
+            policy (str): The conflict policy, see `SeriesMerger`.
+            report (MergeReport): The report the overlaps and gaps are added to, optional.
+
+        Returns:
+            ConsumptionData: The canonical series with the sensor ID as document ID, or
+            `None` if the documents contain no observations.
+
+        Raises:
+            ValueError: If the policy is unknown.
+        """
+        if policy not in MERGE_POLICIES:
+            raise ValueError(f"Unknown merge policy {policy!r}, use one of {MERGE_POLICIES}")
+        if report is None:
+            report = MergeReport()
+        documents = [document for document in documents if len(document)]
+        if not documents:
+            return None
+
+        sensor_id = documents[0].document_id
+        resolutions = [document.resolution for document in documents if document.resolution]
+        resolution = min(resolutions) if resolutions else None
+        step = int(resolution.total_seconds()) if resolution else None
+
+        # Bounds, resolution in seconds and whether it is strictly increasing without gaps
+        # of every document
+        bounds = []
+        steps = []
+        regular = []
+        for document in documents:
+            timestamps = document.timestamps
+            increasing = all(map(lt, timestamps, timestamps[1:]))
+            if increasing:
+                bounds.append((timestamps[0], timestamps[-1]))
+            else:
+                bounds.append((min(timestamps), max(timestamps)))
+            document_step = (
+                int(document.resolution.total_seconds()) if document.resolution else step
+            )
+            steps.append(document_step)
+            regular.append(
+                increasing
+                and (
+                    document_step is None
+                    or timestamps[-1] - timestamps[0] == (len(timestamps) - 1) * document_step
+                )
+            )
+
+        order = sorted(range(len(documents)), key=lambda i: (bounds[i][0], i))
+        clusters = [[order[0]]]
+        cluster_end = bounds[order[0]][1]
+        for i in order[1:]:
+            if bounds[i][0] <= cluster_end:
+                clusters[-1].append(i)
+                cluster_end = max(cluster_end, bounds[i][1])
+            else:
+                clusters.append([i])
+                cluster_end = bounds[i][1]
+
+        timestamps = array("q")
+        volumes = array("d")
+        previous_step = None
+        for cluster in clusters:
+            first = cluster[0]
+            # A document on its own is checked for gaps at its own resolution
+            cluster_step = steps[first] if len(cluster) == 1 else step
+            if (
+                timestamps
+                and previous_step
+                and bounds[first][0] - timestamps[-1] > previous_step
+            ):
+                report.gaps.append(
+                    Gap(
+                        sensor_id,
+                        from_epoch(timestamps[-1] + previous_step),
+                        from_epoch(bounds[first][0]),
+                    )
+                )
+            if len(cluster) == 1 and regular[first]:
+                timestamps.extend(documents[first].timestamps)
+                volumes.extend(documents[first].volumes)
+            else:
+                SeriesMerger.merge_cluster(
+                    [(i, documents[i]) for i in cluster],
+                    policy,
+                    cluster_step,
+                    timestamps,
+                    volumes,
+                    report,
+                )
+            previous_step = cluster_step
+
+        series = ConsumptionData(
+            sensor_id,
+            min(document.start_date for document in documents),
+            max(document.end_date for document in documents),
+            resolution,
+        )
+        series.set_columns(timestamps, volumes)
+        return series
+
+    @staticmethod
+    def merge_cluster(
+        cluster: list[tuple[int, ConsumptionData]],
+        policy: str,
+        step: int,
+        timestamps: array,
+        volumes: array,
+        report: MergeReport,
+    ) -> None:
+        """
+        Merges overlapping documents value by value and appends the result to the columns.
+
+        Also sorts a single document that is unsorted or has gaps, an overlap is only
+        reported for several documents.
+
+        Args:
+            cluster (list[tuple[int, ConsumptionData]]): The delivery position and the
+                                                         document of every overlapping
+                                                         document.
+            policy (str): The conflict policy, see `SeriesMerger`.
+            step (int): The resolution in seconds, gaps are not reported if `None`.
+            timestamps (array): The canonical timestamps, extended in place.
+            volumes (array): The canonical volumes, extended in place.
+            report (MergeReport): The report the overlap and gaps are added to.
+        """
+        sensor_id = cluster[0][1].document_id
+        streams = []
+        for position, document in cluster:
+            # Lower ranks win, the heap yields them first for equal timestamps
+            rank = -position if policy == "latest" else position
+            stream = zip(document.timestamps, repeat(rank), document.volumes)
+            if not all(map(lt, document.timestamps, document.timestamps[1:])):
+                stream = sorted(stream)
+            streams.append(stream)
+
+        duplicates = 0
+        conflicts = 0
+        start = len(timestamps)
+        last = None
+        winner = 0.0
+        conflict = None
+        for timestamp, _, volume in heapq.merge(*streams):
+            if timestamp == last:
+                if volume == winner:
+                    duplicates += 1
+                    continue
+                conflicts += 1
+                if policy == "flag":
+                    if conflict is None:
+                        conflict = (sensor_id, from_epoch(timestamp), [winner])
+                        report.conflicts.append(conflict)
+                    conflict[2].append(volume)
+                continue
+            if last is not None and step and timestamp - last > step:
+                report.gaps.append(Gap(sensor_id, from_epoch(last + step), from_epoch(timestamp)))
+            timestamps.append(timestamp)
+            volumes.append(volume)
+            last = timestamp
+            winner = volume
+            conflict = None
+
+        if len(cluster) > 1:
+            report.overlaps.append(
+                Overlap(
+                    sensor_id,
+                    from_epoch(timestamps[start]),
+                    from_epoch(timestamps[-1]),
+                    len(cluster),
+                    duplicates,
+                    conflicts,
+                )
+            )
+
+    @staticmethod
+    def merge_all(
+        documents: list[ConsumptionData], policy: str = "latest"
+    ) -> tuple[dict[str, ConsumptionData], MergeReport]:
+        """
+        Merges the documents of all sensors into one canonical series per sensor.
+
+        Args:
+            documents (list[ConsumptionData]): The documents in delivery order.
+            policy (str): The conflict policy, see `SeriesMerger`.
+
+        Returns:
+            tuple[dict[str, ConsumptionData], MergeReport]: The canonical series per sensor
+            ID and the report of all sensors.
+        """
+        per_sensor: dict[str, list[ConsumptionData]] = {}
+        for document in documents:
+            per_sensor.setdefault(document.document_id, []).append(document)
+
+        report = MergeReport()
+        series = {}
+        for sensor_id, sensor_documents in per_sensor.items():
+            merged = SeriesMerger.merge(sensor_documents, policy, report)
+            if merged is not None:
+                series[sensor_id] = merged
+        return series, report
@@ -0,0 +1,401 @@
+"""SeriesStore Class"""
+import json
+import mmap
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+# Import Local Classes
+from classes.consumtion_data import ConsumptionData, from_epoch, to_epoch
+from classes.series_merger import MERGE_POLICIES, Gap, MergeReport, SeriesMerger
+
+STORE_VERSION = 1
+MANIFEST = "manifest.json"
+# Bytes copied at once when a series is rewritten
+COPY_CHUNK_SIZE = 1 << 20
+
+
+class SeriesStore:
+    """
+    Persistent on-disk store of one canonical series per sensor, read through memory maps.
+
+    Every sensor has a timestamp and a volume file holding raw int64 and float64 values,
+    sorted by timestamp and without duplicate timestamps, and a file with the start and
+    end of every document added. Like `ConsumptionIndex`, a document with the same sensor
+    ID, start and end as an added one is skipped. The manifest lists the file generation,
+    observation count, resolution and time range of every sensor, the number of documents
+    per sensor and the source files already added. It is replaced atomically after every change and is the
+    only reference to the column files, so an interrupted write leaves the store as it
+    was before.
+
+    `series` and `query` return ConsumptionData whose columns are read-only memoryviews
+    of the mapped files. A range query bisects the mapped timestamps, so it only touches
+    the pages of the bisection steps and of the returned range; the pages are shared by
+    all processes mapping the same files.
+
+    New documents are merged with `SeriesMerger`. Observations after the end of a series
+    are appended to its files. Otherwise the series is copied into files of the next
+    generation up to the first overlapped observation, followed by the merged rest.
+    """
+
+    def __init__(self, root: str, merge_policy: str = "latest"):
+        """
+        Args:
+            root (str): The directory of the store, created on the first write.
+            merge_policy (str): The conflict policy of `SeriesMerger` for new documents,
+                                documents added later count as delivered later.
+
+        Raises:
+            ValueError: If the policy is unknown or the store has another version.
+        """
+        if merge_policy not in MERGE_POLICIES:
+            raise ValueError(
+                f"Unknown merge policy {merge_policy!r}, use one of {MERGE_POLICIES}"
+            )
+        self.root = root
+        self.merge_policy = merge_policy
+        # generation, count, resolution (seconds or None), start and end per sensor ID
+        self.sensors: dict[str, dict] = {}
+        # number of documents added per sensor ID
+        self.documents: dict[str, int] = {}
+        # size and modification time of every source file added
+        self.files: dict[str, list[int]] = {}
+        # start and end of the documents added per sensor ID, loaded on the first add
+        self.keys_per_id: dict[str, set[tuple[int, int]]] = {}
+        # mapped timestamp and volume columns per sensor ID
+        self.columns_per_id: dict[str, tuple[memoryview, memoryview]] = {}
+        # column files replaced by a new generation, deleted once the manifest is saved
+        self.obsolete: list[str] = []
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.sensors)
+
+    def __contains__(self, sensor_id: str) -> bool:
+        return sensor_id in self.sensors
+
+    def load(self) -> None:
+        """
+        Loads the manifest, a missing manifest starts an empty store.
+
+        Raises:
+            ValueError: If the manifest belongs to another version of the store.
+        """
+        try:
+            with open(os.path.join(self.root, MANIFEST), "r", encoding="utf-8") as file:
+                manifest = json.load(file)
+        except FileNotFoundError:
+            return
+        if manifest.get("version") != STORE_VERSION:
+            raise ValueError(f"{self.root} is not a series store of version {STORE_VERSION}")
+        self.sensors = manifest["sensors"]
+        self.documents = manifest["documents"]
+        self.files = manifest["files"]
+        self.columns_per_id = {}
+        self.keys_per_id = {}
+
+    def save(self) -> None:
+        """Writes the manifest atomically and deletes the column files it no longer uses."""
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, MANIFEST)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "version": STORE_VERSION,
+                    "sensors": self.sensors,
+                    "documents": self.documents,
+                    "files": self.files,
+                },
+                file,
+            )
+        os.replace(temp_path, path)
+        for obsolete_path in self.obsolete:
+            try:
+                os.remove(obsolete_path)
+            except OSError:
+                pass  # Still mapped on platforms that do not allow removing mapped files
+        self.obsolete = []
+
+    def sensor_ids(self) -> list[str]:
+        """
+        Returns:
+            list[str]: The sorted IDs of all sensors in the store.
+        """
+        return sorted(self.sensors)
+
+    def paths(self, sensor_id: str, generation: int) -> tuple[str, str]:
+        """
+        Args:
+            sensor_id (str): The sensor ID.
+            generation (int): The generation of the column files.
+
+        Returns:
+            tuple[str, str]: The paths of the timestamp and the volume file.
+        """
+        name = os.path.join(self.root, f"{quote(sensor_id, safe='')}.{generation}")
+        return f"{name}.timestamps", f"{name}.volumes"
+
+    def document_keys(self, sensor_id: str) -> set[tuple[int, int]]:
+        """
+        Args:
+            sensor_id (str): The sensor ID.
+
+        Returns:
+            set[tuple[int, int]]: The start and end in seconds since 1970-01-01 of every
+            document added for the sensor.
+        """
+        keys = self.keys_per_id.get(sensor_id)
+        if keys is None:
+            count = self.documents.get(sensor_id, 0)
+            values = array("q")
+            if count:
+                with open(self.documents_path(sensor_id), "rb") as file:
+                    values.fromfile(file, count * 2)
+            keys = self.keys_per_id[sensor_id] = set(zip(values[::2], values[1::2]))
+        return keys
+
+    def documents_path(self, sensor_id: str) -> str:
+        """
+        Args:
+            sensor_id (str): The sensor ID.
+
+        Returns:
+            str: The path of the file with the start and end of every document added.
+        """
+        return os.path.join(self.root, f"{quote(sensor_id, safe='')}.documents")
+
+    def is_added(self, path: str) -> bool:
+        """
+        Args:
+            path (str): The path of a source file.
+
+        Returns:
+            bool: Whether the file was added and has not changed since.
+        """
+        known = self.files.get(path)
+        if known is None:
+            return False
+        stat = os.stat(path)
+        return known == [stat.st_size, stat.st_mtime_ns]
+
+    def columns(self, sensor_id: str) -> tuple[memoryview, memoryview]:
+        """
+        Maps the column files of a sensor into memory.
+
+        Args:
+            sensor_id (str): The sensor ID, which has to be in the store.
+
+        Returns:
+            tuple[memoryview, memoryview]: The timestamps cast to "q" and the volumes cast
+            to "d", read-only.
+        """
+        columns = self.columns_per_id.get(sensor_id)
+        if columns is None:
+            entry = self.sensors[sensor_id]
+            length = entry["count"] * 8
+            views = []
+            for path, type_code in zip(self.paths(sensor_id, entry["generation"]), "qd"):
+                with open(path, "rb") as file:
+                    buffer = mmap.mmap(file.fileno(), length, access=mmap.ACCESS_READ)
+                views.append(memoryview(buffer).cast(type_code))
+            columns = self.columns_per_id[sensor_id] = (views[0], views[1])
+        return columns
+
+    def series(self, sensor_id: str) -> ConsumptionData:
+        """
+        Returns the canonical series of a sensor without copying it.
+
+        Args:
+            sensor_id (str): The sensor ID.
+
+        Returns:
+            ConsumptionData: The series with the sensor ID as document ID, `None` if the
+            sensor is not in the store.
+        """
+        return self.query(sensor_id)
+
+    def query(
+        self, sensor_id: str, start_date: datetime = None, end_date: datetime = None
+    ) -> ConsumptionData:
+        """
+        Returns the observations of a sensor within a time range without copying them.
+
+        Args:
+            sensor_id (str): The sensor ID.
+            start_date (datetime): The first timestamp included, unbounded if omitted.
+            end_date (datetime): The last timestamp included, unbounded if omitted.
+
+        Returns:
+            ConsumptionData: The observations in the range, with start and end date
+            clipped to them. `None` if the sensor is not in the store.
+        """
+        entry = self.sensors.get(sensor_id)
+        if entry is None:
+            return None
+        timestamps, volumes = self.columns(sensor_id)
+        count = len(timestamps)
+        first = 0 if start_date is None else bisect_left(timestamps, to_epoch(start_date))
+        stop = count if end_date is None else bisect_right(timestamps, to_epoch(end_date))
+        stop = max(first, stop)
+
+        start, end = entry["start"], entry["end"]
+        if first < stop:
+            if first > 0:
+                start = timestamps[first]
+            if stop < count:
+                end = timestamps[stop - 1] + (entry["resolution"] or 0)
+        series = ConsumptionData(
+            sensor_id,
+            from_epoch(start),
+            from_epoch(end),
+            None if entry["resolution"] is None else timedelta(seconds=entry["resolution"]),
+        )
+        series.set_columns(timestamps[first:stop], volumes[first:stop])
+        return series
+
+    def add(
+        self, documents: list[ConsumptionData], files: list[str] = (), report: MergeReport = None
+    ) -> list[ConsumptionData]:
+        """
+        Merges documents into the series of their sensors and saves the store.
+
+        Args:
+            documents (list[ConsumptionData]): The documents in delivery order.
+            files (list[str]): The source files of the documents, `is_added` returns True
+                               for them until they change.
+            report (MergeReport): The report the overlaps and gaps are added to, optional.
+
+        Returns:
+            list[ConsumptionData]: The documents that were added, without duplicates.
+        """
+        if report is None:
+            report = MergeReport()
+        added = []
+        per_sensor: dict[str, list[ConsumptionData]] = {}
+        for document in documents:
+            keys = self.document_keys(document.document_id)
+            key = (to_epoch(document.start_date), to_epoch(document.end_date))
+            if key in keys:
+                continue
+            keys.add(key)
+            per_sensor.setdefault(document.document_id, []).append(document)
+            added.append(document)
+
+        os.makedirs(self.root, exist_ok=True)
+        for sensor_id, sensor_documents in per_sensor.items():
+            new_series = SeriesMerger.merge(sensor_documents, self.merge_policy, report)
+            if new_series is not None:
+                self.add_series(new_series, report)
+            count = self.documents.get(sensor_id, 0)
+            keys = array("q")
+            for document in sensor_documents:
+                keys.append(to_epoch(document.start_date))
+                keys.append(to_epoch(document.end_date))
+            with open(self.documents_path(sensor_id), "ab") as file:
+                file.truncate(count * 16)
+                keys.tofile(file)
+            self.documents[sensor_id] = count + len(sensor_documents)
+
+        for path in files:
+            stat = os.stat(path)
+            self.files[path] = [stat.st_size, stat.st_mtime_ns]
+        self.save()
+        return added
+
+    def add_series(self, new_series: ConsumptionData, report: MergeReport) -> None:
+        """
+        Merges the canonical series of new documents into the stored series of its sensor.
+
+        The manifest is not saved, see `add`.
+
+        Args:
+            new_series (ConsumptionData): The merged new documents of one sensor.
+            report (MergeReport): The report the overlaps and gaps are added to.
+        """
+        sensor_id = new_series.document_id
+        resolution = (
+            None if new_series.resolution is None else int(new_series.resolution.total_seconds())
+        )
+        entry = self.sensors.get(sensor_id)
+        if entry is None:
+            entry = {"generation": 0, "count": 0, "resolution": resolution}
+            entry["start"] = to_epoch(new_series.start_date)
+            entry["end"] = to_epoch(new_series.end_date)
+            self.write_columns(sensor_id, entry, 0, new_series)
+            self.sensors[sensor_id] = entry
+            return
+
+        timestamps, _ = self.columns(sensor_id)
+        first = bisect_left(timestamps, new_series.timestamps[0])
+        if first > 0:
+            step = resolution or entry["resolution"]
+            last = timestamps[first - 1]
+            if step and new_series.timestamps[0] - last > step:
+                report.gaps.append(
+                    Gap(sensor_id, from_epoch(last + step), from_epoch(new_series.timestamps[0]))
+                )
+
+        if first == len(timestamps):
+            self.write_columns(sensor_id, entry, first, new_series)
+        else:
+            _, volumes = self.columns(sensor_id)
+            stored = ConsumptionData(
+                sensor_id,
+                from_epoch(entry["start"]),
+                from_epoch(entry["end"]),
+                None if entry["resolution"] is None else timedelta(seconds=entry["resolution"]),
+            )
+            stored.set_columns(timestamps[first:], volumes[first:])
+            merged = SeriesMerger.merge([stored, new_series], self.merge_policy, report)
+            self.write_columns(sensor_id, entry, first, merged)
+
+        if resolution is not None:
+            entry["resolution"] = min(resolution, entry["resolution"] or resolution)
+        entry["start"] = min(entry["start"], to_epoch(new_series.start_date))
+        entry["end"] = max(entry["end"], to_epoch(new_series.end_date))
+
+    def write_columns(
+        self, sensor_id: str, entry: dict, keep: int, series: ConsumptionData
+    ) -> None:
+        """
+        Replaces the stored observations of a sensor from a position on.
+
+        Appends to the current column files if all stored observations are kept, else
+        writes the next generation of column files.
+
+        Args:
+            sensor_id (str): The sensor ID.
+            entry (dict): The manifest entry of the sensor, its count and generation are
+                          updated.
+            keep (int): The number of stored observations kept.
+            series (ConsumptionData): The sorted observations following the kept ones.
+        """
+        self.columns_per_id.pop(sensor_id, None)
+        old_paths = self.paths(sensor_id, entry["generation"])
+        if keep == entry["count"]:
+            new_paths = old_paths
+        else:
+            entry["generation"] += 1
+            new_paths = self.paths(sensor_id, entry["generation"])
+            self.obsolete.extend(old_paths)
+
+        for old_path, new_path, column in zip(
+            old_paths, new_paths, (series.timestamps, series.volumes)
+        ):
+            if new_path == old_path:
+                # Observations beyond the count were left by an interrupted write
+                with open(new_path, "ab") as file:
+                    file.truncate(keep * 8)
+                    file.write(column)
+            else:
+                with open(old_path, "rb") as source, open(new_path, "wb") as target:
+                    remaining = keep * 8
+                    while remaining:
+                        chunk = source.read(min(COPY_CHUNK_SIZE, remaining))
+                        target.write(chunk)
+                        remaining -= len(chunk)
+                    target.write(column)
+        entry["count"] = keep + len(series)
@@ -0,0 +1,147 @@
+"""Snapshot Class"""
+import mmap
+import os
+import struct
+from datetime import timedelta
+
+# Import Local Classes
+from classes.consumtion_data import ConsumptionData
+from classes.meter_store import READING_COLUMNS, MeterSeries, MeterStore
+from classes.parse_cache import datetime_to_micros, micros_to_datetime
+
+MAGIC = b"M306SNAP"
+VERSION = 2
+# magic, version, document count, meter sensor count
+HEADER = struct.Struct("<8sIII4x")
+# start, end, resolution (microseconds, -1 if unknown), entry count, document ID length
+DOCUMENT = struct.Struct("<qqqQI4x")
+# reading count, sensor ID length
+METER = struct.Struct("<QI4x")
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def padded(length: int) -> int:
+    """Rounds a length up to the next multiple of 8 bytes."""
+    return (length + 7) & ~7
+
+
+class Snapshot:
+    """
+    Memory-mapped snapshot of the loaded data, used to hand it to the Dash process.
+
+    All columns are stored 8-byte aligned, so the consumption data of a loaded snapshot
+    reads its timestamps and volumes directly from the mapped file without copying or
+    unpickling them. The pages are shared with every other process mapping the file.
+    The few meter readings are stored as the columns of a MeterStore per sensor and
+    copied on loading, so new readings can be added to the loaded store.
+    """
+
+    @staticmethod
+    def write(
+        path: str, data_consumption: list[ConsumptionData], meter_store: MeterStore
+    ) -> None:
+        """
+        Writes the consumption data and the meter readings into a snapshot file.
+
+        Args:
+            path (str): The snapshot file, replaced atomically.
+            data_consumption (list[ConsumptionData]): The consumption data to store.
+            meter_store (MeterStore): The meter readings to store.
+        """
+        meter_store.sort()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(
+                HEADER.pack(MAGIC, VERSION, len(data_consumption), len(meter_store.series))
+            )
+
+            for consumption_data in data_consumption:
+                document_id = consumption_data.document_id.encode("utf-8")
+                resolution = consumption_data.resolution
+                file.write(
+                    DOCUMENT.pack(
+                        datetime_to_micros(consumption_data.start_date),
+                        datetime_to_micros(consumption_data.end_date),
+                        -1 if resolution is None else resolution // ONE_MICROSECOND,
+                        len(consumption_data.timestamps),
+                        len(document_id),
+                    )
+                )
+                file.write(document_id.ljust(padded(len(document_id)), b"\0"))
+                file.write(consumption_data.timestamps.tobytes())
+                file.write(consumption_data.volumes.tobytes())
+
+            for sensor_id in meter_store.sensor_ids():
+                series = meter_store.series[sensor_id]
+                encoded_id = sensor_id.encode("utf-8")
+                file.write(METER.pack(len(series), len(encoded_id)))
+                file.write(encoded_id.ljust(padded(len(encoded_id)), b"\0"))
+                file.write(series.timestamps.tobytes())
+                for column in READING_COLUMNS:
+                    file.write(getattr(series, column).tobytes())
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def load(path: str) -> tuple[list[ConsumptionData], MeterStore]:
+        """
+        Maps a snapshot file into memory.
+
+        The columns of the returned ConsumptionData objects are read-only memoryviews into
+        the mapped file, so no values can be added to them.
+
+        Args:
+            path (str): The snapshot file written by `write`.
+
+        Returns:
+            tuple[list[ConsumptionData], MeterStore]: The consumption data and the meter
+            readings.
+
+        Raises:
+            ValueError: If the file is not a snapshot of this version.
+        """
+        with open(path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(buffer)
+
+        magic, version, document_count, sensor_count = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a snapshot of version {VERSION}")
+        offset = HEADER.size
+
+        data_consumption = []
+        for _ in range(document_count):
+            start, end, resolution, count, id_length = DOCUMENT.unpack_from(buffer, offset)
+            offset += DOCUMENT.size
+            document_id = bytes(view[offset:offset + id_length]).decode("utf-8")
+            offset += padded(id_length)
+
+            consumption_data = ConsumptionData(
+                document_id,
+                micros_to_datetime(start),
+                micros_to_datetime(end),
+                None if resolution < 0 else timedelta(microseconds=resolution),
+            )
+            timestamps = view[offset:offset + count * 8].cast("q")
+            offset += count * 8
+            volumes = view[offset:offset + count * 8].cast("d")
+            offset += count * 8
+            consumption_data.set_columns(timestamps, volumes)
+            data_consumption.append(consumption_data)
+
+        meter_store = MeterStore()
+        for _ in range(sensor_count):
+            count, id_length = METER.unpack_from(buffer, offset)
+            offset += METER.size
+            sensor_id = bytes(view[offset:offset + id_length]).decode("utf-8")
+            offset += padded(id_length)
+
+            series = meter_store.series[sensor_id] = MeterSeries()
+            for column in ("timestamps",) + READING_COLUMNS:
+                getattr(series, column).frombytes(view[offset:offset + count * 8])
+                offset += count * 8
+
+        return data_consumption, meter_store
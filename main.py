@@ -1,30 +1,151 @@
 """Main Project File"""
+import argparse
 import multiprocessing
-from classes.file_reader import FileReader
+from classes.file_reader import ESL_OBIS_SENSORS, FileReader
 from classes.gui import Gui
 from classes.apprun import apprun
+from classes.parse_cache import ParseCache
+from classes.series_store import SeriesStore
+from classes.snapshot import Snapshot
 
-def read():
+SDAT_DIR = "./data/public/SDAT-Files"
+ESL_DIR = "./data/public/ESL-Files"
+SDAT_CACHE = "./data/cache/sdat.cache"
+ESL_CACHE = "./data/cache/esl.cache"
+SNAPSHOT = "./data/cache/snapshot.bin"
+SERIES_STORE = "./data/store"
+
+def list_data_files():
+    """List the SDAT and ESL files to read, before reading them."""
+    return FileReader.list_xml_files(SDAT_DIR), FileReader.list_xml_files(ESL_DIR)
+
+def obis_sensor(value: str) -> tuple[str, str]:
+    """Parses an OBIS=SENSOR command line argument."""
+    obis, separator, sensor_id = value.partition("=")
+    if not separator or not obis or not sensor_id:
+        raise argparse.ArgumentTypeError(f"{value!r} is not of the form OBIS=SENSOR")
+    return obis, sensor_id
+
+def read(
+    sdat_files: list[str],
+    esl_files: list[str],
+    rebuild_cache: bool = False,
+    obis_sensors: dict[str, str] = None,
+):
     """Function to read data."""
     reader = FileReader()
-    data_consumption = reader.read_sdat_files("./data/public/SDAT-Files")
-    data_meter = reader.read_esl_files("./data/public/ESL-Files")
-    return data_consumption, data_meter
+    sdat_cache = ParseCache(SDAT_CACHE)
+    esl_cache = ParseCache(ESL_CACHE, options=obis_sensors)
+    if rebuild_cache:
+        sdat_cache.invalidate()
+        esl_cache.invalidate()
+    data_consumption = reader.read_files(
+        sdat_files, reader.sdat_read_function(backend="scan"), "SDAT", None, sdat_cache
+    )
+    meter_store = reader.read_esl_store(ESL_DIR, None, esl_cache, esl_files, obis_sensors)
+    return data_consumption, meter_store
+
+def read_into_store(
+    sdat_files: list[str],
+    esl_files: list[str],
+    rebuild_cache: bool = False,
+    obis_sensors: dict[str, str] = None,
+):
+    """Add new or changed SDAT files to the series store and read the ESL files."""
+    FileReader.read_sdat_store(
+        SDAT_DIR, SeriesStore(SERIES_STORE), workers=None, backend="scan", files=sdat_files
+    )
+    esl_cache = ParseCache(ESL_CACHE, options=obis_sensors)
+    if rebuild_cache:
+        esl_cache.invalidate()
+    return FileReader.read_esl_store(ESL_DIR, None, esl_cache, esl_files, obis_sensors)
 
-def run_flask():
-    """Run Flask/Dash app in a separate process."""
-    data_consumption, data_meter = read()
-    apprun(data_consumption, data_meter)
+def write_snapshot(
+    sdat_files: list[str],
+    esl_files: list[str],
+    rebuild_cache: bool = False,
+    use_store: bool = False,
+    obis_sensors: dict[str, str] = None,
+):
+    """Read data and write it into the snapshot, runs in a short-lived process."""
+    if use_store:
+        # The consumption data stays in the store, the snapshot only holds the readings
+        meter_store = read_into_store(sdat_files, esl_files, rebuild_cache, obis_sensors)
+        Snapshot.write(SNAPSHOT, [], meter_store)
+        return
+    data_consumption, meter_store = read(sdat_files, esl_files, rebuild_cache, obis_sensors)
+    Snapshot.write(SNAPSHOT, data_consumption, meter_store)
+
+def run_flask(
+    sdat_files: list[str],
+    esl_files: list[str],
+    use_store: bool = False,
+    obis_sensors: dict[str, str] = None,
+):
+    """Run Flask/Dash app in a separate process on the data of the snapshot."""
+    data_consumption, meter_store = Snapshot.load(SNAPSHOT)
+    series_store = SeriesStore(SERIES_STORE) if use_store else None
+    apprun(
+        data_consumption,
+        meter_store,
+        SDAT_DIR,
+        ESL_DIR,
+        series_store=series_store,
+        known_sdat_files=sdat_files,
+        known_esl_files=esl_files,
+        obis_sensors=obis_sensors,
+    )
 
 def main():
     """Main Workflow"""
+    parser = argparse.ArgumentParser(description="Visualisierung von Stromverbrauch")
+    parser.add_argument(
+        "--rebuild-cache", action="store_true", help="Parse all files again and rebuild the cache"
+    )
+    parser.add_argument(
+        "--series-store",
+        action="store_true",
+        help="Keep the consumption data in the memory-mapped store instead of in memory",
+    )
+    parser.add_argument(
+        "--obis-sensor",
+        action="append",
+        type=obis_sensor,
+        metavar="OBIS=SENSOR",
+        help="Read an OBIS code of the ESL files as a sensor, e.g. 1-1:1.8.1=ID742. "
+        "Replaces the default codes if given, can be repeated.",
+    )
+    args = parser.parse_args()
+    obis_sensors = dict(args.obis_sensor) if args.obis_sensor else dict(ESL_OBIS_SENSORS)
+
     print("Initiating...")
     print("Loading data...")
 
-    data_consumption, data_meter = read()
-    flask_process = multiprocessing.Process(target=run_flask)
+    # Listed before loading, so the watchers report every file added while loading
+    sdat_files, esl_files = list_data_files()
+    # The data is parsed once in a loader process. Its memory is freed when it exits and
+    # both the GUI and the Dash process map the same snapshot instead of parsing again.
+    loader_process = multiprocessing.Process(
+        target=write_snapshot,
+        args=(sdat_files, esl_files, args.rebuild_cache, args.series_store, obis_sensors),
+    )
+    loader_process.start()
+    loader_process.join()
+    if loader_process.exitcode != 0:
+        raise SystemExit("Loading data failed.")
+
+    data_consumption, meter_store = Snapshot.load(SNAPSHOT)
+    if args.series_store:
+        # One memory-mapped series per sensor instead of every document
+        series_store = SeriesStore(SERIES_STORE)
+        data_consumption = [
+            series_store.series(sensor_id) for sensor_id in series_store.sensor_ids()
+        ]
+    flask_process = multiprocessing.Process(
+        target=run_flask, args=(sdat_files, esl_files, args.series_store, obis_sensors)
+    )
     flask_process.start()
-    Gui(data_consumption, data_meter)
+    Gui(data_consumption, meter_store, obis_sensors)
     flask_process.join()
 
 if __name__ == "__main__":
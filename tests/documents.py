@@ -0,0 +1,37 @@
+"""Documents for the tests"""
+import os
+from array import array
+from datetime import datetime, timedelta
+
+from classes.consumtion_data import ConsumptionData, to_epoch
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+SDAT_FIXTURES = os.path.join(FIXTURES, "SDAT-Files")
+START = datetime(2019, 3, 1)
+QUARTER_HOUR = timedelta(minutes=15)
+HOUR = timedelta(hours=1)
+
+
+def make_document(start: datetime, volumes: list[float], resolution=QUARTER_HOUR, skip=()):
+    """Creates a document of consecutive observations, except at the positions in `skip`."""
+    step = int(resolution.total_seconds())
+    first = to_epoch(start)
+    positions = [i for i in range(len(volumes)) if i not in skip]
+    document = ConsumptionData("ID742", start, start + resolution * len(volumes), resolution)
+    document.set_columns(
+        array("q", (first + i * step for i in positions)),
+        array("d", (volumes[i] for i in positions)),
+    )
+    return document
+
+
+def columns(document: ConsumptionData) -> tuple:
+    """Returns everything a parsed document holds, to compare documents."""
+    return (
+        document.document_id,
+        document.start_date,
+        document.end_date,
+        document.resolution,
+        list(document.timestamps),
+        list(document.volumes),
+    )
@@ -0,0 +1,84 @@
+"""Tests of the zoom handling of the Dash app"""
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("dash")
+pytest.importorskip("plotly")
+
+import app
+
+
+@pytest.mark.parametrize(
+    "level, zooms, expected",
+    [
+        (
+            "observation",
+            [
+                (datetime(2019, 3, 1, 10, 1), datetime(2019, 3, 2, 18, 59)),
+                (datetime(2019, 3, 1, 10, 14, 59), datetime(2019, 3, 2, 18, 45)),
+            ],
+            (datetime(2019, 3, 1, 10, 15), datetime(2019, 3, 2, 18, 45)),
+        ),
+        (
+            "day",
+            [
+                (datetime(2019, 3, 1, 0, 0, 1), datetime(2019, 4, 10, 13)),
+                (datetime(2019, 3, 1, 23, 59), datetime(2019, 4, 10, 23, 59)),
+                (datetime(2019, 3, 2), datetime(2019, 4, 10)),
+            ],
+            (datetime(2019, 3, 2), datetime(2019, 4, 10)),
+        ),
+        (
+            "month",
+            [
+                (datetime(2019, 1, 15), datetime(2020, 6, 30)),
+                (datetime(2019, 1, 31, 12), datetime(2020, 6, 1)),
+            ],
+            (datetime(2019, 2, 1), datetime(2020, 6, 1)),
+        ),
+    ],
+)
+def test_nearby_zooms_share_their_range(level, zooms, expected):
+    assert {app.quantize_range(level, x_min, x_max) for x_min, x_max in zooms} == {expected}
+
+
+def test_other_buckets_are_other_ranges():
+    first = app.quantize_range("day", datetime(2019, 3, 1, 12), datetime(2019, 4, 10))
+    second = app.quantize_range("day", datetime(2019, 3, 2, 12), datetime(2019, 4, 10))
+    assert first != second
+
+
+def test_levels_of_zoomed_ranges():
+    assert [app.zoom_level(days) for days in (1, 2.99, 3, 60, 61, 730, 731, 5000)] == [
+        "observation",
+        "observation",
+        "day",
+        "day",
+        "month",
+        "month",
+        "year",
+        "year",
+    ]
+
+
+def test_shown_level_is_kept_within_the_hysteresis():
+    # Zooming out slightly past a bound keeps the level
+    assert app.zoom_level(3.5, "observation") == "observation"
+    assert app.zoom_level(70, "day") == "day"
+    assert app.zoom_level(800, "month") == "month"
+    # Zooming in slightly below a bound keeps the level as well
+    assert app.zoom_level(2.5, "day") == "day"
+    assert app.zoom_level(55, "month") == "month"
+    # Leaving the widened bounds switches the level
+    assert app.zoom_level(3.75, "observation") == "day"
+    assert app.zoom_level(2.3, "day") == "observation"
+    assert app.zoom_level(1000, "month") == "year"
+
+    # Panning back and forth around a bound does not switch back and forth
+    level = None
+    levels = []
+    for days in (2.9, 3.1, 2.9, 3.1, 4.0, 3.1, 2.9, 2.0):
+        level = app.zoom_level(days, level)
+        levels.append(level)
+    assert levels == ["observation"] * 4 + ["day"] * 3 + ["observation"]
@@ -0,0 +1,65 @@
+"""Tests of merging new consumption data into a running app"""
+import pytest
+
+from classes.apprun import merge_consumption_data
+from classes.consumption_index import ConsumptionIndex
+from classes.sensor_cache import SensorCache, build_rollup, build_stored_rollup
+from classes.series_merger import MergeReport
+from classes.series_store import SeriesStore
+from tests.documents import QUARTER_HOUR, START, make_document
+
+
+@pytest.mark.parametrize(
+    "policy, volumes, conflicts",
+    [
+        ("latest", [1.0, 5.0, 5.0, 2.0], 0),
+        ("first", [1.0, 1.0, 1.0, 2.0], 0),
+        ("flag", [1.0, 1.0, 1.0, 2.0], 2),
+    ],
+)
+def test_new_documents_use_merge_policy(policy, volumes, conflicts):
+    consumption_index = ConsumptionIndex([make_document(START, [1.0, 1.0, 1.0])])
+    rollups = SensorCache(
+        lambda: consumption_index.sensors,
+        lambda sensor_id: build_rollup(consumption_index.query(sensor_id), policy),
+    )
+    rollup = rollups["ID742"]
+    report = MergeReport()
+    overlapping = merge_consumption_data(
+        [make_document(START + QUARTER_HOUR, [5.0, 5.0, 2.0])],
+        rollups,
+        consumption_index,
+        policy,
+        merge_report=report,
+    )
+    assert overlapping == 2
+    assert list(rollup.volumes) == volumes
+    assert rollup.level("hour").sums[0] == sum(volumes)
+    assert report.conflict_count() == 2
+    assert len(report.conflicts) == conflicts
+
+
+def test_new_documents_of_unloaded_sensors_are_indexed():
+    consumption_index = ConsumptionIndex([])
+    rollups = SensorCache(
+        lambda: consumption_index.sensors,
+        lambda sensor_id: build_rollup(consumption_index.query(sensor_id)),
+    )
+    new_data = [make_document(START, [1.0, 2.0])]
+    assert merge_consumption_data(new_data, rollups, consumption_index) == 0
+    assert list(rollups["ID742"].volumes) == [1.0, 2.0]
+
+
+def test_new_files_are_recorded_by_series_store(tmp_path):
+    series_store = SeriesStore(str(tmp_path / "store"))
+    rollups = SensorCache(
+        lambda: series_store.sensors,
+        lambda sensor_id: build_stored_rollup(series_store, sensor_id),
+    )
+    path = tmp_path / "20190301_ID742.xml"
+    path.write_text("<sdat/>")
+    new_data = [make_document(START, [1.0, 2.0])]
+    merge_consumption_data(new_data, rollups, series_store, files=[str(path)])
+    assert series_store.is_added(str(path))
+    assert list(rollups["ID742"].volumes) == [1.0, 2.0]
+    assert list(SeriesStore(str(tmp_path / "store")).files) == [str(path)]
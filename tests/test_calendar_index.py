@@ -0,0 +1,110 @@
+"""Tests of CalendarIndex"""
+from array import array
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from operator import itemgetter
+
+import pytest
+
+from classes.calendar_index import civil_date
+from classes.consumtion_data import ConsumptionData, from_epoch, to_epoch
+from classes.data_processor import DataProcessor
+from tests.documents import HOUR, QUARTER_HOUR, START, make_document
+
+
+def strftime_nested_dict(sensor_id: str, sdat_data: list[ConsumptionData]) -> dict:
+    """The strftime grouping `get_data_by_time` used before the CalendarIndex."""
+    combined_data = [
+        data for data in DataProcessor.filter_data(sdat_data) if data.document_id == sensor_id
+    ]
+    time_data = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+    for data in combined_data:
+        for epoch, volume in zip(data.timestamps, data.volumes):
+            timestamp = from_epoch(epoch)
+            year = timestamp.strftime("%Y")
+            month = timestamp.strftime("%b")
+            day = timestamp.strftime("%d")
+            time_data[year][month][day].append((timestamp, volume))
+    return {
+        year: {month: dict(days) for month, days in months.items()}
+        for year, months in time_data.items()
+    }
+
+
+def fall_back_day() -> ConsumptionData:
+    """The 2019-10-27 in local time, 25 hours with 02:00 to 03:00 observed twice."""
+    start = datetime(2019, 10, 27)
+    times = [start + i * QUARTER_HOUR for i in range(12)]
+    times += [start + i * QUARTER_HOUR for i in range(8, 96)]
+    document = ConsumptionData("ID742", start, start + timedelta(days=1), QUARTER_HOUR)
+    document.set_columns(
+        array("q", map(to_epoch, times)), array("d", (i / 4 for i in range(len(times))))
+    )
+    return document
+
+
+@pytest.fixture
+def sdat_data():
+    """Documents over month, year and DST changes, overlapping and of another sensor."""
+    # 2019-03-31 in local time has 23 hours, 02:00 to 03:00 is skipped
+    spring_forward = make_document(
+        datetime(2019, 3, 30), [1.0] * 192, skip=set(range(96 + 8, 96 + 12))
+    )
+    new_year = make_document(datetime(2019, 12, 31, 12), [0.25] * 96)
+    leap_day = make_document(datetime(2020, 2, 28), [0.5] * 72, HOUR)
+    other_sensor = make_document(START, [9.0] * 96)
+    other_sensor.document_id = "ID735"
+    # Given after the later documents and overlapping the first one
+    earlier = make_document(datetime(2019, 3, 29, 18), [2.0] * 40)
+    return [
+        spring_forward,
+        new_year,
+        leap_day,
+        other_sensor,
+        fall_back_day(),
+        earlier,
+        spring_forward,
+    ]
+
+
+def test_civil_date_matches_datetime():
+    for day_number in list(range(-800, 800)) + list(range(10950, 11400, 7)):
+        expected = date(1970, 1, 1) + timedelta(days=day_number)
+        assert civil_date(day_number) == (expected.year, expected.month, expected.day)
+    assert civil_date(to_epoch(datetime(2000, 2, 29)) // 86400) == (2000, 2, 29)
+    assert civil_date(to_epoch(datetime(2100, 3, 1)) // 86400) == (2100, 3, 1)
+
+
+def test_grouping_matches_strftime(sdat_data):
+    expected = strftime_nested_dict("ID742", sdat_data)
+    # The index sorts the observations of a day, stably for the repeated hour
+    for months in expected.values():
+        for days in months.values():
+            for day, entries in days.items():
+                days[day] = sorted(entries, key=itemgetter(0))
+    nested = DataProcessor.get_data_by_time("ID742", sdat_data, nested=True)
+    assert nested == expected
+    assert sorted(nested) == ["2019", "2020"]
+    assert len(nested["2019"]["Mar"]["31"]) == 92
+    assert len(nested["2019"]["Oct"]["27"]) == 100
+    assert list(nested["2020"]["Feb"]) == ["28", "29"]
+
+
+def test_day_starts_bound_every_day(sdat_data):
+    calendar_index = DataProcessor.get_data_by_time("ID742", sdat_data)
+    timestamps = calendar_index.timestamps
+    assert list(timestamps) == sorted(timestamps)
+    for (year, month, day), first, stop in zip(
+        calendar_index.days(), calendar_index.day_starts, calendar_index.day_starts[1:]
+    ):
+        day_start = to_epoch(datetime(year, month, day))
+        assert first < stop
+        assert day_start <= timestamps[first] and timestamps[stop - 1] < day_start + 86400
+    assert calendar_index.day_starts[-1] == len(calendar_index)
+
+    timestamps_view, volumes_view = calendar_index.view(2019, 3, 31)
+    assert len(timestamps_view) == len(volumes_view) == 92
+    assert calendar_index.find(2019, 3) == (0, calendar_index.find(2019, 4)[0])
+    assert calendar_index.find(2019, 11) == calendar_index.find(2019, 11, 1)
+    first, stop = calendar_index.find(2020)
+    assert (first, stop) == (calendar_index.find(2020, 1)[0], len(calendar_index))
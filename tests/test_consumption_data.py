@@ -0,0 +1,63 @@
+"""Tests of the timestamp lookups of ConsumptionData"""
+import math
+from array import array
+
+import pytest
+
+from classes.consumtion_data import ConsumptionData, from_epoch
+from tests.documents import START, make_document
+
+
+def make_columns(timestamps: list[int]) -> ConsumptionData:
+    """Creates a document with the given timestamps and their position as volume."""
+    document = ConsumptionData("ID742", START, START)
+    document.set_columns(array("q", timestamps), array("d", range(len(timestamps))))
+    return document
+
+
+def test_regular_documents_compute_positions():
+    document = make_document(START, [1.0, 2.0, 3.0, 4.0])
+    first = document.timestamps[0]
+    assert document.current_lookup()[3] is None
+    assert [document.index_of(first + i * 900) for i in range(4)] == [0, 1, 2, 3]
+    assert document.index_of(first - 900) == -1
+    assert document.index_of(first + 450) == -1
+    assert document.index_of(first + 4 * 900) == -1
+    assert document.get_consumption(from_epoch(first + 1800)).volume == 3.0
+    assert document.get_consumption(from_epoch(first + 4 * 900)) is None
+
+
+@pytest.mark.parametrize(
+    "timestamps",
+    [
+        # Same span as a grid of 3600 seconds, but not on it
+        [0, 3600, 4500, 10800],
+        [0, 3600, 3600, 7200],
+        [7200, 3600, 0],
+    ],
+)
+def test_irregular_documents_use_the_hash_index(timestamps):
+    document = make_columns(timestamps)
+    assert document.current_lookup()[3] is not None
+    for timestamp in (0, 3600, 4500, 7200, 10800):
+        expected = timestamps.index(timestamp) if timestamp in timestamps else -1
+        assert document.index_of(timestamp) == expected
+
+
+def test_get_volumes():
+    document = make_columns([0, 3600, 4500, 10800])
+    volumes = document.get_volumes([4500, 7200, 0, 10800])
+    assert list(volumes[:1]) == [2.0] and math.isnan(volumes[1])
+    assert list(volumes[2:]) == [0.0, 3.0]
+    regular = make_columns([0, 900, 1800])
+    assert list(regular.get_volumes([1800, 450, 0], default=-1.0)) == [2.0, -1.0, 0.0]
+    single = make_columns([900])
+    assert list(single.get_volumes([900, 0], default=-1.0)) == [0.0, -1.0]
+
+
+def test_lookup_follows_added_entries():
+    document = make_columns([0, 900])
+    assert document.index_of(1800) == -1
+    document.add_value(5000, 7.0)
+    assert document.current_lookup()[3] is not None
+    assert document.index_of(5000) == 2 and document.index_of(1800) == -1
@@ -0,0 +1,61 @@
+"""Tests of ConsumptionIndex"""
+import random
+from datetime import timedelta
+
+import pytest
+
+from classes.consumption_index import ConsumptionIndex
+from classes.data_processor import DataProcessor
+from classes.file_reader import FileReader
+from tests.documents import SDAT_FIXTURES, START, make_document
+
+
+@pytest.fixture
+def consumption_index():
+    """The index of the SDAT fixtures."""
+    return ConsumptionIndex(FileReader.read_sdat_files(SDAT_FIXTURES))
+
+
+def test_sensors(consumption_index):
+    assert consumption_index.sensor_ids() == ["ID735", "ID742"]
+    assert len(consumption_index) == 3
+    assert consumption_index.query("ID000") == []
+
+
+def test_partial_and_full_overlaps(consumption_index):
+    first, second = consumption_index.query("ID742")
+    assert first.start_date < second.start_date
+    hour = timedelta(hours=1)
+    # Documents are the half-open interval [start_date, end_date)
+    assert consumption_index.query("ID742", START + 2 * hour, START + 3 * hour) == [second]
+    assert consumption_index.query("ID742", START + 1.75 * hour, START + 1.8 * hour) == [
+        first,
+        second,
+    ]
+    assert consumption_index.query("ID742", START, START + 2 * hour, partial=False) == [first]
+    assert consumption_index.query("ID742", end_date=START + hour) == [first]
+    assert consumption_index.query("ID742", START + 3 * hour) == []
+
+
+def test_duplicates_are_skipped(consumption_index):
+    assert consumption_index.add(FileReader.read_sdat_files(SDAT_FIXTURES)) == []
+    assert len(consumption_index) == 3
+
+
+@pytest.mark.parametrize("partial", [True, False])
+def test_matches_get_data(partial):
+    rng = random.Random(1)
+    documents = [
+        make_document(START + timedelta(hours=rng.randrange(200)), [1.0] * rng.randrange(1, 300))
+        for _ in range(100)
+    ]
+    consumption_index = ConsumptionIndex(documents)
+    for _ in range(50):
+        start_date = START + timedelta(minutes=rng.randrange(250 * 60))
+        end_date = start_date + timedelta(minutes=rng.randrange(50 * 60))
+        expected = DataProcessor.get_data("ID742", documents, start_date, end_date, partial)
+        found = consumption_index.query("ID742", start_date, end_date, partial)
+        # filter_data copies the documents, they are compared by their interval
+        assert [(data.start_date, data.end_date) for data in found] == [
+            (data.start_date, data.end_date) for data in expected or []
+        ]
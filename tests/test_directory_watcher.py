@@ -0,0 +1,31 @@
+"""Tests of DirectoryWatcher"""
+import shutil
+
+from classes.directory_watcher import DirectoryWatcher
+from classes.file_reader import FileReader
+from classes.series_store import SeriesStore
+from tests.documents import SDAT_FIXTURES
+
+
+def test_files_added_while_loading_are_reported(tmp_path):
+    sdat_dir = shutil.copytree(SDAT_FIXTURES, tmp_path / "SDAT-Files")
+    # Listed before loading, like main.py does
+    files = FileReader.list_xml_files(str(sdat_dir))
+    added_while_loading = str(sdat_dir / "20190304_ID742.xml")
+    shutil.copyfile(files[1], added_while_loading)
+    store = SeriesStore(str(tmp_path / "store"))
+    assert FileReader.read_sdat_store(str(sdat_dir), store, files=files) == len(files)
+
+    watcher = DirectoryWatcher(str(sdat_dir), print, known_files=files)
+    # Reported once its size is unchanged between two polls
+    assert watcher.poll() == []
+    assert watcher.poll() == [added_while_loading]
+    assert watcher.poll() == []
+    assert not store.is_added(added_while_loading)
+
+
+def test_known_files_default_to_the_directory(tmp_path):
+    sdat_dir = shutil.copytree(SDAT_FIXTURES, tmp_path / "SDAT-Files")
+    watcher = DirectoryWatcher(str(sdat_dir), print)
+    assert watcher.known_files == set(FileReader.list_xml_files(str(sdat_dir)))
+    assert watcher.poll() == [] and watcher.poll() == []
@@ -0,0 +1,53 @@
+"""Tests of the downsampling functions"""
+import math
+import random
+
+import pytest
+
+from classes.downsampler import DOWNSAMPLING_METHODS, downsample
+
+
+def load_curve(count: int, seed: int = 5) -> tuple[list[int], list[float]]:
+    """A noisy daily curve with a single peak and a single dip, as timestamps and values."""
+    rng = random.Random(seed)
+    x = [i * 900 for i in range(count)]
+    y = [1 + math.sin(i / 48 * math.pi) + rng.random() / 10 for i in range(count)]
+    y[count // 3] = 10.0
+    y[2 * count // 3] = -5.0
+    return x, y
+
+
+@pytest.mark.parametrize("method", DOWNSAMPLING_METHODS)
+@pytest.mark.parametrize("max_points", [2, 3, 4, 5, 17, 100, 999, 1000, 5000])
+def test_positions_are_bounded_and_keep_the_ends(method, max_points):
+    x, y = load_curve(1000)
+    positions = downsample(x, y, max_points, method)
+    assert len(positions) <= max_points
+    assert positions == sorted(set(positions))
+    assert positions[0] == 0 and positions[-1] == len(y) - 1
+    if max_points >= len(y):
+        assert positions == list(range(len(y)))
+
+
+@pytest.mark.parametrize("max_points", [4, 5, 17, 100])
+@pytest.mark.parametrize("count", [10, 97, 1000])
+def test_minmax_keeps_the_global_extremes(max_points, count):
+    x, y = load_curve(count)
+    positions = downsample(x, y, max_points)
+    kept = [y[i] for i in positions]
+    assert min(kept) == min(y) and max(kept) == max(y)
+
+
+def test_flat_and_short_series():
+    # The minimum and the maximum of a flat bucket are one position
+    assert downsample([0, 1, 2, 3, 4, 5], [1.0] * 6, 4) == [0, 1, 5]
+    assert downsample([0], [1.0], 2, "lttb") == [0]
+    assert downsample([], [], 2) == []
+
+
+def test_invalid_arguments():
+    x, y = load_curve(10)
+    with pytest.raises(ValueError):
+        downsample(x, y, 1)
+    with pytest.raises(ValueError):
+        downsample(x, y, 5, "mean")
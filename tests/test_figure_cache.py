@@ -0,0 +1,41 @@
+"""Tests of FigureCache"""
+from classes.figure_cache import FigureCache
+
+
+def test_least_recently_used_figures_are_evicted_by_count():
+    figure_cache = FigureCache(max_entries=3)
+    for number in range(3):
+        figure_cache.put(("ID742", number), f"figure {number}", 10)
+    # The first figure is used again, the second is the least recently used one
+    assert figure_cache.get(("ID742", 0)) == "figure 0"
+    figure_cache.put(("ID742", 3), "figure 3", 10)
+    assert list(figure_cache.figures) == [("ID742", 2), ("ID742", 0), ("ID742", 3)]
+    assert figure_cache.get(("ID742", 1)) is None
+    assert (figure_cache.hits, figure_cache.misses, figure_cache.nbytes) == (1, 1, 30)
+
+
+def test_least_recently_used_figures_are_evicted_by_size():
+    figure_cache = FigureCache(max_entries=10, max_bytes=100)
+    figure_cache.put(("ID742", "a"), "a", 40)
+    figure_cache.put(("ID742", "b"), "b", 40)
+    figure_cache.get(("ID742", "a"))
+    # Evicts "b", the figures left fit the bound
+    figure_cache.put(("ID735", "c"), "c", 50)
+    assert list(figure_cache.figures) == [("ID742", "a"), ("ID735", "c")]
+    assert figure_cache.nbytes == 90
+    # Replacing a figure counts its new size only
+    figure_cache.put(("ID742", "a"), "A", 20)
+    assert (figure_cache.get(("ID742", "a")), figure_cache.nbytes) == ("A", 70)
+    # Figures larger than the bound are not cached and evict nothing
+    figure_cache.put(("ID742", "d"), "d", 101)
+    assert len(figure_cache) == 2 and figure_cache.get(("ID742", "d")) is None
+
+
+def test_figures_of_sensors_are_invalidated():
+    figure_cache = FigureCache()
+    figure_cache.put(("ID742", "day"), "a", 10)
+    figure_cache.put(("ID735", "day"), "b", 20)
+    figure_cache.invalidate(["ID742"])
+    assert list(figure_cache.figures) == [("ID735", "day")] and figure_cache.nbytes == 20
+    figure_cache.invalidate()
+    assert len(figure_cache) == 0 and figure_cache.nbytes == 0
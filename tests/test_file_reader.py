@@ -0,0 +1,176 @@
+"""Tests of the SDAT parsers of FileReader"""
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from classes.consumtion_data import to_epoch
+import classes.file_reader as file_reader
+from classes.file_reader import SDAT_BACKENDS, FileReader
+from tests.documents import FIXTURES, SDAT_FIXTURES, START, columns
+
+SDAT_FILES = FileReader.list_xml_files(SDAT_FIXTURES)
+INVALID_SDAT_FILE = os.path.join(FIXTURES, "invalid", "20190303_ID742.xml")
+# A mismatched end tag and an unbound prefix, the scan used to accept both
+MALFORMED_SDAT_FILES = [
+    os.path.join(FIXTURES, "invalid", name) for name in ("20190304_ID742.xml", "20190305_ID742.xml")
+]
+
+
+def read_or_raise(file: str):
+    """Parses an SDAT file in a worker process, raises on the invalid fixture."""
+    if file == INVALID_SDAT_FILE:
+        raise RuntimeError(f"Cannot parse {file}")
+    return FileReader.read_sdat_file(file)
+
+
+def test_fixtures_are_parsed():
+    documents = [FileReader.read_sdat_file(file) for file in SDAT_FILES]
+    assert [document.document_id for document in documents] == ["ID735", "ID742", "ID742"]
+    hourly = documents[0]
+    assert list(hourly.timestamps) == [to_epoch(START) + i * 3600 for i in range(3)]
+    assert list(hourly.volumes) == [1.5, 0.75, 2.125]
+    indented = documents[2]
+    assert indented.start_date == START.replace(hour=1, minute=30)
+    assert list(indented.volumes) == [0.19, 0.25, 0.175, 0.125]
+
+
+@pytest.mark.parametrize("file", SDAT_FILES, ids=os.path.basename)
+def test_streaming_matches_tree(file):
+    tree = FileReader.read_sdat_file(file)
+    assert columns(FileReader.read_sdat_file_streaming(file)) == columns(tree)
+    with open(file, "rb") as stream:
+        assert columns(FileReader.read_sdat_file_streaming(stream)) == columns(tree)
+
+
+def test_streaming_yields_header_first():
+    items = list(FileReader.iter_sdat_file(SDAT_FILES[1]))
+    assert items[0].document_id == "ID742" and len(items[0]) == 0
+    assert [entry.volume for entry in items[1:]][:2] == [0.12, 0.216]
+
+
+def test_streaming_rejects_invalid_files():
+    assert FileReader.read_sdat_file(INVALID_SDAT_FILE) is None
+    assert FileReader.read_sdat_file_streaming(INVALID_SDAT_FILE) is None
+    assert FileReader.read_sdat_file_streaming(io.BytesIO(b"<rsm:broken")) is None
+
+
+def test_read_sdat_files_streaming():
+    tree = FileReader.read_sdat_files(SDAT_FIXTURES)
+    streaming = FileReader.read_sdat_files(SDAT_FIXTURES, streaming=True)
+    assert list(map(columns, streaming)) == list(map(columns, tree))
+
+
+@pytest.mark.parametrize("backend", SDAT_BACKENDS)
+@pytest.mark.parametrize("file", SDAT_FILES, ids=os.path.basename)
+def test_backends_match_etree(backend, file):
+    if backend not in FileReader.available_sdat_backends():
+        pytest.skip(f"{backend} is not installed")
+    etree = FileReader.read_sdat_file(file)
+    assert columns(FileReader.read_sdat_file(file, backend)) == columns(etree)
+    with open(file, "rb") as stream:
+        assert columns(FileReader.read_sdat_file(stream, backend)) == columns(etree)
+
+
+@pytest.mark.skipif(
+    "lxml" not in FileReader.available_sdat_backends(), reason="lxml is not installed"
+)
+def test_lxml_rejects_invalid_files():
+    assert FileReader.read_sdat_file(INVALID_SDAT_FILE, "lxml") is None
+
+
+@pytest.mark.parametrize("backend", SDAT_BACKENDS)
+@pytest.mark.parametrize("file", MALFORMED_SDAT_FILES, ids=os.path.basename)
+def test_backends_reject_malformed_files(backend, file):
+    if backend not in FileReader.available_sdat_backends():
+        pytest.skip(f"{backend} is not installed")
+    assert FileReader.read_sdat_file(file, backend) is None
+    assert FileReader.scan_sdat_file(file) is None
+    assert FileReader.read_sdat_file_streaming(file) is None
+
+
+def test_scan_reads_the_plain_layout_only():
+    plain, indented = SDAT_FILES[1], SDAT_FILES[2]
+    assert columns(FileReader.scan_sdat_file(plain)) == columns(FileReader.read_sdat_file(plain))
+    # The comment rejects the scan, read_sdat_file falls back to etree
+    assert FileReader.scan_sdat_file(indented) is None
+    assert FileReader.scan_sdat_file(INVALID_SDAT_FILE) is None
+    assert FileReader.read_sdat_file(INVALID_SDAT_FILE, "scan") is None
+
+
+def test_scan_rejects_other_encodings_and_nested_volumes():
+    with open(SDAT_FILES[1], "rb") as file:
+        content = file.read()
+    latin1 = content.replace(b'encoding="UTF-8"', b'encoding="ISO-8859-1"')
+    assert FileReader.scan_sdat_file(io.BytesIO(latin1)) is None
+    nested = content.replace(
+        b"<rsm:Volume>0.120</rsm:Volume>", b"<rsm:Extra><rsm:Volume>0.120</rsm:Volume></rsm:Extra>"
+    )
+    assert FileReader.scan_sdat_file(io.BytesIO(nested)) is None
+
+
+def test_backend_errors():
+    with pytest.raises(ValueError):
+        FileReader.sdat_read_function(backend="sax")
+    with pytest.raises(ValueError):
+        FileReader.sdat_read_function(streaming=True, backend="scan")
+    if "lxml" not in FileReader.available_sdat_backends():
+        with pytest.raises(ValueError):
+            FileReader.read_sdat_file(SDAT_FILES[0], "lxml")
+
+
+def write_archive(path, files: list[str]) -> None:
+    """Packs the files into a zip or tar.gz archive below an "SDAT-Files" folder."""
+    names = [f"SDAT-Files/{os.path.basename(file)}" for file in files]
+    if path.suffix == ".zip":
+        with zipfile.ZipFile(path, "w") as archive:
+            for file, name in zip(files, names):
+                archive.write(file, name)
+    else:
+        with tarfile.open(path, "w:gz") as archive:
+            for file, name in zip(files, names):
+                archive.add(file, name)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+@pytest.mark.parametrize("suffix", [".zip", ".tar.gz"])
+def test_archives_match_loose_files(tmp_path, monkeypatch, suffix, workers):
+    # One member per task, so several tasks are in flight
+    monkeypatch.setattr(file_reader, "ARCHIVE_CHUNK_SIZE", 1)
+    archive = tmp_path / f"SDAT{suffix}"
+    # The members are sorted by name, not kept in archive order
+    write_archive(archive, SDAT_FILES[::-1])
+    loose = FileReader.read_sdat_files(SDAT_FIXTURES)
+    found = FileReader.read_sdat_files(str(archive), workers)
+    assert list(map(columns, found)) == list(map(columns, loose))
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+@pytest.mark.parametrize("suffix", [".zip", ".tar.gz"])
+def test_archives_name_the_failing_member(tmp_path, suffix, workers):
+    archive = tmp_path / f"SDAT{suffix}"
+    write_archive(archive, SDAT_FILES + [INVALID_SDAT_FILE])
+    with pytest.raises(SystemError, match="SDAT-Files/20190303_ID742.xml"):
+        FileReader.read_sdat_files(str(archive), workers)
+
+
+def test_workers_keep_the_order_of_the_files():
+    # Not in directory order and with a file given twice
+    files = [SDAT_FILES[2], SDAT_FILES[0], SDAT_FILES[2], SDAT_FILES[1]] * 5
+    sequential = FileReader.read_files(files, FileReader.read_sdat_file, "SDAT")
+    parallel = FileReader.read_files(files, FileReader.read_sdat_file, "SDAT", workers=4)
+    document_ids = [document.document_id for document in parallel]
+    assert document_ids[:4] == ["ID742", "ID735", "ID742", "ID742"]
+    assert list(map(columns, parallel)) == list(map(columns, sequential))
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_workers_report_errors(workers):
+    files = SDAT_FILES + [INVALID_SDAT_FILE] + SDAT_FILES
+    with pytest.raises(SystemError, match="20190303_ID742.xml"):
+        FileReader.read_files(files, FileReader.read_sdat_file, "SDAT", workers)
+    # An exception raised in a worker process reaches the caller
+    with pytest.raises(RuntimeError, match="Cannot parse"):
+        FileReader.read_files(files, read_or_raise, "SDAT", workers)
@@ -0,0 +1,69 @@
+"""Tests of QuantileSketch"""
+import math
+import random
+import statistics
+
+import pytest
+
+from classes.load_statistics import QuantileSketch
+
+
+def load_values(seed: int = 3) -> list[float]:
+    """Skewed loads, feed-in and zeros; 10001 values, so every percentile is a value."""
+    rng = random.Random(seed)
+    values = [rng.lognormvariate(0, 2) for _ in range(9001)]
+    values += [-rng.expovariate(1) for _ in range(800)] + [0.0] * 200
+    rng.shuffle(values)
+    return values
+
+
+def sketch_state(sketch: QuantileSketch) -> tuple:
+    """Returns everything a sketch counts, to compare sketches."""
+    return (
+        dict(sketch.positive),
+        dict(sketch.negative),
+        sketch.zero_count,
+        sketch.count,
+        sketch.minimum,
+        sketch.maximum,
+    )
+
+
+@pytest.mark.parametrize("relative_accuracy", [0.01, 0.05])
+def test_quantiles_are_within_the_accuracy(relative_accuracy):
+    values = load_values()
+    sketch = QuantileSketch(relative_accuracy)
+    sketch.extend(values)
+    exact = statistics.quantiles(values, n=100, method="inclusive")
+    for percent, value in enumerate(exact, 1):
+        assert abs(sketch.quantile(percent / 100) - value) <= relative_accuracy * abs(value)
+    assert (sketch.quantile(0), sketch.quantile(1)) == (min(values), max(values))
+
+
+def test_merged_sketches_equal_one_sketch():
+    values = load_values()
+    whole = QuantileSketch()
+    whole.extend(values)
+    first, second = QuantileSketch(), QuantileSketch()
+    first.extend(values[:2500])
+    second.extend(values[2500:])
+    first.merge(second)
+    assert sketch_state(first) == sketch_state(whole)
+    quantiles = [q / 1000 for q in range(1001)]
+    assert list(map(first.quantile, quantiles)) == list(map(whole.quantile, quantiles))
+
+    # Merging an empty sketch changes nothing
+    first.merge(QuantileSketch())
+    assert sketch_state(first) == sketch_state(whole)
+    with pytest.raises(ValueError):
+        first.merge(QuantileSketch(0.05))
+
+
+def test_empty_sketch_and_invalid_arguments():
+    sketch = QuantileSketch()
+    sketch.extend([])
+    assert math.isnan(sketch.quantile(0.5))
+    with pytest.raises(ValueError):
+        sketch.quantile(1.5)
+    with pytest.raises(ValueError):
+        QuantileSketch(1.0)
@@ -0,0 +1,153 @@
+"""Tests of MeterStore"""
+import math
+import os
+from datetime import timedelta
+
+import pytest
+
+from classes.consumtion_data import to_epoch
+from classes.file_reader import FileReader
+from classes.meter_store import INTERPOLATION_METHODS, READING_COLUMNS, MeterStore
+from classes.parse_cache import ParseCache
+from tests.documents import FIXTURES, START
+
+ESL_FIXTURE = os.path.join(FIXTURES, "ESL-Files", "20190301_ESL.xml")
+DAY = 86400
+
+
+def write_esl_files(directory, periods: dict[str, tuple[str, float]]) -> None:
+    """Writes ESL files named like the keys with the given period end and tariff 1 value."""
+    with open(ESL_FIXTURE, encoding="utf-8") as file:
+        template = file.read()
+    os.makedirs(directory, exist_ok=True)
+    for name, (end, value) in periods.items():
+        content = template.replace("2019-03-01T00:00:00", end)
+        content = content.replace('"1234.5"', f'"{value}"').replace('"12.5"', f'"{value / 2}"')
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as file:
+            file.write(content)
+
+
+def meter_data_columns(meter_data) -> dict:
+    """Sorts the readings of MeterData objects per sensor, the first of a timestamp wins."""
+    rows = {}
+    for data in meter_data:
+        for sensor_id, entry in data.data.items():
+            rows.setdefault(sensor_id, {}).setdefault(
+                to_epoch(data.timestamp), (entry.totalcost, entry.highcost, entry.lowcost)
+            )
+    return {
+        sensor_id: [(timestamp, *readings[timestamp]) for timestamp in sorted(readings)]
+        for sensor_id, readings in rows.items()
+    }
+
+
+def store_columns(meter_store) -> dict:
+    """Returns the readings of every sensor of a MeterStore as rows."""
+    return {
+        sensor_id: list(
+            zip(series.timestamps, *(getattr(series, column) for column in READING_COLUMNS))
+        )
+        for sensor_id, series in meter_store.series.items()
+    }
+
+
+def test_store_matches_meter_data(tmp_path):
+    esl_dir = tmp_path / "ESL-Files"
+    write_esl_files(
+        esl_dir,
+        {
+            "20190101_ESL.xml": ("2019-02-01T00:00:00", 1000.0),
+            "20190201_ESL.xml": ("2019-01-01T00:00:00", 900.0),
+            # Same period as the first file, its readings are skipped
+            "20190301_ESL.xml": ("2019-02-01T00:00:00", 1111.0),
+            "20190401_ESL.xml": ("2019-04-01T00:00:00", 1300.5),
+        },
+    )
+    expected = meter_data_columns(FileReader.read_esl_files(str(esl_dir)))
+    assert sorted(expected) == ["ID735", "ID742"]
+    assert store_columns(FileReader.read_esl_store(str(esl_dir))) == expected
+
+    cache_path = str(tmp_path / "esl.cache")
+    files = FileReader.list_xml_files(str(esl_dir))
+    cold = FileReader.read_esl_store(str(esl_dir), cache=ParseCache(cache_path), files=files)
+    cache = ParseCache(cache_path)
+    warm = FileReader.read_esl_store(str(esl_dir), cache=cache, files=files)
+    assert store_columns(cold) == store_columns(warm) == expected
+    assert (cache.hits, cache.misses) == (len(files), 0)
+
+
+def test_obis_sensors_are_configurable(tmp_path):
+    esl_dir = tmp_path / "ESL-Files"
+    write_esl_files(
+        esl_dir,
+        {
+            "20190101_ESL.xml": ("2019-01-01T00:00:00", 1000.0),
+            "20190201_ESL.xml": ("2019-02-01T00:00:00", 1100.0),
+        },
+    )
+    default = FileReader.read_esl_store(str(esl_dir))
+    assert store_columns(default)["ID742"][0][1:] == (1678.25, 1000.0, 678.25)
+    assert store_columns(default)["ID735"][0][1:] == (503.0, 500.0, 3.0)
+
+    obis_sensors = {"1-1:1.8.1": "Bezug", "1-1:1.8.2": "Bezug", "1-1:2.8.2": "ID735"}
+    # Sent to worker processes and cached with the mapping
+    cache = ParseCache(str(tmp_path / "esl.cache"), options=obis_sensors)
+    configured = FileReader.read_esl_store(str(esl_dir), 2, cache, obis_sensors=obis_sensors)
+    assert configured.sensor_ids() == ["Bezug", "ID735"]
+    assert store_columns(configured)["Bezug"] == store_columns(default)["ID742"]
+    assert store_columns(configured)["ID735"][1][1:] == (3.0, 0.0, 3.0)
+
+    other_cache = ParseCache(str(tmp_path / "esl.cache"))
+    assert other_cache.entries == {}
+    assert store_columns(FileReader.read_esl_store(str(esl_dir), cache=other_cache)) == (
+        store_columns(default)
+    )
+    meter_data = FileReader.read_esl_files(str(esl_dir), obis_sensors=obis_sensors)
+    assert sorted(meter_data[0].data) == ["Bezug", "ID735"]
+
+
+@pytest.fixture
+def meter_store():
+    """Readings of ID742 on three days, the second one delivered twice."""
+    store = MeterStore()
+    for day, totalcost in ((3, 130.0), (1, 100.0), (2, 110.0), (2, 999.0)):
+        store.add_reading("ID742", to_epoch(START) + day * DAY, totalcost, totalcost / 2, 0.0)
+    return store
+
+
+def test_readings_at_their_timestamps(meter_store):
+    times = [START + timedelta(days=day) for day in (1, 2, 3)]
+    for method in INTERPOLATION_METHODS:
+        assert list(meter_store.readings_at("ID742", times, method)) == [100.0, 110.0, 130.0]
+    assert meter_store.reading_at("ID742", times[2], column="highcost") == 65.0
+
+
+def test_linear_interpolation(meter_store):
+    noon = START + timedelta(days=2, hours=12)
+    assert meter_store.reading_at("ID742", noon, "linear") == 120.0
+    assert meter_store.reading_at("ID742", noon - timedelta(hours=6), "linear") == 115.0
+    # Unsorted times are found as well
+    times = [noon, START + timedelta(days=1, hours=6)]
+    assert list(meter_store.readings_at("ID742", times, "linear")) == [120.0, 102.5]
+    assert meter_store.consumption_between("ID742", START + timedelta(days=1), noon) == 20.0
+
+
+def test_times_outside_the_readings(meter_store):
+    before, after = START, START + timedelta(days=4)
+    assert math.isnan(meter_store.reading_at("ID742", before, "linear"))
+    assert math.isnan(meter_store.reading_at("ID742", after, "linear"))
+    assert math.isnan(meter_store.consumption_between("ID742", before, after))
+    # The nearest reading is the first or the last one
+    assert list(meter_store.readings_at("ID742", [before, after])) == [100.0, 130.0]
+    assert math.isnan(meter_store.reading_at("ID000", after))
+    assert len(meter_store.query("ID000")) == 0
+    with pytest.raises(ValueError):
+        meter_store.reading_at("ID742", after, "cubic")
+
+
+def test_repeated_timestamps_keep_the_first_reading(meter_store):
+    series = meter_store.query("ID742")
+    assert list(series.timestamps) == [to_epoch(START) + day * DAY for day in (1, 2, 3)]
+    assert list(series.totalcost) == [100.0, 110.0, 130.0]
+    window = meter_store.query("ID742", START + timedelta(days=2), START + timedelta(days=3))
+    assert list(window.totalcost) == [110.0, 130.0]
@@ -0,0 +1,71 @@
+"""Tests of ParseCache"""
+import os
+import shutil
+
+import pytest
+
+from classes.file_reader import FileReader
+from classes.parse_cache import ParseCache, decode, encode
+from tests.documents import FIXTURES, SDAT_FIXTURES, START, columns, make_document
+
+
+def readings(meter_data) -> tuple:
+    """Returns the timestamp and the readings of a MeterData, to compare them."""
+    return meter_data.timestamp, {
+        sensor_id: (entry.totalcost, entry.highcost, entry.lowcost)
+        for sensor_id, entry in meter_data.data.items()
+    }
+
+
+@pytest.fixture
+def sdat_dir(tmp_path):
+    """A copy of the SDAT fixtures, so their modification times can be changed."""
+    return shutil.copytree(SDAT_FIXTURES, tmp_path / "SDAT-Files")
+
+
+def test_encode_round_trip():
+    document = make_document(START, [0.1, 0.2, 1e-9], skip=(1,))
+    assert columns(decode(encode(document))) == columns(document)
+    meter_data = FileReader.read_esl_file(os.path.join(FIXTURES, "ESL-Files", "20190301_ESL.xml"))
+    assert readings(decode(encode(meter_data))) == readings(meter_data)
+    meter_readings = FileReader.read_esl_readings(
+        os.path.join(FIXTURES, "ESL-Files", "20190301_ESL.xml")
+    )
+    assert decode(encode(meter_readings)) == meter_readings
+
+
+def test_warm_start_reads_the_cache(sdat_dir, tmp_path):
+    cache_path = str(tmp_path / "cache" / "parse.cache")
+    cold = FileReader.read_sdat_files(str(sdat_dir), cache=ParseCache(cache_path))
+    cache = ParseCache(cache_path)
+    warm = FileReader.read_sdat_files(str(sdat_dir), cache=cache)
+    assert list(map(columns, warm)) == list(map(columns, cold))
+    assert (cache.hits, cache.misses) == (len(cold), 0)
+
+
+def test_changed_files_are_parsed_again(sdat_dir, tmp_path):
+    cache_path = str(tmp_path / "parse.cache")
+    FileReader.read_sdat_files(str(sdat_dir), cache=ParseCache(cache_path))
+    touched, changed = sorted(os.listdir(sdat_dir))[:2]
+    os.utime(sdat_dir / touched, ns=(0, 0))
+    content = (sdat_dir / changed).read_bytes().replace(b"0.120", b"0.125")
+    (sdat_dir / changed).write_bytes(content)
+
+    cache = ParseCache(cache_path)
+    documents = FileReader.read_sdat_files(str(sdat_dir), cache=cache)
+    # Only the mtime of the touched file changed, its content hash still matches
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert documents[1].volumes[0] == 0.125
+
+
+def test_esl_files_and_invalidate(tmp_path):
+    cache_path = str(tmp_path / "parse.cache")
+    esl_dir = os.path.join(FIXTURES, "ESL-Files")
+    cold = FileReader.read_esl_files(esl_dir, cache=ParseCache(cache_path))
+    cache = ParseCache(cache_path)
+    warm = FileReader.read_esl_files(esl_dir, cache=cache)
+    assert list(map(readings, warm)) == list(map(readings, cold))
+    assert cache.hits == 1
+    cache.invalidate()
+    assert not os.path.exists(cache_path)
+    assert ParseCache(cache_path).get(os.path.join(esl_dir, "20190301_ESL.xml")) is None
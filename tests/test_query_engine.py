@@ -0,0 +1,77 @@
+"""Tests of QueryEngine"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from classes.query_engine import QueryEngine
+from classes.rollup_pyramid import RollupPyramid
+from tests.documents import START, make_document
+
+
+@pytest.fixture
+def query_engine():
+    """Two days of 1.0 per quarter hour of ID742 and a day of 2.0 of ID735."""
+    first = make_document(START, [1.0] * 192)
+    second = make_document(START, [2.0] * 96)
+    rollups = {
+        "ID742": RollupPyramid.from_series(first.timestamps, first.volumes),
+        "ID735": RollupPyramid.from_series(second.timestamps, second.volumes),
+    }
+    return QueryEngine(rollups, max_entries=3)
+
+
+def test_repeated_queries_are_hits(query_engine):
+    result = query_engine.query("ID742")
+    assert result == ((START, START + timedelta(days=1)), (96.0, 96.0))
+    assert query_engine.query("ID742") is result
+    # Other arguments are other queries
+    assert query_engine.query("ID742", aggregate="count") == (result[0], (96, 96))
+    assert query_engine.query("ID742", START + timedelta(days=1)) == (result[0][1:], (96.0,))
+    assert (query_engine.hits, query_engine.misses) == (1, 3)
+    assert query_engine.query("ID000") == ((), ())
+    assert query_engine.stats() == "3 cached results, 1 hits, 4 misses"
+
+
+def test_least_recently_used_results_are_dropped(query_engine):
+    for granularity in ("hour", "day", "month"):
+        query_engine.query("ID742", granularity=granularity)
+    # The hour is used again, the day is the least recently used result
+    query_engine.query("ID742", granularity="hour")
+    query_engine.query("ID742", granularity="year")
+    assert [key[3] for key in query_engine.results] == ["month", "hour", "year"]
+    query_engine.query("ID742", granularity="day")
+    assert (query_engine.hits, query_engine.misses) == (1, 5)
+    assert len(query_engine.results) == 3
+
+
+def test_results_are_invalidated_after_an_update(query_engine):
+    before = query_engine.query("ID742", granularity="month")
+    other = query_engine.query("ID735", granularity="month")
+    assert before[1] == (192.0,)
+    third_day = make_document(START + timedelta(days=2), [0.5] * 96)
+    overlap = make_document(START, [3.0])
+    rollup = query_engine.rollups["ID742"]
+    rollup.update(third_day.timestamps, third_day.volumes)
+    rollup.update(overlap.timestamps, overlap.volumes)
+    # The cached result is returned until the sensor is invalidated
+    assert query_engine.query("ID742", granularity="month") is before
+
+    query_engine.invalidate(["ID742"])
+    assert query_engine.query("ID742", granularity="month") == (before[0], (242.0,))
+    assert query_engine.query("ID735", granularity="month") is other
+    query_engine.invalidate()
+    assert not query_engine.results
+
+
+def test_observations_and_downsampling(query_engine):
+    end = datetime(2019, 3, 1, 23, 45)
+    starts, volumes = query_engine.query("ID742", START, end, "observation")
+    assert len(starts) == len(volumes) == 96 and starts[-1] == end
+    starts, volumes = query_engine.query("ID742", granularity="observation", max_points=10)
+    assert len(starts) <= 10
+    # The first and the last observation are kept
+    assert (starts[0], starts[-1]) == (START, datetime(2019, 3, 2, 23, 45))
+    with pytest.raises(ValueError):
+        query_engine.query("ID742", granularity="minute")
+    with pytest.raises(ValueError):
+        query_engine.query("ID742", aggregate="median")
@@ -0,0 +1,83 @@
+"""Tests of ReadingReconstructor"""
+import random
+
+import pytest
+
+import classes.reading_reconstructor as reading_reconstructor
+from classes.consumtion_data import to_epoch
+from classes.meter_store import MeterSeries
+from classes.reading_reconstructor import ReadingReconstructor
+from tests.documents import START, make_document
+
+FIRST = to_epoch(START)
+DAY = 86400
+
+
+def make_meter_series(readings: list[tuple[int, float]]) -> MeterSeries:
+    """Creates the ESL readings of a sensor from (timestamp, totalcost) pairs."""
+    meter_series = MeterSeries()
+    for timestamp, totalcost in readings:
+        meter_series.append(timestamp, totalcost, 0.0, 0.0)
+    return meter_series
+
+
+@pytest.fixture
+def meter_readings():
+    """Two days of 1.0 per quarter hour, anchored at the start, after a day and at the end."""
+    series = make_document(START, [1.0] * 192)
+    # 96.0 observed per day: 5.0 more on the first and 2.0 less on the second day
+    anchors = make_meter_series([(FIRST, 100.0), (FIRST + DAY, 201.0), (FIRST + 2 * DAY, 295.0)])
+    return ReadingReconstructor.reconstruct(series, anchors)
+
+
+def test_anchors_are_met_and_report_their_drift(meter_readings):
+    assert [anchor.drift for anchor in meter_readings.anchors] == [0.0, 5.0, -2.0]
+    assert [anchor.expected for anchor in meter_readings.anchors] == [100.0, 196.0, 297.0]
+    assert meter_readings.max_drift() == 5.0
+    # The readings are at the end of every interval
+    assert meter_readings.timestamps[0] == FIRST + 900
+    for anchor in meter_readings.anchors[1:]:
+        position = list(meter_readings.timestamps).index(to_epoch(anchor.timestamp))
+        assert meter_readings.readings[position] == anchor.reading
+
+
+def test_intervals_are_offset_by_the_nearest_anchor(meter_readings):
+    readings = meter_readings.readings
+    # The first anchor is nearest up to noon of the first day, an end on the midpoint included
+    assert readings[0] == 101.0 and readings[47] == 148.0
+    # Offset of the second anchor: 201.0 - 96.0, up to noon of the second day
+    assert readings[48] == 154.0 and readings[143] == 249.0
+    # Offset of the third anchor: 295.0 - 192.0
+    assert readings[144] == 248.0 and readings[191] == 295.0
+
+
+def test_unknown_resolution_is_taken_from_the_observations(meter_readings):
+    series = make_document(START, [1.0] * 192)
+    series.resolution = None
+    anchors = make_meter_series([(FIRST, 100.0), (FIRST + DAY, 201.0), (FIRST + 2 * DAY, 295.0)])
+    found = ReadingReconstructor.reconstruct(series, anchors)
+    assert found.timestamps == meter_readings.timestamps
+    assert found.readings == meter_readings.readings
+
+
+def test_series_without_anchors():
+    series = make_document(START, [1.0] * 4)
+    assert ReadingReconstructor.reconstruct(series, make_meter_series([(FIRST - DAY, 1.0)])) is None
+    assert ReadingReconstructor.reconstruct(series, MeterSeries()) is None
+
+
+@pytest.mark.skipif(reading_reconstructor.np is None, reason="NumPy is not installed")
+def test_numpy_and_python_give_the_same_readings(monkeypatch):
+    rng = random.Random(1)
+    volumes = [rng.choice((1e6, 1.0, 1e-6)) * rng.random() for _ in range(96 * 60)]
+    series = make_document(START, volumes, skip=set(rng.sample(range(len(volumes)), 300)))
+    anchors = make_meter_series(
+        [(FIRST + day * DAY + rng.randrange(96) * 900, 1e4 * day) for day in range(0, 61, 7)]
+    )
+    with_numpy = ReadingReconstructor.reconstruct(series, anchors)
+    monkeypatch.setattr(reading_reconstructor, "np", None)
+    without_numpy = ReadingReconstructor.reconstruct(series, anchors)
+    assert with_numpy.readings == without_numpy.readings
+    assert [(anchor.expected, anchor.drift) for anchor in with_numpy.anchors] == [
+        (anchor.expected, anchor.drift) for anchor in without_numpy.anchors
+    ]
@@ -0,0 +1,101 @@
+"""Tests of RollupPyramid"""
+import random
+from array import array
+
+import pytest
+
+import classes.rollup_pyramid as rollup_pyramid
+from classes.consumtion_data import to_epoch
+from classes.rollup_pyramid import ROLLUP_LEVELS, RollupPyramid
+from tests.documents import START
+
+
+def make_series(days: int, seed: int = 1) -> tuple[array, array]:
+    """Creates 15-minute observations with gaps and volumes of very different size."""
+    rng = random.Random(seed)
+    first = to_epoch(START)
+    timestamps = array("q")
+    volumes = array("d")
+    for i in range(days * 96):
+        if rng.random() < 0.05:
+            continue
+        timestamps.append(first + i * 900)
+        volumes.append(rng.choice((1e9, 1.0, 1e-7)) * rng.random())
+    return timestamps, volumes
+
+
+def levels(pyramid: RollupPyramid) -> dict:
+    """Returns the columns of every level as lists."""
+    return {
+        name: [
+            list(getattr(pyramid.level(name), column))
+            for column in ("starts", "sums", "mins", "maxs", "counts")
+        ]
+        for name, _, _, _ in ROLLUP_LEVELS
+    }
+
+
+@pytest.mark.skipif(rollup_pyramid.np is None, reason="NumPy is not installed")
+def test_numpy_and_python_give_the_same_buckets(monkeypatch):
+    timestamps, volumes = make_series(400)
+    with_numpy = RollupPyramid.from_series(timestamps, volumes)
+    monkeypatch.setattr(rollup_pyramid, "np", None)
+    without_numpy = RollupPyramid.from_series(timestamps, volumes)
+    assert levels(with_numpy) == levels(without_numpy)
+
+
+def sequential_totals(timestamps: array, volumes: array, floor) -> dict:
+    """Adds up the volumes of every bucket in time order, like the aggregation dicts."""
+    totals = {}
+    for timestamp, volume in zip(timestamps, volumes):
+        bucket = floor(timestamp)
+        totals[bucket] = totals.get(bucket, 0.0) + volume
+    return totals
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_sums_equal_the_observation_totals(monkeypatch, use_numpy):
+    if use_numpy and rollup_pyramid.np is None:
+        pytest.skip("NumPy is not installed")
+    if not use_numpy:
+        monkeypatch.setattr(rollup_pyramid, "np", None)
+    timestamps, volumes = make_series(400)
+    pyramid = RollupPyramid.from_series(timestamps, volumes)
+    for name, _, floor, _ in ROLLUP_LEVELS:
+        level = pyramid.level(name)
+        totals = sequential_totals(timestamps, volumes, floor)
+        # Exactly equal, not within rounding
+        assert dict(zip(level.starts, level.sums)) == totals
+        assert sum(level.counts) == len(volumes)
+
+
+def test_update_rebuilds_touched_buckets():
+    timestamps, volumes = make_series(30)
+    pyramid = RollupPyramid.from_series(timestamps[:1000], volumes[:1000])
+    pyramid.update(timestamps[1000:], volumes[1000:])
+    assert levels(pyramid) == levels(RollupPyramid.from_series(timestamps, volumes))
+    assert pyramid.update([timestamps[0]], [2.0]) == 1
+    volumes[0] = 2.0
+    assert levels(pyramid) == levels(RollupPyramid.from_series(timestamps, volumes))
+
+
+@pytest.mark.skipif(rollup_pyramid.np is None, reason="NumPy is not installed")
+@pytest.mark.parametrize("name, floor_numpy, floor, following", ROLLUP_LEVELS)
+@pytest.mark.parametrize("first, stop", [(0, 0), (5, 6), (0, 1000), (37, 2001), (0, None)])
+def test_rollup_numpy_matches_rollup(name, floor_numpy, floor, following, first, stop):
+    timestamps, volumes = make_series(400)
+    stop = len(timestamps) if stop is None else stop
+    expected = RollupPyramid.rollup(timestamps, volumes, floor, following, first, stop)
+    found = RollupPyramid.rollup_numpy(timestamps, volumes, floor_numpy, first, stop)
+    for column in ("starts", "sums", "mins", "maxs", "counts"):
+        assert getattr(found, column) == getattr(expected, column), name
+
+
+@pytest.mark.skipif(rollup_pyramid.np is None, reason="NumPy is not installed")
+def test_numpy_updates_match_python_build(monkeypatch):
+    timestamps, volumes = make_series(60)
+    pyramid = RollupPyramid()
+    for first in range(0, len(timestamps), 700):
+        pyramid.update(timestamps[first:first + 700], volumes[first:first + 700])
+    monkeypatch.setattr(rollup_pyramid, "np", None)
+    assert levels(pyramid) == levels(RollupPyramid.from_series(timestamps, volumes))
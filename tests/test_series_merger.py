@@ -0,0 +1,83 @@
+"""Tests of SeriesMerger"""
+import pytest
+
+from classes.consumtion_data import ConsumptionData, to_epoch
+from classes.series_merger import MergeReport, SeriesMerger
+from tests.documents import HOUR, QUARTER_HOUR, START, make_document
+
+
+def test_regular_documents_are_concatenated():
+    report = MergeReport()
+    series = SeriesMerger.merge(
+        [make_document(START + 4 * QUARTER_HOUR, [3.0, 4.0]), make_document(START, [1.0] * 4)],
+        report=report,
+    )
+    assert list(series.volumes) == [1.0, 1.0, 1.0, 1.0, 3.0, 4.0]
+    assert report.overlaps == [] and report.gaps == []
+
+
+def test_single_document_with_gap_is_not_an_overlap():
+    report = MergeReport()
+    document = make_document(START, [1.0, 2.0, 3.0, 4.0], skip=(1, 2))
+    series = SeriesMerger.merge([document], report=report)
+    assert list(series.volumes) == [1.0, 4.0]
+    assert report.overlaps == []
+    assert [(gap.start, gap.end) for gap in report.gaps] == [
+        (START + QUARTER_HOUR, START + 3 * QUARTER_HOUR)
+    ]
+
+
+def test_mixed_resolutions_are_not_overlaps_or_gaps():
+    report = MergeReport()
+    hourly = make_document(START, [4.0, 4.0, 4.0], resolution=HOUR)
+    quarter_hourly = make_document(START + 3 * HOUR, [1.0, 1.0])
+    series = SeriesMerger.merge([hourly, quarter_hourly], report=report)
+    assert list(series.timestamps) == [to_epoch(START + i * HOUR) for i in range(4)] + [
+        to_epoch(START + 3 * HOUR + QUARTER_HOUR)
+    ]
+    assert report.overlaps == [] and report.gaps == []
+    assert series.resolution == QUARTER_HOUR
+
+
+@pytest.mark.parametrize(
+    "policy, volumes",
+    [
+        ("latest", [1.0, 5.0, 5.0, 2.0]),
+        ("first", [1.0, 1.0, 1.0, 2.0]),
+        ("flag", [1.0, 1.0, 1.0, 2.0]),
+    ],
+)
+def test_policies(policy, volumes):
+    report = MergeReport()
+    first = make_document(START, [1.0, 1.0, 1.0])
+    second = make_document(START + QUARTER_HOUR, [5.0, 5.0, 2.0])
+    series = SeriesMerger.merge([first, second], policy, report)
+    assert list(series.volumes) == volumes
+    assert len(report.overlaps) == 1
+    overlap = report.overlaps[0]
+    assert (overlap.documents, overlap.duplicates, overlap.conflicts) == (2, 0, 2)
+    if policy == "flag":
+        assert [(timestamp, values) for _, timestamp, values in report.conflicts] == [
+            (START + QUARTER_HOUR, [1.0, 5.0]),
+            (START + 2 * QUARTER_HOUR, [1.0, 5.0]),
+        ]
+    else:
+        assert report.conflicts == []
+
+
+def test_duplicates_are_not_conflicts():
+    report = MergeReport()
+    documents = [make_document(START, [1.0, 2.0]), make_document(START, [1.0, 2.0])]
+    series = SeriesMerger.merge(documents, "flag", report)
+    assert list(series.volumes) == [1.0, 2.0]
+    assert report.duplicates() == 2 and report.conflict_count() == 0
+    assert report.conflicts == []
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        SeriesMerger.merge([make_document(START, [1.0])], "newest")
+
+
+def test_empty_documents():
+    assert SeriesMerger.merge([ConsumptionData("ID742", START, START)]) is None
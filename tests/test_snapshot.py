@@ -0,0 +1,58 @@
+"""Tests of Snapshot"""
+import os
+
+import pytest
+
+from classes.consumtion_data import to_epoch
+from classes.file_reader import FileReader
+from classes.meter_store import READING_COLUMNS
+from classes.snapshot import Snapshot
+from tests.documents import FIXTURES, SDAT_FIXTURES, START, columns, make_document
+
+
+def meter_columns(meter_store) -> dict:
+    """Returns every column of every sensor of a MeterStore as lists."""
+    return {
+        sensor_id: [
+            list(getattr(series, column)) for column in ("timestamps",) + READING_COLUMNS
+        ]
+        for sensor_id, series in meter_store.series.items()
+    }
+
+
+@pytest.fixture
+def source():
+    """The SDAT and ESL fixtures, a document of unknown resolution and an unsorted sensor."""
+    data_consumption = FileReader.read_sdat_files(SDAT_FIXTURES)
+    unknown_resolution = make_document(START, [0.5, 1.5, 2.5], skip={1})
+    unknown_resolution.resolution = None
+    data_consumption.append(unknown_resolution)
+    meter_store = FileReader.read_esl_store(os.path.join(FIXTURES, "ESL-Files"))
+    # An ID of a length that needs padding, its readings added out of order
+    for day, totalcost in ((2, 20.0), (1, 10.0)):
+        meter_store.add_reading("Zähler 1", to_epoch(START) + day * 86400, totalcost, 0.5, 0.25)
+    return data_consumption, meter_store
+
+
+def test_loaded_snapshot_matches_source(tmp_path, source):
+    data_consumption, meter_store = source
+    path = str(tmp_path / "cache" / "snapshot.bin")
+    Snapshot.write(path, data_consumption, meter_store)
+    loaded_consumption, loaded_store = Snapshot.load(path)
+
+    assert list(map(columns, loaded_consumption)) == list(map(columns, data_consumption))
+    assert loaded_consumption[-1].resolution is None
+    assert loaded_store.sensor_ids() == ["ID735", "ID742", "Zähler 1"]
+    assert meter_columns(loaded_store) == meter_columns(meter_store)
+    assert meter_columns(loaded_store)["Zähler 1"][1] == [10.0, 20.0]
+
+    # The meter readings are copied out of the mapped file, new ones can be added
+    loaded_store.add_reading("ID742", to_epoch(START) + 3 * 86400, 1.0, 1.0, 0.0)
+    assert len(loaded_store.query("ID742")) == len(meter_store.query("ID742")) + 1
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "snapshot.bin"
+    path.write_bytes(b"M306SNAP" + bytes(24))
+    with pytest.raises(ValueError):
+        Snapshot.load(str(path))